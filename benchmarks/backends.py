@@ -0,0 +1,77 @@
+"""
+Latency comparison of the AI backends.
+
+    PYTHONPATH=src python benchmarks/backends.py [--requests N] [--openai-url URL] [--openai-model NAME]
+
+Each backend streams the same prompts; the time until the command line is
+known (what the user waits for) and until the full answer are reported. By
+default the backends are the in-process fake and the Claude and
+OpenAI-compatible protocols against the local stub, which measures the
+client-side overhead of each path. Pass `--openai-url` (e.g. the llama.cpp
+server at http://localhost:8080/v1) to add a real local inference server.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from stub_server import StubServer  # noqa: E402
+
+from askit.providers.claude import ClaudeProvider  # noqa: E402
+from askit.providers.fake import FakeProvider  # noqa: E402
+from askit.providers.openai import OpenAICompatibleProvider  # noqa: E402
+
+PROMPTS = ["list the files here", "show disk usage", "which process uses the most memory", "find which process listens on port 8080"]
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def run(provider, requests: int) -> tuple[list[float], list[float]]:
+    to_command, total = [], []
+    # The first request opens the connection; it is not measured
+    provider.stream_suggestion("warm-up", "ctx")
+    for i in range(requests):
+        start = time.perf_counter()
+        seen = []
+        provider.stream_suggestion(PROMPTS[i % len(PROMPTS)], "ctx", on_command=lambda c, cmd: seen.append(time.perf_counter()))
+        end = time.perf_counter()
+        total.append(end - start)
+        to_command.append((seen[0] if seen else end) - start)
+    return to_command, total
+
+
+def report(label: str, to_command: list[float], total: list[float]):
+    print(
+        f"{label:<22} command p50 {percentile(to_command, 50) * 1000:7.1f} ms  p95 {percentile(to_command, 95) * 1000:7.1f} ms"
+        f"   total p50 {percentile(total, 50) * 1000:7.1f} ms  p95 {percentile(total, 95) * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--openai-url", help="Base URL of a real OpenAI-compatible server, e.g. http://localhost:8080/v1")
+    parser.add_argument("--openai-model", default="local-model")
+    args = parser.parse_args()
+
+    report("fake (in-process)", *run(FakeProvider(), args.requests))
+
+    server = StubServer().start()
+    try:
+        report("claude (stub)", *run(ClaudeProvider(api_key="bench", api_url=server.url), args.requests))
+        report("openai (stub)", *run(OpenAICompatibleProvider(base_url=server.openai_base_url), args.requests))
+    finally:
+        server.stop()
+
+    if args.openai_url:
+        provider = OpenAICompatibleProvider(base_url=args.openai_url, model=args.openai_model)
+        report(f"openai ({args.openai_url})", *run(provider, args.requests))
+
+
+if __name__ == "__main__":
+    main()
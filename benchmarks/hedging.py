@@ -0,0 +1,77 @@
+"""
+Benchmark of hedged requests against a local stub with injected delays.
+
+    PYTHONPATH=src python benchmarks/hedging.py [--requests N]
+
+The stub answers most requests in ~20 ms and a few (3%) in 800 ms, like an
+upstream with occasional slow responses. The same sequence of requests is run
+without and with hedging, and the latency percentiles and the share of
+duplicate requests are reported.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+from stub_server import StubServer  # noqa: E402
+
+from askit.providers.claude import ClaudeProvider  # noqa: E402
+from askit.providers.hedging import MIN_SAMPLES, Hedger, LatencyHistogram  # noqa: E402
+
+FAST, SLOW, SLOW_SHARE = 0.02, 0.8, 0.03
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def run(requests: int, hedger, seed: int, warmup: int = 0) -> tuple[list[float], int]:
+    server = StubServer().start()
+    rng = random.Random(seed)
+    # Duplicates draw their delay from the same distribution
+    for _ in range((warmup + requests) * 2):
+        server.enqueue(delay=SLOW if rng.random() < SLOW_SHARE else FAST, chunk_size=64)
+    provider = ClaudeProvider(api_key="bench", api_url=server.url, hedger=hedger)
+
+    # Warm-up requests fill the histogram, as earlier runs would have
+    for i in range(warmup):
+        provider.stream_suggestion(f"warm-up {i}", "ctx")
+    sent_before = len(server.requests)
+
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        provider.stream_suggestion(f"request {i}", "ctx")
+        latencies.append(time.perf_counter() - start)
+    sent = len(server.requests) - sent_before
+    server.stop()
+    return latencies, sent
+
+
+def report(label: str, latencies: list[float], sent: int):
+    print(
+        f"{label:<12} p50 {percentile(latencies, 50) * 1000:6.0f} ms  p95 {percentile(latencies, 95) * 1000:6.0f} ms"
+        f"  p99 {percentile(latencies, 99) * 1000:6.0f} ms  max {max(latencies) * 1000:6.0f} ms"
+        f"  duplicates {sent - len(latencies)} ({(sent - len(latencies)) / len(latencies):.0%})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    report("no hedging", *run(args.requests, None, seed=1))
+    with tempfile.TemporaryDirectory() as tmp:
+        histogram = LatencyHistogram(Path(tmp) / "latency_histogram.json")
+        hedger = Hedger(histogram, percentile=90, max_ratio=0.1)
+        report("hedging p90", *run(args.requests, hedger, seed=1, warmup=MIN_SAMPLES * 5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark of the shell history pipeline on a synthetic 1M-line history.
+
+    PYTHONPATH=src python benchmarks/history_pipeline.py [--lines N]
+
+Writes a bash-style history file mixing noise (`ls`, `cd ..`), runs of repeated
+commands, distinct commands and a few secrets, then times parsing and each
+pipeline stage on their own and chained.
+"""
+import argparse
+import random
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+
+from askit.core import history
+
+COMMANDS = [
+    "git status", "git diff --stat", "make test", "docker compose up -d", "kubectl get pods -n {n}",
+    "vim src/module_{n}.py", "grep -rn 'pattern_{n}' src", "python -m pytest -q tests/test_{n}.py",
+    "tail -f /var/log/app/{n}.log", "ssh deploy@host{n}.example.com",
+]
+NOISE = ["ls", "ls -la", "cd ..", "cd", "clear", "pwd"]
+SECRETS = ["export AWS_SECRET_ACCESS_KEY=wJalrXUtnFEMI{n}K7MDENGbPxRfiCY", "mysql -u root --password=s3cret{n}"]
+
+
+def write_history(path: Path, lines: int, seed: int = 0):
+    rng = random.Random(seed)
+    written = 0
+    with open(path, "w") as f:
+        while written < lines:
+            roll = rng.random()
+            if roll < 0.3:
+                line = rng.choice(NOISE)
+            elif roll < 0.31:
+                line = rng.choice(SECRETS).format(n=rng.randrange(1000))
+            else:
+                line = rng.choice(COMMANDS).format(n=rng.randrange(5000))
+            # Runs of repeats, as when re-running a command
+            repeats = min(1 + (rng.random() < 0.2) * rng.randrange(1, 4), lines - written)
+            f.write((line + "\n") * repeats)
+            written += repeats
+
+
+def timed(label: str, count: int, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed * 1000:9.1f} ms  {count / elapsed / 1e6:6.2f} M lines/s")
+    return result
+
+
+def drain(iterator):
+    deque(iterator, maxlen=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / ".bash_history"
+        write_history(path, args.lines)
+        content = path.read_text()
+        lines = timed("parse", args.lines, lambda: history._parse_plain_history(content, len(content)))
+        n = len(lines)
+        print(f"{n} history lines, {len(content) / 1e6:.1f} MB\n")
+
+        newest_first = lambda: (line for line in reversed(lines))
+        timed("dedup_consecutive", n, lambda: drain(history.dedup_consecutive(newest_first())))
+        timed("drop_noise", n, lambda: drain(history.drop_noise(newest_first())))
+        timed("dedup_global", n, lambda: drain(history.dedup_global(newest_first())))
+        timed("redact_secrets", n, lambda: drain(history.redact_secrets(newest_first())))
+        timed("score_relevance", n, lambda: drain(history.score_relevance(newest_first(), "restart the web pods")))
+        kept = timed("process_history", n, lambda: list(history.process_history(lines, "restart the web pods")))
+        print(f"\n{len(kept)} commands left after the pipeline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark of the secret scanner on contexts of typical and large sizes.
+
+    PYTHONPATH=src python benchmarks/secret_scanner.py
+
+Builds a request context from ordinary commands with the known secrets of
+tests/data/secret_corpus.json sprinkled in, and reports the time of one
+`redact()` call. A normal context (1000-token history budget) is about 4 KB
+and must take well under a millisecond.
+"""
+import json
+import random
+import time
+from pathlib import Path
+
+from askit.security.redaction import get_scanner
+
+CORPUS_FILE = Path(__file__).resolve().parent.parent / "tests" / "data" / "secret_corpus.json"
+SIZES = [4_000, 16_000, 64_000, 1_000_000]
+
+
+def make_context(size: int, corpus: dict, rng: random.Random) -> str:
+    lines = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.02:
+            line = rng.choice(corpus["secrets"])["text"]
+        else:
+            line = rng.choice(corpus["clean"])
+        line = f"{len(lines) + 1:2d}. {line}"
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def main():
+    corpus = json.loads(CORPUS_FILE.read_text())
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    scanner = get_scanner()
+    print(f"compile: {(time.perf_counter() - start) * 1000:.2f} ms, {len(scanner.detectors)} detectors\n")
+
+    for size in SIZES:
+        text = make_context(size, corpus, rng)
+        rounds = max(1, 2_000_000 // size)
+        findings = []
+        start = time.perf_counter()
+        for _ in range(rounds):
+            findings.clear()
+            scanner.redact(text, findings)
+        per_call = (time.perf_counter() - start) / rounds
+        print(f"{len(text):>9} chars  {per_call * 1000:8.3f} ms/call  {len(text) / per_call / 1e6:6.1f} MB/s  {len(findings)} secrets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Agent plan parsing and dependency-aware parallel execution.
+
+A plan is the EXPLANATION of an AGENT response: fenced ```bash blocks and
+`FILE: path` blocks, in document order. Each command line and each file is a
+step, and steps run in plan order: the prose around the blocks often implies
+an order (start a service, then probe it) that cannot be read from the
+commands.
+
+A bash block is only run concurrently when the plan says it may, with marker
+comments on its first lines: `# step: <name>` names the block and
+`# after: <name>[, <name>]` makes it wait for the named blocks. A marked
+block still waits for the earlier steps it conflicts with:
+
+- lines of the same bash block run in order;
+- standalone `cd`, `export`, `source`, ... lines are barriers;
+- package manager invocations never run concurrently (they share a lock);
+- steps touching the same arguments or overlapping paths run in plan order.
+"""
+import asyncio
+import re
+import shlex
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+DEFAULT_MAX_WORKERS = 4
+
+BASH_BLOCK_PATTERN = re.compile(r"```bash\n(.*?)\n```", re.DOTALL)
+FILE_BLOCK_PATTERN = re.compile(r"FILE: ([\w\./\\\{\}-]+)\n```(?:\w+)?\n(.*?)\n```", re.DOTALL)
+_STEP_MARKER = re.compile(r"^#\s*step:\s*(\S+)\s*$")
+_AFTER_MARKER = re.compile(r"^#\s*after:\s*(.+)$")
+
+_BARRIER_COMMANDS = {"cd", "pushd", "popd", "export", "unset", "source", ".", "set", "alias", "reboot", "shutdown"}
+_PACKAGE_MANAGERS = {
+    "apt", "apt-get", "dpkg", "dnf", "yum", "rpm", "zypper", "pacman", "apk",
+    "brew", "port", "snap", "choco", "winget", "scoop",
+}
+_WRAPPERS = {"sudo", "env", "nohup", "time"}
+_SHELL_OPERATORS = {"|", "||", "&&", ";", "&", ">", ">>", "<", "2>", "2>&1"}
+
+
+@dataclass
+class PlanStep:
+    index: int
+    kind: str  # "command" or "file"
+    command: str = ""
+    path: str = ""
+    content: str = ""
+    block: int = 0
+    name: Optional[str] = None
+    after: list[str] = field(default_factory=list)
+    depends_on: set[int] = field(default_factory=set)
+
+    @property
+    def marked(self) -> bool:
+        """Whether the plan declared this step's block with `# step:` / `# after:` markers."""
+        return self.name is not None or bool(self.after)
+
+    @property
+    def label(self) -> str:
+        return f"step {self.index + 1}"
+
+    @property
+    def description(self) -> str:
+        return self.command if self.kind == "command" else f"create {self.path}"
+
+
+@dataclass
+class PlanResult:
+    succeeded: bool
+    completed: list[int]
+    failed: Optional[PlanStep] = None
+    skipped: list[int] = field(default_factory=list)
+
+
+def parse_plan(explanation: str) -> list[PlanStep]:
+    """
+    Extracts command and file steps from a plan, in document order, with their dependencies.
+    """
+    file_matches = list(FILE_BLOCK_PATTERN.finditer(explanation))
+    file_spans = [m.span() for m in file_matches]
+
+    blocks = [(m.start(), "file", m) for m in file_matches]
+    for match in BASH_BLOCK_PATTERN.finditer(explanation):
+        # A FILE block written in bash is content, not commands to run
+        if any(start <= match.start() < end for start, end in file_spans):
+            continue
+        blocks.append((match.start(), "bash", match))
+    blocks.sort(key=lambda item: item[0])
+
+    steps: list[PlanStep] = []
+    for block_index, (_, kind, match) in enumerate(blocks):
+        if kind == "file":
+            steps.append(PlanStep(
+                index=len(steps), kind="file", block=block_index,
+                path=match.group(1).strip(), content=match.group(2).strip(),
+            ))
+            continue
+
+        name = None
+        after: list[str] = []
+        for line in match.group(1).strip().split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#"):
+                step_marker = _STEP_MARKER.match(line)
+                after_marker = _AFTER_MARKER.match(line)
+                if step_marker:
+                    name = step_marker.group(1)
+                elif after_marker:
+                    after.extend(n.strip() for n in after_marker.group(1).split(",") if n.strip())
+                continue
+            steps.append(PlanStep(index=len(steps), kind="command", command=line, block=block_index))
+
+        for step in steps:
+            if step.block == block_index:
+                step.name = name
+                step.after = after
+
+    build_dependencies(steps)
+    return steps
+
+
+def _command_words(command: str) -> list[str]:
+    try:
+        return shlex.split(command, comments=True)
+    except ValueError:
+        return command.split()
+
+
+def _program(words: list[str]) -> str:
+    for word in words:
+        if word not in _WRAPPERS and "=" not in word:
+            return word
+    return ""
+
+
+def _normalize(token: str) -> str:
+    token = token.strip("'\"")
+    while token.startswith("./"):
+        token = token[2:]
+    return token.rstrip("/") or token
+
+
+def _touched(step: PlanStep) -> set[str]:
+    """The arguments (paths, package names, services, ...) a step refers to."""
+    if step.kind == "file":
+        return {_normalize(step.path)}
+
+    words = _command_words(step.command)
+    program = _program(words)
+    touched = set()
+    for word in words:
+        if word in _SHELL_OPERATORS or word in _WRAPPERS or word == program or word.startswith("-"):
+            continue
+        touched.add(_normalize(word.lstrip("<>")))
+    touched.discard("")
+    return touched
+
+
+def _overlaps(a: str, b: str) -> bool:
+    return a == b or a.startswith(b + "/") or b.startswith(a + "/")
+
+
+def _is_barrier(step: PlanStep) -> bool:
+    return step.kind == "command" and _program(_command_words(step.command)) in _BARRIER_COMMANDS
+
+
+def _is_package_operation(step: PlanStep) -> bool:
+    return step.kind == "command" and _program(_command_words(step.command)) in _PACKAGE_MANAGERS
+
+
+def _conflicts(earlier: PlanStep, later: PlanStep) -> bool:
+    if not later.marked:
+        return True  # Unmarked steps keep the plan order
+    if earlier.kind == "command" and later.kind == "command" and earlier.block == later.block:
+        return True
+    if _is_barrier(earlier) or _is_barrier(later):
+        return True
+    if _is_package_operation(earlier) and _is_package_operation(later):
+        return True
+    if earlier.name and earlier.name in later.after:
+        return True
+    return any(_overlaps(a, b) for a in _touched(earlier) for b in _touched(later))
+
+
+def build_dependencies(steps: list[PlanStep]):
+    """Fills `depends_on` for every step. Edges always point to earlier steps, so the graph is acyclic."""
+    for i, step in enumerate(steps):
+        step.depends_on = {steps[j].index for j in range(i) if _conflicts(steps[j], step)}
+
+
+async def execute_plan(
+    steps: list[PlanStep],
+    run_step: Callable[[PlanStep], Awaitable[bool]],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> PlanResult:
+    """
+    Runs the steps with at most `max_workers` in flight, starting each one as soon
+    as its dependencies have completed.
+
+    On the first failure no new step is started; steps already running finish.
+    """
+    pending = {step.index: step for step in steps}
+    completed: list[int] = []
+    running: dict[asyncio.Task, PlanStep] = {}
+    failed: Optional[PlanStep] = None
+
+    while pending or running:
+        if failed is None:
+            for step in list(pending.values()):
+                if len(running) >= max_workers:
+                    break
+                if step.depends_on.issubset(completed):
+                    del pending[step.index]
+                    running[asyncio.create_task(run_step(step))] = step
+
+        if not running:
+            break
+
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            step = running.pop(task)
+            try:
+                ok = task.result()
+            except Exception:
+                ok = False
+            if ok:
+                completed.append(step.index)
+            elif failed is None:
+                failed = step
+
+    return PlanResult(
+        succeeded=failed is None and not pending,
+        completed=completed,
+        failed=failed,
+        skipped=sorted(pending),
+    )
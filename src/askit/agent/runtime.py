@@ -1,45 +1,57 @@
+import asyncio
 import re
-import subprocess
 from pathlib import Path
 from rich.console import Console
 from rich.prompt import Confirm, Prompt
 import shutil
 import sys
+from .plan import DEFAULT_MAX_WORKERS, PlanStep, execute_plan, parse_plan
+from ..core.executor import run_command
 from ..providers.base_provider import AIBaseProvider
+from ..providers.http_client import aclose_http_client
 
 console = Console()
 
-def execute_shell_command(command: str):
-    """Executes a shell command and prints its output."""
+async def execute_shell_command(command: str, label: str = "") -> bool:
+    """
+    Executes a shell command and streams its output.
+
+    When `label` is given, every printed line is prefixed with it so output
+    from concurrently running steps stays attributed.
+    """
+    prefix = f"[magenta]\\[{label}][/magenta] " if label else ""
     try:
-        console.print(f"[bold cyan]▶ Executing:[/bold cyan] [dim]{command}[/dim]")
-        process = subprocess.Popen(
-            command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-            text=True, encoding='utf-8', errors='replace'
-        )
-        for line in iter(process.stdout.readline, ''):
-            console.print(f"[dim]  {line.strip()}[/dim]")
-        process.stdout.close()
-        return_code = process.wait()
-        if return_code:
-            console.print(f"[bold red]✗ Command failed with exit code {return_code}[/bold red]")
+        console.print(f"{prefix}[bold cyan]▶ Executing:[/bold cyan] [dim]{command}[/dim]")
+        result = await run_command(command, console=console, label=label)
+        if result.log_file:
+            console.print(f"{prefix}[dim]  Full output saved to {result.log_file}[/dim]")
+        if result.return_code:
+            console.print(f"{prefix}[bold red]✗ Command failed with exit code {result.return_code}[/bold red]")
             return False
         else:
-            console.print(f"[bold green]✓ Command finished successfully[/bold green]")
+            console.print(f"{prefix}[bold green]✓ Command finished successfully[/bold green]")
             return True
     except Exception as e:
-        console.print(f"[bold red]✗ Failed to execute command:[/bold red] {e}")
+        console.print(f"{prefix}[bold red]✗ Failed to execute command:[/bold red] {e}")
         return False
 
-def create_file(file_path: str, content: str):
+def create_file(file_path: str, content: str) -> bool:
     """Creates a file with the given content, creating parent directories if needed."""
     try:
         path = Path(file_path)
         path.parent.mkdir(parents=True, exist_ok=True)
         path.write_text(content, encoding='utf-8')
         console.print(f"[bold green]✓ Created file:[/bold green] [yellow]{file_path}[/yellow]")
+        return True
     except Exception as e:
         console.print(f"[bold red]✗ Failed to create file {file_path}:[/bold red] {e}")
+        return False
+
+async def run_plan_step(step: PlanStep) -> bool:
+    """Runs one plan step off the event loop."""
+    if step.kind == "file":
+        return await asyncio.to_thread(create_file, step.path, step.content)
+    return await execute_shell_command(step.command, step.label)
 
 def check_tool_is_installed(tool_name: str) -> bool:
     """Checks if a command-line tool is installed and in the system's PATH."""
@@ -56,21 +68,41 @@ async def get_installation_command(tool_name: str, provider: AIBaseProvider) ->
         os_name = 'Windows'
     
     prompt = f"The command-line tool '{tool_name}' is not found on my {os_name} system. Provide the most common, single-line command to install it. Only the command, no other text."
-    confidence, command, _ = provider.get_suggestion(prompt=prompt, context="Provide an installation command.")
+    confidence, command, _ = await provider.aget_suggestion(prompt=prompt, context="Provide an installation command.")
     
     return command if confidence in ["HIGH", "MEDIUM"] and command else ""
 
-async def run_agent(initial_prompt: str, explanation: str, provider: AIBaseProvider):
+async def resolve_installation_commands(tools: list[str], provider: AIBaseProvider) -> dict[str, str]:
+    """
+    Asks the AI for the installation command of every missing tool at once.
+
+    The lookups are issued concurrently, so resolving N tools costs roughly one
+    API round trip instead of N.
+
+    Returns:
+        A mapping of tool name to install command ("" when none was found).
+    """
+    commands = await asyncio.gather(*(get_installation_command(tool, provider) for tool in tools))
+    return dict(zip(tools, commands))
+
+async def run_agent(initial_prompt: str, explanation: str, provider: AIBaseProvider, max_workers: int = DEFAULT_MAX_WORKERS):
     """
     Runs the autonomous agent mode by parsing and executing a plan.
-    Includes a pre-flight check for required tools.
+    Includes a pre-flight check for required tools. Independent plan steps
+    run concurrently, with at most `max_workers` at a time.
     """
+    try:
+        await _run_agent(initial_prompt, explanation, provider, max_workers)
+    finally:
+        # The async HTTP client is bound to this event loop
+        await aclose_http_client()
+
+
+async def _run_agent(initial_prompt: str, explanation: str, provider: AIBaseProvider, max_workers: int):
     console.print(f"[bold magenta]🚀 Agent Mode Activated[/bold magenta]")
     console.print(f"[dim]Initial objective:[/dim] [italic]{initial_prompt}[/italic]")
     console.print()
 
-    bash_command_pattern = re.compile(r"```bash\n(.*?)\n```", re.DOTALL)
-    file_creation_pattern = re.compile(r"FILE: ([\w\./\\\{\}-]+)\n```(?:\w+)?\n(.*?)\n```", re.DOTALL)
     user_input_pattern = re.compile(r"\{\{USER_INPUT:(.*?)\}\}")
 
     # --- Collect User Input ---
@@ -98,7 +130,8 @@ async def run_agent(initial_prompt: str, explanation: str, provider: AIBaseProvi
     # --- Pre-flight Checks ---
     console.print("[bold]🕵️  Performing pre-flight checks...[/bold]")
     required_tools = set()
-    all_commands = [cmd.strip() for match in bash_command_pattern.finditer(explanation) for cmd in match.group(1).strip().split('\n') if cmd.strip()]
+    steps = parse_plan(explanation)
+    all_commands = [step.command for step in steps if step.kind == "command"]
 
     for command in all_commands:
         tool_name = command.split(' ')[0]
@@ -109,37 +142,43 @@ async def run_agent(initial_prompt: str, explanation: str, provider: AIBaseProvi
         console.print("[dim]  - No external tools required.[/dim]")
     else:
         console.print(f"[dim]  - Required tools: {', '.join(required_tools)}[/dim]")
-        for tool in sorted(list(required_tools)):
-            if not check_tool_is_installed(tool):
-                console.print(f"[bold yellow]⚠️ Tool not found:[/bold yellow] [cyan]{tool}[/cyan]")
-                install_command = await get_installation_command(tool, provider)
-                if install_command:
-                    console.print(f"[dim]  - AI suggests this command for installation:[/dim] [green]{install_command}[/green]")
-                    if Confirm.ask(f"Do you want to run this command to install '{tool}'?", default=True):
-                        execute_shell_command(install_command)
-                        if not check_tool_is_installed(tool):
-                            console.print(f"[bold red]✗ Agent stopped: Could not install '{tool}'. Please install it manually and try again.[/bold red]")
-                            return
-                        console.print(f"[bold green]✓ Tool '{tool}' is now ready.[/bold green]")
-                    else:
-                        console.print(f"[bold red]✗ Agent stopped: Required tool '{tool}' not installed.[/bold red]")
-                        return
-                else:
-                    console.print(f"[bold red]✗ Agent stopped: Could not find installation instructions for '{tool}'. Please install it manually.[/bold red]")
+        missing_tools = [tool for tool in sorted(required_tools) if not check_tool_is_installed(tool)]
+
+        if missing_tools:
+            console.print(f"[bold yellow]⚠️ Tools not found:[/bold yellow] [cyan]{', '.join(missing_tools)}[/cyan]")
+            with console.status("[bold green]Looking up installation commands...", spinner="dots"):
+                install_plan = await resolve_installation_commands(missing_tools, provider)
+
+            unresolved = [tool for tool in missing_tools if not install_plan.get(tool)]
+            if unresolved:
+                console.print(f"[bold red]✗ Agent stopped: Could not find installation instructions for {', '.join(unresolved)}. Please install manually.[/bold red]")
+                return
+
+            console.print("[dim]  - AI suggests these commands for installation:[/dim]")
+            for tool in missing_tools:
+                console.print(f"    [cyan]{tool}[/cyan]: [green]{install_plan[tool]}[/green]")
+            if not Confirm.ask("Do you want to run these commands to install the missing tools?", default=True):
+                console.print(f"[bold red]✗ Agent stopped: Required tools not installed: {', '.join(missing_tools)}.[/bold red]")
+                return
+
+            for tool in missing_tools:
+                await execute_shell_command(install_plan[tool])
+                if not check_tool_is_installed(tool):
+                    console.print(f"[bold red]✗ Agent stopped: Could not install '{tool}'. Please install it manually and try again.[/bold red]")
                     return
+                console.print(f"[bold green]✓ Tool '{tool}' is now ready.[/bold green]")
     
     console.print("[bold green]✅ Pre-flight checks passed.[/bold green]\n")
 
     # --- Plan Execution ---
-    console.print("[bold]Executing plan...[/bold]")
-    for command in all_commands:
-        if not execute_shell_command(command):
-            console.print("[bold red]✗ Agent stopped due to a command failure.[/bold red]")
-            return
-
-    all_files = [(match.group(1).strip(), match.group(2).strip()) for match in file_creation_pattern.finditer(explanation)]
-
-    for file_path, content in all_files:
-        create_file(file_path, content)
+    parallel_steps = sum(1 for step in steps if not step.depends_on)
+    console.print(f"[bold]Executing plan...[/bold] [dim]({len(steps)} steps, {parallel_steps} can start immediately, up to {max_workers} at a time)[/dim]")
+    result = await execute_plan(steps, run_plan_step, max_workers=max_workers)
+    if not result.succeeded:
+        if result.failed is not None:
+            console.print(f"[bold red]✗ Agent stopped: {result.failed.label} failed:[/bold red] [dim]{result.failed.description}[/dim]")
+        if result.skipped:
+            console.print(f"[dim]  - {len(result.skipped)} remaining step(s) were not started.[/dim]")
+        return
     
     console.print("\n[bold green]✅ Agent has finished executing the plan.[/bold green]")
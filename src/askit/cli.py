@@ -1,23 +1,21 @@
 import typer
 from rich.console import Console
-import asyncio
 from typing_extensions import Annotated
 import sys
 import os
 from typing import Optional
+from pathlib import Path
 from rich.prompt import Prompt
-from rich.syntax import Syntax
 from typer import Exit as TyperExit
-from .agent.runtime import run_agent
 
 from ._version import __version__
-from .commands.init_cmd import init_project
-from .commands.config_cmd import config_shell
-from .core import project
-from .security import secrets_manager
-from .providers.claude import ClaudeProvider
 import platform
 
+# Keep this module cheap to import: `--version`, the help screen and the `-p`
+# route must not pay for keyring, the HTTP/provider stack, prompt_toolkit or the
+# agent runtime. Those are imported inside the functions that need them
+# (see tests/test_startup.py for the import budget).
+
 def show_help():
     """
     Custom help display function that works around Typer's context issues.
@@ -33,11 +31,16 @@ def show_help():
     console.print("  [cyan]-p, --prompt[/cyan] TEXT     The user prompt to ask the AI [required for asking]")
     console.print("  [cyan]-c, --context[/cyan] INTEGER Number of shell history lines to send [default: 10]")
     console.print("  [cyan]--safe[/cyan]               Activates 'Safe Mode'")
+    console.print("  [cyan]--no-cache[/cyan]           Do not read or store cached responses")
+    console.print("  [cyan]--refresh[/cyan]            Ignore cached responses and store the new answer")
+    console.print("  [cyan]--timing[/cyan]             Show the network timing, token usage and model of each API call")
     
     console.print("\n[bold]Commands:[/bold]")
     console.print("  [cyan]init[/cyan]    Initialize AskIT project in current directory")
     console.print("  [cyan]config[/cyan]  Open interactive configuration shell")
     console.print("  [cyan]info[/cyan]    Show configuration paths and status")
+    console.print("  [cyan]daemon[/cyan]  Keep a warm process that answers -p requests faster")
+    console.print("  [cyan]batch[/cyan]   Answer many prompts concurrently, as JSON lines")
     
     console.print("\n[bold]Global Options:[/bold]")
     console.print("  [cyan]--help[/cyan]               Show this help message and exit")
@@ -49,72 +52,186 @@ def show_help():
     console.print("  askit-cli init")
     console.print("  askit-cli config                      # Auto-installs tab completion")
     console.print("  askit-cli info                        # Show config paths and status")
+    console.print("  askit-cli daemon &                    # Start the resident daemon")
+    console.print("  askit-cli batch -j 8 prompts.txt > answers.jsonl")
     
     console.print("\n[dim]For more information, visit: https://github.com/your-username/askit-cli[/dim]")
 
 
-def ask_ai(prompt: str, context_lines: int = 10, safe_mode: bool = False):
+def _print_confidence(console: Console, confidence: str):
+    """Prints the confidence level in its associated color."""
+    confidence_color = {"HIGH": "green", "MEDIUM": "yellow", "LOW": "red"}
+    console.print(f"[{confidence_color.get(confidence, 'white')}]Confidence: {confidence}[/{confidence_color.get(confidence, 'white')}]")
+
+
+def _print_suggestion_header(console: Console, prompt: str, confidence: str):
+    """Prints the suggestion banner followed by the confidence level."""
+    console.print("\n" + "="*60)
+    console.print(f"[bold cyan]💡 Suggestion for:[/bold cyan] [italic]{prompt}[/italic]")
+    console.print("="*60)
+    _print_confidence(console, confidence)
+
+
+def _offer_similar_suggestion(console: Console, similarity_index, prompt: str, scope: str) -> Optional[tuple[str, str, str]]:
     """
-    Core ask functionality extracted as a separate function.
-    Can now loop to ask for more information if needed.
+    Looks for a near-duplicate of the prompt among past requests and offers its command.
+
+    Returns:
+        The cached (confidence, command, explanation) if the user accepts it, otherwise None.
     """
-    console = Console()
-    
-    # Import heavy dependencies only when needed
-    from dotenv import load_dotenv
-    from .providers.claude import ClaudeProvider
-    from .core.config_manager import ensure_config_directories, migrate_old_config_if_needed, get_config_file
-    from .core.history import get_shell_history, format_history_context
-    import yaml
-
-    # Load environment variables only when needed
-    load_dotenv()
-    
-    ensure_config_directories()
+    match = similarity_index.find_similar(prompt, scope=scope)
+    if not match:
+        return None
+
+    score, entry = match
+    console.print(f"[dim]⚡ Similar to a previous request ({score:.0%} match): [italic]{entry['prompt']}[/italic][/dim]")
+    console.print(f"[bold]Previous command:[/bold] [cyan]{entry['command']}[/cyan]")
+    try:
+        reuse = Prompt.ask("[cyan]Use this command?[/cyan]", choices=["y", "n"], default="y")
+    except EOFError:
+        return None  # No answer: ask the AI as usual
+    except KeyboardInterrupt:
+        console.print("\n[yellow]❌ Operation cancelled by user.[/yellow]")
+        raise typer.Exit()
+
+    if reuse.lower() != "y":
+        return None
+    return (entry["confidence"], entry["command"], entry["explanation"])
+
+
+def _load_api_key_and_config(console: Console) -> tuple[str, dict]:
+    """
+    Returns the API key and the effective configuration. Exits if the
+    configured provider is unknown or needs an API key that is not set.
+    """
+    from .core.config_manager import migrate_old_config_if_needed
+    from .core.settings import get_settings
+    from .providers.registry import get_provider_spec
+
     migrate_old_config_if_needed()
 
-    api_key = secrets_manager.get_api_key()
-    if not api_key:
+    settings = get_settings()
+    try:
+        spec = get_provider_spec(settings.config)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+    if spec.needs_api_key and not settings.api_key:
         console.print("[bold red]Error:[/bold red] API key not found. Run `askit-cli config` to set it.")
         raise typer.Exit(1)
+    return settings.api_key, settings.config
 
-    # Load configuration to check execution mode
-    config_file = get_config_file()
-    config = {"mode": "normal"}  # Default mode
-    if config_file.exists():
-        try:
-            with open(config_file, 'r') as f:
-                config = yaml.safe_load(f) or {"mode": "normal"}
-        except Exception:
-            pass
+
+def _in_process_session(console: Console, use_cache: bool, refresh_cache: bool):
+    """
+    Creates the configured provider for a session run in this process.
+
+    Returns:
+        (provider, config). A single provider serves the whole session, so every
+        round reuses its pooled connection.
+    """
+    from .providers.registry import create_provider
+    from .core.response_cache import get_response_cache
+
+    api_key, config = _load_api_key_and_config(console)
+    response_cache = get_response_cache(config, refresh=refresh_cache) if use_cache else None
+    provider = create_provider(config, api_key, cache=response_cache)
+    return provider, config
+
+
+def ask_ai(
+    prompt: str,
+    context_lines: int = 10,
+    safe_mode: bool = False,
+    use_cache: bool = True,
+    refresh_cache: bool = False,
+    show_timing: bool = False,
+):
+    """
+    Core ask functionality extracted as a separate function.
+    Can now loop to ask for more information if needed.
+
+    Identical queries are answered from the on-disk response cache unless
+    `use_cache` is False; `refresh_cache` skips lookups but stores the new answer.
+    `show_timing` prints the connect/TLS/TTFB/total breakdown of each API call
+    and its token usage (cached vs uncached input).
+    """
+    console = Console()
+    
+    # Import heavy dependencies only when needed
+    from .core.context import DEFAULT_HISTORY_TOKEN_BUDGET, build_context
+    from .core.daemon import connect_daemon
+    from .core.similarity_index import get_similarity_index
+    from .providers.conversation import Conversation
+    import asyncio
+
+    # A running `askit-cli daemon` already holds the API key, the configuration and a
+    # warm connection: forward the request to it. Otherwise do everything in-process.
+    provider = connect_daemon(use_cache=use_cache, refresh_cache=refresh_cache)
+    if provider is not None:
+        config = provider.config
+        make_context = provider.build_context
+    else:
+        provider, config = _in_process_session(console, use_cache, refresh_cache)
+        make_context = build_context
     execution_mode = config.get("mode", "normal")
+    similarity_index = get_similarity_index(config) if use_cache else None
+    os_scope = platform.system()
 
     # --- Start of the interaction loop ---
-    current_prompt = prompt
-    
-    while True:
+    # Clarification rounds are sent as conversation turns after the first request
+    conversation = Conversation()
+    command_shown = False
+
+    # The context does not change between clarification rounds: build it once
+    token_budget = int(config.get("history_token_budget", DEFAULT_HISTORY_TOKEN_BUDGET))
+    request_context = make_context(context_lines, prompt=prompt, token_budget=token_budget)
+    context = request_context.text
+    history = request_context.history
+    if history.dropped:
+        console.print(
+            f"[dim]📉 Kept {len(history.lines)} of {history.total} history lines "
+            f"(~{history.tokens} tokens, budget {token_budget}).[/dim]"
+        )
+
+    # Offer the answer of a near-identical past request before calling the API,
+    # unless the exact request is cached or nobody is there to answer
+    reused = None
+    if (
+        similarity_index is not None
+        and not refresh_cache
+        and sys.stdin.isatty()
+        and not provider.has_cached_answer(prompt, context)
+    ):
+        reused = _offer_similar_suggestion(console, similarity_index, prompt, os_scope)
+
+    while reused is None:
         console.print(f"[dim]Analyzing request with {context_lines} lines of context...[/dim]")
 
-        # Get shell history
-        history_lines = get_shell_history(context_lines)
-        formatted_history = format_history_context(history_lines)
+        # Show a nice progress indicator until the command line has been streamed in
+        with console.status("[bold green]Asking Claude...", spinner="dots") as status:
+            def show_command_early(early_confidence: str, early_command: str):
+                nonlocal command_shown
+                if early_confidence in ("HIGH", "MEDIUM", "LOW"):
+                    status.stop()
+                    _print_suggestion_header(console, prompt, early_confidence)
+                    if early_command:
+                        console.print(f"\n[bold]Command:[/bold] [cyan]{early_command}[/cyan]")
+                    command_shown = True
+
+            command_shown = False
+            confidence, command, explanation = provider.stream_suggestion(
+                prompt=prompt, context=context, on_command=show_command_early, conversation=conversation
+            )
 
-        # Build context with OS information
-        os_info = f"Operating System: {platform.system()} {platform.release()}"
-        project_root = project.find_project_root()
-        
-        context_parts = [os_info]
-        if project_root:
-            context_parts.append(f"Project detected at: {project_root}")
-        
-        context_parts.append(f"Shell history (last {context_lines} lines):\n{formatted_history}")
-        
-        context = "\\n\\n".join(context_parts)
-        
-        # Show a nice progress indicator
-        with console.status("[bold green]Asking Claude...", spinner="dots"):
-            provider = ClaudeProvider(api_key=api_key)
-            confidence, command, explanation = provider.get_suggestion(prompt=current_prompt, context=context)
+        if provider.last_from_cache:
+            console.print("[dim]⚡ Answered from cache (use --refresh to ask again)[/dim]")
+        elif show_timing and provider.last_timing:
+            console.print(f"[dim]⏱  {provider.last_timing.format()}[/dim]")
+            if provider.last_usage:
+                console.print(f"[dim]🧮 {provider.last_usage.format()}[/dim]")
+            if provider.last_route:
+                console.print(f"[dim]🧭 {provider.last_route.format()}[/dim]")
 
         # --- Handle 'NONE' confidence: ask for more info and loop ---
         if confidence == "NONE":
@@ -129,9 +246,9 @@ def ask_ai(prompt: str, context_lines: int = 10, safe_mode: bool = False):
                 new_info = Prompt.ask(
                     "[cyan]Please provide more details (or press Ctrl+C to cancel)[/cyan]"
                 )
-                # Append the new info to the prompt for the next loop to maintain conversation context
-                current_prompt += f"\n\nClarification previously requested: '{explanation}'.\nUser provided additional details: '{new_info}'"
-                continue # Restart the loop with the new prompt
+                # Only the question and the reply are added; the context stays in the first turn
+                conversation.add_clarification(confidence, command, explanation, new_info)
+                continue # Restart the loop with the extended conversation
             
             except (KeyboardInterrupt, EOFError):
                 console.print("\n[yellow]❌ Operation cancelled by user.[/yellow]")
@@ -140,10 +257,16 @@ def ask_ai(prompt: str, context_lines: int = 10, safe_mode: bool = False):
         # --- If confidence is not NONE, break the loop and show results ---
         break
 
+    if reused is not None:
+        confidence, command, explanation = reused
+    elif similarity_index is not None and not conversation and confidence in ("HIGH", "MEDIUM") and command:
+        similarity_index.add(prompt, confidence, command, explanation, scope=os_scope)
+
     # Display final results
-    console.print("\n" + "="*60)
-    console.print(f"[bold cyan]💡 Suggestion for:[/bold cyan] [italic]{prompt}[/italic]")
-    console.print("="*60)
+    if not command_shown:
+        console.print("\n" + "="*60)
+        console.print(f"[bold cyan]💡 Suggestion for:[/bold cyan] [italic]{prompt}[/italic]")
+        console.print("="*60)
     
     # Handle the 'AGENT' confidence case
     if confidence == "AGENT":
@@ -176,9 +299,9 @@ def ask_ai(prompt: str, context_lines: int = 10, safe_mode: bool = False):
         console.print("[dim]Please rephrase your request with more details.[/dim]")
         raise typer.Exit()
         
-    # Show confidence level
-    confidence_color = {"HIGH": "green", "MEDIUM": "yellow", "LOW": "red"}
-    console.print(f"[{confidence_color.get(confidence, 'white')}]Confidence: {confidence}[/{confidence_color.get(confidence, 'white')}]")
+    # Show confidence level (already printed if the command was streamed in early)
+    if not command_shown:
+        _print_confidence(console, confidence)
     
     # Handle different modes
     if execution_mode == "strike" and confidence == "HIGH" and not safe_mode and command:
@@ -190,43 +313,25 @@ def ask_ai(prompt: str, context_lines: int = 10, safe_mode: bool = False):
         
         try:
             input()  # Wait for user confirmation
-            import subprocess
-            import sys
-            
-            # On Windows, we must explicitly use PowerShell
-            if sys.platform == "win32":
-                # Using powershell.exe -Command ensures we run in the correct shell
-                # and handle encoding properly for output.
-                executable = ["powershell.exe", "-Command", command]
-                shell_mode = False # We specify the executable, so shell=False
-            else:
-                # On other systems, the default shell is usually fine
-                executable = command
-                shell_mode = True
-
-            result = subprocess.run(
-                executable,
-                shell=shell_mode,
-                capture_output=True,
-                text=True,
-                errors='replace'
-            )
-                
-            if result.returncode == 0:
+            from .core.executor import run_command
+
+            # Output is streamed as it arrives; only its tail is kept in memory
+            # and the full output is spilled to the logs directory if it is large.
+            result = asyncio.run(run_command(command, console=console))
+
+            if result.log_file:
+                console.print(f"[dim]Full output saved to {result.log_file}[/dim]")
+            if result.return_code == 0:
                 console.print(f"[green]✅ Command executed successfully[/green]")
-                if result.stdout:
-                    console.print(f"Output:\n{result.stdout}")
             else:
-                console.print(f"[red]❌ Command failed with exit code {result.returncode}[/red]")
-                if result.stderr:
-                    console.print(f"Error:\n{result.stderr}")
+                console.print(f"[red]❌ Command failed with exit code {result.return_code}[/red]")
         except KeyboardInterrupt:
             console.print("\n[yellow]❌ Execution cancelled by user[/yellow]")
         except Exception as e:
             console.print(f"[red]❌ Error executing command: {e}[/red]")
     else:
         # Normal mode or low confidence: just show suggestion
-        if command:
+        if command and not command_shown:
             console.print(f"\n[bold]Command:[/bold] [cyan]{command}[/cyan]")
         if explanation:
             console.print(f"\n{explanation}")
@@ -316,8 +421,19 @@ def main(args: Optional[list[str]] = None):
                 safe_mode = True
                 remaining_args.remove("--safe")
 
+            use_cache = "--no-cache" not in remaining_args
+            refresh_cache = "--refresh" in remaining_args
+            show_timing = "--timing" in remaining_args
+
             # Call ask_ai directly, bypassing Typer for this specific case
-            ask_ai(prompt=prompt_text, context_lines=context_lines, safe_mode=safe_mode)
+            ask_ai(
+                prompt=prompt_text,
+                context_lines=context_lines,
+                safe_mode=safe_mode,
+                use_cache=use_cache,
+                refresh_cache=refresh_cache,
+                show_timing=show_timing,
+            )
         else:
             # No prompt found, let Typer handle the command
             app(remaining_args)
@@ -344,6 +460,8 @@ def init():
     """
     Initialize the AskIT project in the current directory.
     """
+    from .commands.init_cmd import init_project
+
     init_project()
 
 
@@ -354,10 +472,116 @@ def config():
     """
     # Vérifier et installer l'autocomplétion si nécessaire
     _check_and_install_completion()
-    
+
+    import asyncio
+    from .commands.config_cmd import config_shell  # prompt_toolkit is slow to import
     asyncio.run(config_shell())
 
 
+@app.command()
+def daemon(
+    stop: Annotated[bool, typer.Option("--stop", help="Stop the running daemon.")] = False,
+):
+    """
+    Run a resident process that answers `askit-cli -p` requests without startup costs.
+    """
+    import errno
+    import socket
+    from .core.daemon import AskitDaemon, connect_daemon, get_socket_path, stop_daemon
+
+    if not hasattr(socket, "AF_UNIX"):
+        console.print("[bold red]Error:[/bold red] Daemon mode needs Unix domain sockets, which this platform lacks.")
+        raise typer.Exit(1)
+
+    if stop:
+        if stop_daemon():
+            console.print("[green]✓ Daemon stopped[/green]")
+        else:
+            console.print("[dim]No daemon is running[/dim]")
+        return
+
+    if connect_daemon() is not None:
+        console.print(f"[yellow]⚠ A daemon is already listening on {get_socket_path()}[/yellow]")
+        raise typer.Exit(1)
+
+    # Fail early rather than on the first request; the daemon re-reads the
+    # settings snapshot per request, so later config changes are picked up
+    _load_api_key_and_config(console)
+
+    socket_path = get_socket_path()
+    console.print(f"[bold cyan]AskIT daemon[/bold cyan] listening on [cyan]{socket_path}[/cyan] (Ctrl+C to stop)")
+    try:
+        AskitDaemon(socket_path).serve_forever()
+    except OSError as e:
+        if e.errno != errno.EADDRINUSE:
+            raise
+        # Another daemon started since the check above
+        console.print(f"[yellow]⚠ {e.strerror} {e.filename}[/yellow]")
+        raise typer.Exit(1)
+    except KeyboardInterrupt:
+        console.print("\n[dim]Daemon stopped[/dim]")
+
+
+@app.command()
+def batch(
+    file: Annotated[
+        Optional[Path],
+        typer.Argument(help="Prompts, one per line or JSONL with a \"prompt\" key (default: stdin).", show_default=False),
+    ] = None,
+    concurrency: Annotated[int, typer.Option("--concurrency", "-j", help="Maximum number of requests in flight.")] = 4,
+    rate: Annotated[float, typer.Option("--rate", help="Maximum requests started per second (0: no limit).")] = 0,
+    context_lines: Annotated[int, typer.Option("--context", "-c", help="Number of shell history lines to send as context.")] = 10,
+    no_cache: Annotated[bool, typer.Option("--no-cache", help="Do not read or store cached responses.")] = False,
+    refresh: Annotated[bool, typer.Option("--refresh", help="Ignore cached responses and store the new answers.")] = False,
+):
+    """
+    Answer many prompts concurrently, writing one JSON result per line to stdout.
+    """
+    import asyncio
+    from .core.batch import read_prompts, run_batch, write_result
+    from .core.context import DEFAULT_HISTORY_TOKEN_BUDGET, build_context
+    from .core.response_cache import get_response_cache
+    from .providers.http_client import aclose_http_client
+    from .providers.registry import create_provider
+
+    # stdout carries the results only
+    err_console = Console(stderr=True)
+    api_key, config = _load_api_key_and_config(err_console)
+
+    try:
+        if file is None:
+            items = list(read_prompts(sys.stdin))
+        else:
+            with open(file, "r", encoding="utf-8") as f:
+                items = list(read_prompts(f))
+    except (OSError, ValueError) as e:
+        err_console.print(f"[bold red]Error:[/bold red] Cannot read prompts: {e}")
+        raise typer.Exit(1)
+
+    # The prompts share one context, sent as a prompt cache breakpoint
+    token_budget = int(config.get("history_token_budget", DEFAULT_HISTORY_TOKEN_BUDGET))
+    context = build_context(context_lines, token_budget=token_budget).text
+    response_cache = None if no_cache else get_response_cache(config, refresh=refresh)
+
+    async def run() -> int:
+        try:
+            return await run_batch(
+                items,
+                lambda: create_provider(config, api_key, cache=response_cache, cache_context=True),
+                context,
+                emit=lambda result: write_result(sys.stdout, result),
+                concurrency=concurrency,
+                rate=rate,
+            )
+        finally:
+            await aclose_http_client()
+
+    failures = asyncio.run(run())
+    err_console.print(f"[dim]{len(items) - failures}/{len(items)} prompts answered[/dim]")
+    if failures:
+        raise typer.Exit(1)
+
+
 @app.command()
 def info():
     """
@@ -367,6 +591,7 @@ def info():
         get_config_dir, get_config_file, get_cache_dir, 
         get_data_dir, get_logs_dir
     )
+    from .core.settings import get_settings
     
     console.print("\n[bold cyan]AskIT-CLI Configuration Info[/bold cyan]")
     console.print(f"[dim]OS: {platform.system()} {platform.release()}[/dim]")
@@ -378,31 +603,38 @@ def info():
     console.print(f"  Data Dir:    [cyan]{get_data_dir()}[/cyan]")
     console.print(f"  Logs Dir:    [cyan]{get_logs_dir()}[/cyan]")
     
+    settings = get_settings()
+    config = settings.config
+
     # Check if config file exists
-    config_file = get_config_file()
-    if config_file.exists():
+    if get_config_file().exists():
         console.print(f"\n[bold green]✓[/bold green] Configuration file exists")
-        try:
-            import yaml
-            with open(config_file, 'r') as f:
-                config = yaml.safe_load(f) or {}
-            console.print(f"  Mode: [green]{config.get('mode', 'normal')}[/green]")
-        except Exception:
-            console.print("  [yellow]Configuration file exists but couldn't be read[/yellow]")
+        console.print(f"  Mode: [green]{config.get('mode', 'normal')}[/green]")
+        console.print(f"  Provider: [green]{config.get('provider', 'claude')}[/green]")
     else:
         console.print(f"\n[yellow]⚠[/yellow] No configuration file found")
         console.print("  Run [cyan]askit-cli config[/cyan] to set up")
     
     # Check API key
-    api_key = secrets_manager.get_api_key()
-    if api_key:
-        console.print(f"\n[bold green]✓[/bold green] API key is configured")
+    if settings.api_key:
+        console.print(f"\n[bold green]✓[/bold green] API key is configured ({settings.api_key_source})")
     else:
         console.print(f"\n[yellow]⚠[/yellow] No API key found")
         console.print("  Run [cyan]askit-cli config[/cyan] to set up")
     
+    # Response cache statistics
+    from .core.response_cache import get_response_cache
+    stats = get_response_cache(config).get_stats()
+    lookups = stats["hits"] + stats["misses"]
+    console.print("\n[bold]Response Cache:[/bold]")
+    console.print(f"  Entries:   [cyan]{stats['entries']}[/cyan] ({stats['size_bytes'] / 1024:.1f} KB)")
+    if lookups:
+        console.print(f"  Hit ratio: [cyan]{stats['hit_ratio']:.0%}[/cyan] ({stats['hits']}/{lookups} lookups)")
+    else:
+        console.print("  Hit ratio: [dim]no lookups yet[/dim]")
+
     # Check if in a project
-    project_root = project.find_project_root()
+    project_root = settings.project_root
     if project_root:
         console.print(f"\n[bold green]✓[/bold green] AskIT project detected")
         console.print(f"  Project root: [cyan]{project_root}[/cyan]")
@@ -528,6 +760,18 @@ def cli_main(
         bool,
         typer.Option("--safe", help="Activates 'Safe Mode', preventing automatic command execution."),
     ] = False,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Do not read or store cached responses."),
+    ] = False,
+    refresh: Annotated[
+        bool,
+        typer.Option("--refresh", help="Ignore cached responses and store the new answer."),
+    ] = False,
+    timing: Annotated[
+        bool,
+        typer.Option("--timing", help="Show the network timing, token usage and model of each API call."),
+    ] = False,
     version: Annotated[
         Optional[bool],
         typer.Option("--version", callback=version_callback, is_eager=True, help="Show version and exit.")
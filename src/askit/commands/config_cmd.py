@@ -13,8 +13,10 @@ from ..core.config_manager import (
     get_config_file, 
     get_data_dir, 
     migrate_old_config_if_needed,
-    ensure_config_directories
+    ensure_config_directories,
+    ensure_dir
 )
+from ..core.settings import DEFAULT_CONFIG, get_settings
 from ..security import secrets_manager
 
 console = Console()
@@ -26,6 +28,7 @@ def load_config(config_path: Path) -> dict:
         return yaml.safe_load(f) or {"mode": "normal"}
 
 def save_config(config_path: Path, config: dict):
+    ensure_dir(config_path.parent)
     with open(config_path, 'w') as f:
         yaml.dump(config, f)
 
@@ -92,7 +95,7 @@ async def config_shell():
     config_temp_path = data_dir / "config.yaml.tmp"
     config_lock_path = data_dir / ".config.lock"
 
-    running_config = load_config(config_path)
+    running_config = get_settings().global_config or dict(DEFAULT_CONFIG)
     
     if config_lock_path.exists():
         console.print("[yellow]Uncommitted configuration changes found.[/yellow]")
@@ -240,7 +243,7 @@ async def config_shell():
                         console.print("[yellow]⚠ Empty API key, operation cancelled.[/yellow]")
                     else:
                         # Stage the API key change
-                        old_api_status = "present" if secrets_manager.get_api_key() else "missing"
+                        old_api_status = "present" if get_settings().api_key else "missing"
                         staged_config["api_key"] = api_key  # Store temporarily for staging
                         save_config(config_temp_path, staged_config)
                         config_lock_path.touch()
@@ -270,9 +273,10 @@ async def config_shell():
                     console.print("[bold]🔧 Active Configuration:[/bold]")
                     console.print(f"   Mode: [green]{running_config.get('mode', 'normal')}[/green]")
                     
-                    api_key = secrets_manager.get_api_key()
-                    if api_key:
-                        console.print("   API Key: [bold green]✓ Configured[/bold green] (stored in keychain)")
+                    settings = get_settings()
+                    if settings.api_key:
+                        source = "environment variable" if settings.api_key_source == "environment" else "stored in keychain"
+                        console.print(f"   API Key: [bold green]✓ Configured[/bold green] ({source})")
                     else:
                         console.print("   API Key: [bold red]✗ Missing[/bold red]")
                     
@@ -290,8 +294,7 @@ async def config_shell():
                     # Show only active configuration
                     console.print("\n[bold green]Active Configuration:[/bold green]")
                     console.print(f"  Mode: [green]{running_config.get('mode', 'normal')}[/green]")
-                    api_key = secrets_manager.get_api_key()
-                    if api_key:
+                    if get_settings().api_key:
                         console.print("  API Key: [bold green]✓ Present[/bold green]")
                     else:
                         console.print("  API Key: [bold red]✗ Missing[/bold red]")
@@ -22,6 +22,10 @@ def init_project():
         config_path = askit_dir / "config.yaml"
         config_path.touch() # Create an empty file to start
 
+        # Directories below that used to resolve to an enclosing project now resolve here
+        from ..core.project import clear_project_root_cache
+        clear_project_root_cache()
+
         console.print(f"🚀 [bold green]AskIT[/bold green] project initialized successfully in [cyan]{askit_dir}[/cyan].")
         console.print("You can now run `askit-cli config` to set up your API key.")
 
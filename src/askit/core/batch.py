@@ -0,0 +1,138 @@
+"""
+Batch mode: many prompts answered concurrently.
+
+`askit-cli batch` reads prompts (one per line, or JSONL objects with a
+`prompt` key and an optional `id`) and sends them with a bounded number of
+requests in flight and an optional rate limit, all over the shared async HTTP
+client. Each result is written as one JSON line as soon as it completes, so
+results come out in completion order; `index` gives the input order.
+
+All prompts share one context (built once), which is marked as a prompt cache
+breakpoint: after the first answer, every request reads it from the cache.
+Prompts go through the provider like interactive ones, so answers already in
+the response cache are not requested again and model routing applies.
+"""
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+DEFAULT_CONCURRENCY = 4
+
+
+@dataclass
+class BatchItem:
+    index: int
+    prompt: str
+    id: Optional[str] = None
+
+
+def read_prompts(lines: Iterable[str]) -> Iterator[BatchItem]:
+    """
+    Parses batch input: plain lines are prompts, lines starting with `{` are
+    JSON objects with a `prompt` and an optional `id`. Blank lines are skipped.
+
+    Raises:
+        ValueError: On a JSON line without a prompt.
+    """
+    index = 0
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {number}: invalid JSON ({e})")
+            if not isinstance(entry.get("prompt"), str) or not entry["prompt"].strip():
+                raise ValueError(f"line {number}: missing \"prompt\"")
+            item_id = entry.get("id")
+            yield BatchItem(index, entry["prompt"].strip(), str(item_id) if item_id is not None else None)
+        else:
+            yield BatchItem(index, line)
+        index += 1
+
+
+class RequestPacer:
+    """
+    Spaces request starts at least 1/`rate` seconds apart (no pacing when `rate` is 0).
+
+    This is the user's `--rate` cap for the batch only; the process-wide
+    `AdaptiveRateLimiter` still applies the limits advertised by the API.
+    """
+
+    def __init__(self, rate: float = 0):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _answer(item: BatchItem, make_provider: Callable, context: str) -> dict:
+    # One provider per prompt: `last_usage` and `last_from_cache` are per call
+    provider = make_provider()
+    result = {"index": item.index, "id": item.id, "prompt": item.prompt}
+    start = time.perf_counter()
+    try:
+        confidence, command, explanation = await provider.arequest_suggestion(item.prompt, context)
+        result.update(confidence=confidence, command=command, explanation=explanation, error=None)
+    except Exception as e:
+        result.update(confidence=None, command=None, explanation=None, error=str(e))
+    result["latency"] = round(time.perf_counter() - start, 3)
+    result["cached"] = provider.last_from_cache
+    result["tokens"] = asdict(provider.last_usage) if provider.last_usage else None
+    return result
+
+
+async def run_batch(
+    items: Iterable[BatchItem],
+    make_provider: Callable,
+    context: str,
+    emit: Callable[[dict], None],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate: float = 0,
+) -> int:
+    """
+    Answers every item, calling `emit(result)` as each one completes.
+
+    Args:
+        make_provider: Returns a new `ChatProvider` (they share the HTTP pool and response cache).
+        context: The context sent with every prompt.
+        concurrency: Maximum number of requests in flight.
+        rate: Maximum request starts per second (0 for no limit).
+
+    Returns:
+        The number of failed requests.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    pacer = RequestPacer(rate)
+    failures = 0
+
+    async def worker(item: BatchItem):
+        nonlocal failures
+        async with semaphore:
+            await pacer.wait()
+            result = await _answer(item, make_provider, context)
+        if result["error"]:
+            failures += 1
+        emit(result)
+
+    await asyncio.gather(*(worker(item) for item in items))
+    return failures
+
+
+def write_result(stream, result: dict):
+    """Writes one result as a JSON line and flushes, so consumers see it at once."""
+    stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+    stream.flush()
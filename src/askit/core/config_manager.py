@@ -2,17 +2,63 @@
 Configuration manager for askit-cli.
 Handles proper configuration file placement according to OS conventions.
 """
+import functools
 import os
 import platform
 from pathlib import Path
 from typing import Optional
 
 
+_created_dirs: set[Path] = set()
+
+
+def ensure_dir(path: Path, mode: int = 0o777) -> Path:
+    """
+    Create a directory (and its parents) before writing into it.
+    
+    Path resolution never touches the filesystem; every write into the askit
+    directories goes through this helper instead, so directories are only
+    created when something is actually written, and at most once per process.
+    
+    Returns the path, for chaining.
+    """
+    if path not in _created_dirs:
+        path.mkdir(parents=True, exist_ok=True, mode=mode)
+        _created_dirs.add(path)
+    return path
+
+
+def write_file_atomic(path: Path, text: str):
+    """
+    Replace the content of `path` with `text` in one step.
+
+    The text is written to a temporary file of its own in the same directory
+    (created readable by its owner only), then renamed over `path`: concurrent
+    writers never share a temporary file, and readers see either the old or
+    the new content.
+
+    Raises:
+        OSError: If the file cannot be written; the temporary file is removed.
+    """
+    import tempfile
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+@functools.lru_cache(maxsize=None)
 def get_config_dir() -> Path:
     """
     Get the appropriate configuration directory for the current OS.
     
-    Returns the path to the configuration directory, creating it if necessary.
+    Returns the path to the configuration directory. The path is computed once
+    per process and nothing is created: writers call `ensure_dir()` first.
     
     OS-specific locations:
     - macOS (Darwin): ~/Library/Application Support/askit-cli/
@@ -42,9 +88,6 @@ def get_config_dir() -> Path:
         # Fallback for unknown systems
         config_dir = Path.home() / ".askit-cli"
     
-    # Create the directory if it doesn't exist
-    config_dir.mkdir(parents=True, exist_ok=True)
-    
     return config_dir
 
 
@@ -57,6 +100,7 @@ def get_config_file() -> Path:
     return get_config_dir() / "config.yaml"
 
 
+@functools.lru_cache(maxsize=None)
 def get_cache_dir() -> Path:
     """
     Get the appropriate cache directory for the current OS.
@@ -89,12 +133,10 @@ def get_cache_dir() -> Path:
         # Fallback for unknown systems
         cache_dir = Path.home() / ".askit-cli" / "cache"
     
-    # Create the directory if it doesn't exist
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    
     return cache_dir
 
 
+@functools.lru_cache(maxsize=None)
 def get_data_dir() -> Path:
     """
     Get the appropriate data directory for the current OS.
@@ -128,12 +170,10 @@ def get_data_dir() -> Path:
         # Fallback for unknown systems
         data_dir = Path.home() / ".askit-cli" / "data"
     
-    # Create the directory if it doesn't exist
-    data_dir.mkdir(parents=True, exist_ok=True)
-    
     return data_dir
 
 
+@functools.lru_cache(maxsize=None)
 def get_logs_dir() -> Path:
     """
     Get the appropriate logs directory for the current OS.
@@ -156,12 +196,29 @@ def get_logs_dir() -> Path:
         # Fallback for unknown systems
         logs_dir = Path.home() / ".askit-cli" / "logs"
     
-    # Create the directory if it doesn't exist
-    logs_dir.mkdir(parents=True, exist_ok=True)
-    
     return logs_dir
 
 
+@functools.lru_cache(maxsize=None)
+def get_runtime_dir() -> Path:
+    """
+    Get the directory for runtime files (the daemon socket).
+    
+    OS-specific locations:
+    - Linux: $XDG_RUNTIME_DIR/askit-cli/ (or the cache directory's run/ subdirectory)
+    - Other systems: the cache directory's run/ subdirectory
+    
+    The daemon creates it private to the user (`ensure_dir(path, mode=0o700)`).
+    """
+    xdg_runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if platform.system() == "Linux" and xdg_runtime_dir:
+        runtime_dir = Path(xdg_runtime_dir) / "askit-cli"
+    else:
+        runtime_dir = get_cache_dir() / "run"
+    
+    return runtime_dir
+
+
 def get_project_context_file(project_root: Path) -> Path:
     """
     Get the path to the project-specific context file.
@@ -200,6 +257,7 @@ def migrate_old_config_if_needed() -> bool:
     if old_config_file.exists() and not new_config_file.exists():
         try:
             import shutil
+            ensure_dir(new_config_file.parent)
             shutil.copy2(old_config_file, new_config_file)
             
             # Leave a note in the old location
@@ -219,8 +277,9 @@ def migrate_old_config_if_needed() -> bool:
 def ensure_config_directories():
     """
     Ensure all necessary configuration directories exist.
+    
+    Only needed before handing a directory to code that writes into it
+    without going through `ensure_dir()` (e.g. prompt_toolkit's history file).
     """
-    get_config_dir()
-    get_cache_dir()
-    get_data_dir()
-    get_logs_dir() 
\ No newline at end of file
+    for directory in (get_config_dir(), get_cache_dir(), get_data_dir(), get_logs_dir()):
+        ensure_dir(directory)
\ No newline at end of file
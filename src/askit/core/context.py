@@ -0,0 +1,112 @@
+"""
+Request context sent to the AI along with the user's prompt.
+
+The shell history is the only part of the context whose size the user
+controls (`-c 500`), so it is built to a token budget. The lines go through
+the history pipeline (deduplication, noise filtering, secret redaction and
+relevance scoring); the best-scored ones that fit are kept and the number of
+dropped lines is reported.
+"""
+import platform
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from . import project
+from .history import format_history_context, get_shell_history, process_history
+from .tokens import estimate_tokens
+
+# Used when the `history_token_budget` config key is not set
+DEFAULT_HISTORY_TOKEN_BUDGET = 1000
+# Commands longer than this are truncated, as in format_history_context
+MAX_COMMAND_CHARS = 100
+
+
+@dataclass
+class HistorySelection:
+    """The history lines kept to fit the budget, oldest first."""
+    lines: List[str] = field(default_factory=list)
+    total: int = 0  # Lines read from the history
+    tokens: int = 0  # Estimated tokens of the kept lines
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self.lines)
+
+
+@dataclass
+class RequestContext:
+    text: str
+    history: HistorySelection
+
+
+def _truncate(command: str) -> str:
+    return command if len(command) <= MAX_COMMAND_CHARS else command[:MAX_COMMAND_CHARS - 3] + "..."
+
+
+def select_history(history_lines: List[str], prompt: str, token_budget: int) -> HistorySelection:
+    """
+    Picks the history lines worth sending within `token_budget` estimated tokens.
+
+    The lines are cleaned and scored by `process_history()`, then taken by
+    decreasing score until the budget is spent; the kept lines stay in
+    chronological order.
+
+    Args:
+        history_lines: Shell history, oldest first.
+        prompt: The user's request.
+        token_budget: Maximum estimated tokens of the formatted lines.
+    """
+    selection = HistorySelection(total=len(history_lines))
+
+    ranked = []
+    for age, (score, command) in enumerate(process_history(history_lines, prompt)):
+        command = _truncate(command)
+        # "NN. " and the line break cost about two tokens
+        ranked.append((score, -age, command, estimate_tokens(command) + 2))
+    ranked.sort(reverse=True)
+
+    kept = []
+    for _, newness, command, cost in ranked:
+        if selection.tokens + cost <= token_budget:
+            kept.append((newness, command))
+            selection.tokens += cost
+    selection.lines = [command for _, command in sorted(kept)]
+    return selection
+
+
+def build_context(
+    context_lines: int,
+    cwd: Optional[Path] = None,
+    shell: Optional[str] = None,
+    prompt: str = "",
+    token_budget: int = DEFAULT_HISTORY_TOKEN_BUDGET,
+) -> RequestContext:
+    """
+    Builds the context of a request: OS information, the project root and the shell history.
+
+    Args:
+        context_lines: Number of shell history lines to read.
+        cwd: The directory the request was made from (defaults to the current one).
+        shell: The user's shell (defaults to $SHELL).
+        prompt: The user's request, used to rank history lines.
+        token_budget: Maximum estimated tokens of the history lines.
+    """
+    history_lines = get_shell_history(context_lines, shell=shell)
+    history = select_history(history_lines, prompt, token_budget)
+    formatted_history = format_history_context(history.lines)
+
+    os_info = f"Operating System: {platform.system()} {platform.release()}"
+    project_root = project.find_project_root(cwd)
+
+    context_parts = [os_info]
+    if project_root:
+        context_parts.append(f"Project detected at: {project_root}")
+
+    if history.dropped:
+        header = f"Shell history ({len(history.lines)} most relevant of the last {history.total} lines)"
+    else:
+        header = f"Shell history (last {context_lines} lines)"
+    context_parts.append(f"{header}:\n{formatted_history}")
+
+    return RequestContext("\\n\\n".join(context_parts), history)
@@ -0,0 +1,375 @@
+"""
+Resident daemon mode.
+
+`askit-cli daemon` keeps a warm process holding what every call would
+otherwise rebuild: the API key read from the keychain, the parsed
+configuration, the pooled (already TLS-connected) HTTP client and the shell
+history index. It listens on a Unix domain socket in the runtime directory.
+
+`askit-cli -p ...` first tries to connect to that socket. If a daemon of the
+same version answers, the request is forwarded to it and the result is
+streamed back; otherwise the request runs in-process as usual.
+
+The protocol is one JSON object per line. The client sends a single request
+per connection; the daemon answers with zero or more `command` events
+followed by a final `result` (or `error`) event.
+"""
+import errno
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+from .._version import __version__
+from ..providers.base_provider import AIBaseProvider
+from ..providers.conversation import Conversation
+
+SOCKET_NAME = "daemon.sock"
+CONNECT_TIMEOUT = 0.5
+# A streamed answer is normally complete well within the API timeout
+RESPONSE_TIMEOUT = 120
+
+
+def get_socket_path() -> Path:
+    """Returns the path of the daemon socket in the runtime directory."""
+    from .config_manager import get_runtime_dir
+
+    return get_runtime_dir() / SOCKET_NAME
+
+
+def _socket_in_use(socket_path: Path) -> bool:
+    """Whether a daemon answers on `socket_path`; a stale socket left by a crashed daemon is removed."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(socket_path))
+    except FileNotFoundError:
+        return False
+    except ConnectionRefusedError:
+        socket_path.unlink(missing_ok=True)
+        return False
+    except socket.timeout:
+        return True  # Listening, but its backlog is full
+    finally:
+        sock.close()
+    return True
+
+
+def _send(sock_file, message: dict):
+    sock_file.write(json.dumps(message).encode("utf-8") + b"\n")
+    sock_file.flush()
+
+
+def _request(socket_path: Path, message: dict, timeout: float = RESPONSE_TIMEOUT):
+    """Sends one request and yields the daemon's events."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(socket_path))
+        sock.settimeout(timeout)
+        with sock.makefile("rwb") as sock_file:
+            _send(sock_file, message)
+            for line in sock_file:
+                yield json.loads(line)
+    finally:
+        sock.close()
+
+
+class _RemoteReport:
+    """A timing, token usage or routing report made by the daemon, already formatted."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def format(self) -> str:
+        return self.text
+
+
+class DaemonProvider(AIBaseProvider):
+    """
+    Client side of the daemon: a provider that forwards requests to it.
+
+    Build it with `connect_daemon()`, which returns None when no daemon is running.
+    """
+
+    def __init__(self, socket_path: Path, config: dict, use_cache: bool = True, refresh_cache: bool = False):
+        self.socket_path = socket_path
+        self.config = config
+        self.use_cache = use_cache
+        self.refresh_cache = refresh_cache
+        self.last_from_cache = False
+        self.last_timing: Optional[_RemoteReport] = None
+        self.last_usage: Optional[_RemoteReport] = None
+        self.last_route: Optional[_RemoteReport] = None
+
+    @classmethod
+    def from_config(
+        cls,
+        config: dict,
+        api_key: Optional[str] = None,
+        socket_path: Optional[Path] = None,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        **options,
+    ) -> "DaemonProvider":
+        """
+        Builds a client of the daemon on `socket_path` (the default socket otherwise).
+
+        The daemon uses its own API key and provider: `api_key` and other options are ignored.
+        """
+        return cls(socket_path or get_socket_path(), config, use_cache, refresh_cache)
+
+    def get_suggestion(self, prompt: str, context: str, conversation: Optional[Conversation] = None) -> tuple[str, str, str]:
+        return self._suggest(prompt, context, stream=False, conversation=conversation)
+
+    def stream_suggestion(
+        self,
+        prompt: str,
+        context: str,
+        on_command: Optional[Callable[[str, str], None]] = None,
+        conversation: Optional[Conversation] = None,
+    ) -> tuple[str, str, str]:
+        return self._suggest(prompt, context, stream=True, on_command=on_command, conversation=conversation)
+
+    def has_cached_answer(self, prompt: str, context: str) -> bool:
+        """Asks the daemon whether its response cache holds this exact request."""
+        if not self.use_cache or self.refresh_cache:
+            return False
+        try:
+            for event in _request(self.socket_path, {"op": "cached", "prompt": prompt, "context": context, "cwd": os.getcwd()}):
+                if event.get("event") == "cached":
+                    return bool(event.get("cached"))
+        except (OSError, ValueError):
+            pass
+        return False
+
+    def build_context(self, context_lines: int, prompt: str = "", token_budget: Optional[int] = None):
+        """Has the daemon build the request context for the current directory and shell."""
+        from .context import DEFAULT_HISTORY_TOKEN_BUDGET, HistorySelection, RequestContext, build_context
+
+        if token_budget is None:
+            token_budget = DEFAULT_HISTORY_TOKEN_BUDGET
+        try:
+            for event in _request(self.socket_path, {
+                "op": "context",
+                "context_lines": context_lines,
+                "prompt": prompt,
+                "token_budget": token_budget,
+                "cwd": os.getcwd(),
+                "shell": os.environ.get("SHELL", ""),
+            }):
+                if event.get("event") == "context":
+                    return RequestContext(event["context"], HistorySelection(**event["history"]))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        # The daemon went away: build it here instead
+        return build_context(context_lines, prompt=prompt, token_budget=token_budget)
+
+    def _suggest(
+        self,
+        prompt: str,
+        context: str,
+        stream: bool,
+        on_command: Optional[Callable[[str, str], None]] = None,
+        conversation: Optional[Conversation] = None,
+    ) -> tuple[str, str, str]:
+        self.last_from_cache = False
+        self.last_timing = None
+        self.last_usage = None
+        self.last_route = None
+        message = {
+            "op": "suggest",
+            "prompt": prompt,
+            "context": context,
+            "turns": conversation.turns if conversation else [],
+            "stream": stream,
+            "use_cache": self.use_cache,
+            "refresh_cache": self.refresh_cache,
+            "cwd": os.getcwd(),
+        }
+        try:
+            for event in _request(self.socket_path, message):
+                kind = event.get("event")
+                if kind == "command" and on_command:
+                    on_command(event["confidence"], event["command"])
+                elif kind == "result":
+                    self.last_from_cache = event.get("from_cache", False)
+                    if event.get("timing"):
+                        self.last_timing = _RemoteReport(event["timing"])
+                    if event.get("usage"):
+                        self.last_usage = _RemoteReport(event["usage"])
+                    if event.get("route"):
+                        self.last_route = _RemoteReport(event["route"])
+                    return (event["confidence"], event["command"], event["explanation"])
+                elif kind == "error":
+                    return ("LOW", "", f"❌ Error from the askit daemon: {event['message']}")
+            return ("LOW", "", "❌ Error from the askit daemon: connection closed before the answer")
+        except (OSError, ValueError) as e:
+            return ("LOW", "", f"❌ Error contacting the askit daemon: {e}")
+
+
+def connect_daemon(use_cache: bool = True, refresh_cache: bool = False, socket_path: Optional[Path] = None) -> Optional[DaemonProvider]:
+    """
+    Returns a provider bound to the running daemon, or None if there is none.
+
+    A daemon of another version is ignored, so an upgrade never talks to a stale process.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = socket_path or get_socket_path()
+    if not socket_path.exists():
+        return None
+    try:
+        for event in _request(socket_path, {"op": "status", "cwd": os.getcwd()}, timeout=CONNECT_TIMEOUT):
+            if event.get("event") == "status" and event.get("version") == __version__:
+                return DaemonProvider.from_config(
+                    event.get("config") or {}, socket_path=socket_path, use_cache=use_cache, refresh_cache=refresh_cache
+                )
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class AskitDaemon:
+    """
+    The resident process. Each connection is served in its own thread.
+
+    The API key and the configuration come from the process-wide settings
+    snapshot, which re-reads configuration files only when they change.
+
+    Args:
+        socket_path: Where to listen.
+        api_url: Override of the API endpoint of the configured provider.
+    """
+
+    def __init__(self, socket_path: Path, api_url: Optional[str] = None):
+        self.socket_path = socket_path
+        self.api_url = api_url
+        # The history index is process-wide state: build contexts one at a time
+        self._context_lock = threading.Lock()
+        self._server: Optional[_DaemonServer] = None
+
+    def _provider(self, cwd: Optional[str], use_cache: bool, refresh_cache: bool):
+        from ..providers.registry import create_provider
+        from .response_cache import get_response_cache
+        from .settings import get_settings
+
+        settings = get_settings(Path(cwd) if cwd else None)
+        cache = get_response_cache(settings.config, refresh=refresh_cache) if use_cache else None
+        try:
+            return create_provider(settings.config, settings.api_key, cache=cache, api_url=self.api_url)
+        except ValueError as e:
+            raise RuntimeError(str(e))
+
+    def handle(self, message: dict, send: Callable[[dict], None]):
+        """Serves one request, calling `send` for every event of the answer."""
+        op = message.get("op")
+        if op == "status":
+            from .settings import get_settings
+
+            config = get_settings(Path(message["cwd"]) if message.get("cwd") else None).config
+            send({"event": "status", "version": __version__, "pid": os.getpid(), "config": config})
+        elif op == "context":
+            from dataclasses import asdict
+            from .context import DEFAULT_HISTORY_TOKEN_BUDGET, build_context
+
+            with self._context_lock:
+                context = build_context(
+                    message.get("context_lines", 10),
+                    cwd=Path(message["cwd"]) if message.get("cwd") else None,
+                    shell=message.get("shell"),
+                    prompt=message.get("prompt", ""),
+                    token_budget=message.get("token_budget", DEFAULT_HISTORY_TOKEN_BUDGET),
+                )
+            send({"event": "context", "context": context.text, "history": asdict(context.history)})
+        elif op == "cached":
+            provider = self._provider(message.get("cwd"), use_cache=True, refresh_cache=False)
+            send({"event": "cached", "cached": provider.has_cached_answer(message["prompt"], message["context"])})
+        elif op == "suggest":
+            provider = self._provider(message.get("cwd"), message.get("use_cache", True), message.get("refresh_cache", False))
+            prompt, context = message["prompt"], message["context"]
+            conversation = Conversation.from_turns(message.get("turns") or [])
+            if message.get("stream", True):
+                confidence, command, explanation = provider.stream_suggestion(
+                    prompt, context,
+                    on_command=lambda c, cmd: send({"event": "command", "confidence": c, "command": cmd}),
+                    conversation=conversation,
+                )
+            else:
+                confidence, command, explanation = provider.get_suggestion(prompt, context, conversation=conversation)
+            send({
+                "event": "result",
+                "confidence": confidence,
+                "command": command,
+                "explanation": explanation,
+                "from_cache": provider.last_from_cache,
+                "timing": provider.last_timing.format() if provider.last_timing else None,
+                "usage": provider.last_usage.format() if provider.last_usage else None,
+                "route": provider.last_route.format() if provider.last_route else None,
+            })
+        elif op == "shutdown":
+            send({"event": "stopping"})
+            threading.Thread(target=self.shutdown, daemon=True).start()
+        else:
+            send({"event": "error", "message": f"unknown operation {op!r}"})
+
+    def serve_forever(self):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                try:
+                    daemon.handle(json.loads(line), lambda event: _send(self.wfile, event))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client went away (e.g. Ctrl+C)
+                except Exception as e:
+                    try:
+                        _send(self.wfile, {"event": "error", "message": str(e)})
+                    except OSError:
+                        pass
+
+        from .config_manager import ensure_dir
+
+        ensure_dir(self.socket_path.parent, mode=0o700)
+        if _socket_in_use(self.socket_path):
+            raise OSError(errno.EADDRINUSE, "A daemon is already listening on", str(self.socket_path))
+        # Only the user may connect: the socket grants use of their API key
+        old_umask = os.umask(0o077)
+        try:
+            self._server = _DaemonServer(str(self.socket_path), Handler)
+        finally:
+            os.umask(old_umask)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def stop_daemon(socket_path: Optional[Path] = None) -> bool:
+    """Asks the running daemon to exit. Returns False if none was running."""
+    socket_path = socket_path or get_socket_path()
+    try:
+        for event in _request(socket_path, {"op": "shutdown"}, timeout=CONNECT_TIMEOUT):
+            if event.get("event") == "stopping":
+                return True
+    except (OSError, ValueError):
+        pass
+    return False
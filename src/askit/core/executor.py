@@ -0,0 +1,206 @@
+"""
+Shared asynchronous shell command executor.
+
+Commands run as asyncio subprocesses with stdout and stderr merged. Output is
+read in large chunks and rendered in batches at a fixed interval, so a chatty
+command (`find /`, `journalctl`, `docker build`) cannot outpace the terminal
+renderer: when more lines arrive between two renders than can usefully be
+shown, only the most recent ones are printed with a note of how many were
+skipped. Only the last `max_buffer` bytes are kept in memory; when a command
+produces more than that, the full output is spilled to a log file.
+"""
+import asyncio
+import codecs
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from rich.console import Console
+from rich.text import Text
+
+from .config_manager import ensure_dir
+
+DEFAULT_MAX_BUFFER = 64 * 1024
+DEFAULT_RENDER_INTERVAL = 0.1
+DEFAULT_MAX_LINES_PER_RENDER = 200
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class OutputRingBuffer:
+    """Keeps the last `capacity` bytes written to it."""
+
+    def __init__(self, capacity: int = DEFAULT_MAX_BUFFER):
+        self.capacity = capacity
+        self.total_bytes = 0
+        self._data = bytearray()
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_bytes > len(self._data)
+
+    def will_overflow(self, size: int) -> bool:
+        return len(self._data) + size > self.capacity
+
+    def getvalue(self) -> bytes:
+        return bytes(self._data)
+
+    def write(self, chunk: bytes):
+        self.total_bytes += len(chunk)
+        self._data += chunk
+        overflow = len(self._data) - self.capacity
+        if overflow > 0:
+            del self._data[:overflow]
+
+    def text(self) -> str:
+        return self._data.decode("utf-8", errors="replace")
+
+
+@dataclass
+class ExecutionResult:
+    return_code: int
+    output: str  # The last `max_buffer` bytes of output
+    total_bytes: int
+    truncated: bool
+    log_file: Optional[Path] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.return_code == 0
+
+
+class _BatchRenderer:
+    """Accumulates decoded output and prints it in rate-limited batches."""
+
+    def __init__(self, console: Console, prefix: str, max_lines: int):
+        self.console = console
+        self.prefix = prefix
+        self.max_lines = max_lines
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+        self._lines: list[str] = []
+        self._skipped = 0
+
+    def feed(self, chunk: bytes):
+        text = self._partial + self._decoder.decode(chunk)
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        self._lines.extend(lines)
+        # Bound the pending backlog: lines that will never be shown are dropped now
+        if len(self._lines) > self.max_lines:
+            self._skipped += len(self._lines) - self.max_lines
+            del self._lines[:-self.max_lines]
+
+    def flush(self, final: bool = False):
+        if final:
+            self._partial += self._decoder.decode(b"", final=True)
+            if self._partial:
+                self._lines.append(self._partial)
+                self._partial = ""
+
+        if not self._lines and not self._skipped:
+            return
+
+        batch = Text(style="dim")
+        if self._skipped:
+            batch.append(f"{self.prefix}  … {self._skipped} lines not shown\n", style="italic")
+        for line in self._lines:
+            batch.append(f"{self.prefix}  {line.rstrip(chr(13))}\n")
+        batch.rstrip()
+        self.console.print(batch, soft_wrap=True)
+        self._lines = []
+        self._skipped = 0
+
+
+def new_log_path(prefix: str = "exec") -> Path:
+    """Returns a fresh log file path in the OS logs directory (not created yet)."""
+    from .config_manager import get_logs_dir
+
+    return get_logs_dir() / f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{time.monotonic_ns() % 1_000_000:06d}.log"
+
+
+async def run_command(
+    command: str,
+    console: Optional[Console] = None,
+    label: str = "",
+    max_buffer: int = DEFAULT_MAX_BUFFER,
+    render_interval: float = DEFAULT_RENDER_INTERVAL,
+    max_lines_per_render: int = DEFAULT_MAX_LINES_PER_RENDER,
+    log_file: Optional[Path] = None,
+    spill_on_overflow: bool = True,
+) -> ExecutionResult:
+    """
+    Runs a shell command, streaming its output to the console in batches.
+
+    Args:
+        command: The command line. On Windows it is run through PowerShell.
+        console: Where to render output; None runs silently.
+        label: Prefix for every rendered line (e.g. the agent step).
+        max_buffer: Bytes of output kept in memory (the tail).
+        render_interval: Seconds between two renders.
+        max_lines_per_render: Lines shown per render; older ones are summarized.
+        log_file: Write the full output to this file.
+        spill_on_overflow: When no log file is given, create one in the logs
+            directory as soon as the output outgrows the buffer.
+
+    Returns:
+        ExecutionResult with the exit code and the buffered output tail.
+    """
+    if sys.platform == "win32":
+        process = await asyncio.create_subprocess_exec(
+            "powershell.exe", "-Command", command,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )
+    else:
+        process = await asyncio.create_subprocess_shell(
+            command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )
+
+    buffer = OutputRingBuffer(max_buffer)
+    renderer = _BatchRenderer(console, f"[{label}] " if label else "", max_lines_per_render) if console else None
+    log_handle = open(log_file, "wb") if log_file else None
+
+    async def render_periodically():
+        while True:
+            await asyncio.sleep(render_interval)
+            renderer.flush()
+
+    render_task = asyncio.create_task(render_periodically()) if renderer else None
+    try:
+        while True:
+            chunk = await process.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            if log_handle is None and spill_on_overflow and buffer.will_overflow(len(chunk)):
+                # Nothing has been dropped yet: the buffer still holds the full output
+                log_file = new_log_path()
+                ensure_dir(log_file.parent)
+                log_handle = open(log_file, "wb")
+                log_handle.write(buffer.getvalue())
+            if log_handle is not None:
+                log_handle.write(chunk)
+            buffer.write(chunk)
+            if renderer:
+                renderer.feed(chunk)
+        return_code = await process.wait()
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    finally:
+        if render_task:
+            render_task.cancel()
+        if renderer:
+            renderer.flush(final=True)
+        if log_handle is not None:
+            log_handle.close()
+
+    return ExecutionResult(
+        return_code=return_code,
+        output=buffer.text(),
+        total_bytes=buffer.total_bytes,
+        truncated=buffer.truncated,
+        log_file=log_file,
+    )
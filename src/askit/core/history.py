@@ -1,19 +1,42 @@
+import hashlib
+import json
 import os
 import platform
+import re
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterable, Iterator, List, Optional
 
+from .config_manager import ensure_dir, write_file_atomic
 
-def get_shell_history(max_lines: int = 10, debug: bool = False) -> List[str]:
+# History files are read backwards in chunks of this size, so only the tail
+# needed for the requested number of entries is ever read and decoded.
+TAIL_CHUNK_SIZE = 64 * 1024
+
+# The parsed tail of each history file is kept in an index in the cache dir,
+# together with the file identity (inode, size, mtime) and the byte offset
+# parsed so far. Later calls only parse what was appended since. The index
+# is private to the user (0600) and its records are redacted: like the
+# history files themselves, it must not expose the secrets typed in a shell.
+HISTORY_INDEX_MIN_RECORDS = 100
+# Entries written in another format are rebuilt
+HISTORY_INDEX_FORMAT = 2
+_FINGERPRINT_SIZE = 64
+_history_index: Optional[dict] = None
+
+_BASH_TIMESTAMP_RE = re.compile(r"^#\d+$")
+
+
+def get_shell_history(max_lines: int = 10, debug: bool = False, shell: Optional[str] = None) -> List[str]:
     """
     Retrieve the shell history from the current user's shell.
     
     Args:
         max_lines: Maximum number of history lines to retrieve
         debug: Whether to print debug information
+        shell: The user's shell (defaults to $SHELL), for callers serving another process
         
     Returns:
-        List of command history lines, most recent first
+        List of command history lines, oldest first
     """
     try:
         system = platform.system()
@@ -23,14 +46,15 @@ def get_shell_history(max_lines: int = 10, debug: bool = False) -> List[str]:
             print(f"[DEBUG] System: {system}")
             print(f"[DEBUG] Shell env: {os.environ.get('SHELL', 'Not set')}")
         
-        # Fetch more lines to have enough after filtering
+        # Fetch more lines to have enough after filtering; the readers return
+        # the most recent ones, oldest first, so the tail is kept below
         fetch_lines = max_lines * 2 
         
         if system == "Windows":
             history_lines = _get_powershell_history(fetch_lines, debug)
         else:
             # Linux/macOS
-            history_lines = _get_unix_shell_history(fetch_lines, debug)
+            history_lines = _get_unix_shell_history(fetch_lines, debug, shell)
 
         # Filter out askit-cli commands from history
         filtered_history = [
@@ -42,7 +66,7 @@ def get_shell_history(max_lines: int = 10, debug: bool = False) -> List[str]:
             print(f"[DEBUG] Retrieved {len(history_lines)} history lines")
             print(f"[DEBUG] Filtered to {len(filtered_history)} lines")
             
-        return filtered_history[:max_lines] if filtered_history else []
+        return filtered_history[-max_lines:] if filtered_history else []
     except Exception as e:
         if debug:
             print(f"[DEBUG] Exception in get_shell_history: {e}")
@@ -51,7 +75,7 @@ def get_shell_history(max_lines: int = 10, debug: bool = False) -> List[str]:
 
 
 def _get_powershell_history(max_lines: int, debug: bool = False) -> List[str]:
-    """Get PowerShell history on Windows."""
+    """Get PowerShell history on Windows, oldest first."""
     try:
         import subprocess
         
@@ -73,7 +97,7 @@ def _get_powershell_history(max_lines: int, debug: bool = False) -> List[str]:
             lines = result.stdout.strip().split('\n')
             lines = [line.strip() for line in lines if line.strip()]
             if lines:
-                return list(reversed(lines))
+                return lines
         
         # Method 2: Try reading PowerShell history file
         if debug:
@@ -87,12 +111,9 @@ def _get_powershell_history(max_lines: int, debug: bool = False) -> List[str]:
         
         if history_file.exists():
             try:
-                with open(history_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()
-                    lines = [line.strip() for line in lines if line.strip()]
-                    lines = lines[-max_lines:] if len(lines) > max_lines else lines
-                    if lines:
-                        return list(reversed(lines))
+                lines = _read_history_records(history_file, "plain", max_lines)
+                if lines:
+                    return lines
             except Exception as e:
                 if debug:
                     print(f"[DEBUG] Error reading history file: {e}")
@@ -111,7 +132,7 @@ def _get_powershell_history(max_lines: int, debug: bool = False) -> List[str]:
             lines = result.stdout.strip().split('\n')
             lines = [line.strip() for line in lines if line.strip()]
             if lines:
-                return list(reversed(lines))
+                return lines
                 
     except Exception as e:
         if debug:
@@ -120,12 +141,12 @@ def _get_powershell_history(max_lines: int, debug: bool = False) -> List[str]:
     return []
 
 
-def _get_unix_shell_history(max_lines: int, debug: bool = False) -> List[str]:
-    """Get shell history on Unix-like systems (Linux/macOS)."""
+def _get_unix_shell_history(max_lines: int, debug: bool = False, shell: Optional[str] = None) -> List[str]:
+    """Get shell history on Unix-like systems (Linux/macOS), oldest first."""
     history_files = []
     
     # Try to detect shell and get appropriate history file
-    shell = os.environ.get('SHELL', '').lower()
+    shell = (shell if shell is not None else os.environ.get('SHELL', '')).lower()
     
     if 'bash' in shell:
         history_files = [Path.home() / '.bash_history']
@@ -146,74 +167,255 @@ def _get_unix_shell_history(max_lines: int, debug: bool = False) -> List[str]:
     for history_file in history_files:
         if history_file.exists():
             try:
-                lines = []
-                with open(history_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
                 if 'fish' in str(history_file):
                     # Fish history format is different
-                    lines = _parse_fish_history(content, max_lines)
+                    kind = "fish"
                 elif 'zsh' in str(history_file):
                     # Zsh extended history format
-                    lines = _parse_zsh_history(content, max_lines)
+                    kind = "zsh"
                 else:
                     # Simple bash format
-                    lines = content.strip().split('\n')
-                    lines = [line.strip() for line in lines if line.strip()]
-                    lines = lines[-max_lines:] if len(lines) > max_lines else lines
+                    kind = "plain"
+                lines = _read_history_records(history_file, kind, max_lines)
                 
                 if lines:
-                    return list(reversed(lines))  # Most recent first
+                    return lines
             except Exception:
                 continue
     
     return []
 
 
+def _read_history_tail(path: Path, max_records: int, count_records: Callable[[bytes], int]) -> str:
+    """
+    Read just enough of the end of a history file to hold `max_records` entries.
+
+    The file is read backwards in TAIL_CHUNK_SIZE chunks. Reading stops once the
+    complete lines gathered contain more record starts than requested: the extra
+    one guarantees that the oldest record we need is complete (multi-line zsh
+    entries and fish YAML blocks span several lines).
+
+    Args:
+        path: History file.
+        max_records: Number of entries wanted.
+        count_records: Counts record starts in a block of complete lines.
+
+    Returns:
+        The decoded tail, starting on a line boundary.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+
+        while position > 0:
+            read_size = min(TAIL_CHUNK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+
+            if position > 0:
+                # The first line may be cut in the middle: only count complete lines
+                newline = data.find(b"\n")
+                complete = data[newline + 1:] if newline != -1 else b""
+                if count_records(complete) > max_records:
+                    data = complete
+                    break
+
+    return data.decode('utf-8', errors='ignore')
+
+
+def _count_plain_records(data: bytes) -> int:
+    """One record per non-empty line (bash, PowerShell)."""
+    return sum(1 for line in data.split(b"\n") if line.strip() and not line.startswith(b"#"))
+
+
+def _count_zsh_records(data: bytes) -> int:
+    """A zsh record starts on any line that does not continue a line ending with a backslash."""
+    count = 0
+    continued = False
+    for line in data.split(b"\n"):
+        if line.strip() and not continued:
+            count += 1
+        continued = line.endswith(b"\\")
+    return count
+
+
+def _count_fish_records(data: bytes) -> int:
+    """Each fish entry is a YAML block starting with '- cmd:'."""
+    return data.count(b"\n- cmd:") + (1 if data.startswith(b"- cmd:") else 0)
+
+
+def _parse_plain_history(content: str, max_lines: int) -> List[str]:
+    """Parse one-command-per-line history (bash, PowerShell), skipping HISTTIMEFORMAT '#<epoch>' lines."""
+    lines = [line.strip() for line in content.split('\n')]
+    lines = [line for line in lines if line and not _BASH_TIMESTAMP_RE.match(line)]
+    return lines[-max_lines:] if len(lines) > max_lines else lines
+
+
 def _parse_fish_history(content: str, max_lines: int) -> List[str]:
     """Parse fish shell history format."""
     lines = []
-    current_cmd = ""
     
     for line in content.split('\n'):
-        line = line.strip()
+        # Only the '- cmd:' line carries the command: 'when:' and the 'paths:'
+        # list are indented metadata. Newlines inside a command are escaped.
         if line.startswith('- cmd:'):
-            if current_cmd:
-                lines.append(current_cmd)
-            current_cmd = line[6:].strip()  # Remove '- cmd: '
-        elif line.startswith('  when:') or line.startswith('  paths:'):
-            # Skip metadata lines
-            continue
-        elif current_cmd and line:
-            # Multi-line command
-            current_cmd += ' ' + line
-    
-    if current_cmd:
-        lines.append(current_cmd)
+            cmd = line[6:].strip()
+            cmd = cmd.replace('\\\\', '\x00').replace('\\n', ' ').replace('\x00', '\\')
+            if cmd:
+                lines.append(cmd)
     
     return lines[-max_lines:] if len(lines) > max_lines else lines
 
 
 def _parse_zsh_history(content: str, max_lines: int) -> List[str]:
-    """Parse zsh extended history format."""
+    """Parse zsh extended history format, joining multi-line entries."""
     lines = []
+    current = None
     
-    for line in content.split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Zsh extended history format: : timestamp:elapsed;command
-        if line.startswith(':') and ';' in line:
-            cmd = line.split(';', 1)[1] if ';' in line else line
-            lines.append(cmd.strip())
+    for raw_line in content.split('\n'):
+        if current is not None:
+            # Continuation of a multi-line entry
+            current.append(raw_line)
         else:
-            # Simple format
-            lines.append(line)
+            line = raw_line.strip()
+            if not line:
+                continue
+            # Zsh extended history format: : timestamp:elapsed;command
+            if line.startswith(':') and ';' in line:
+                line = line.split(';', 1)[1]
+            current = [line]
+
+        if current[-1].endswith('\\'):
+            current[-1] = current[-1][:-1]
+            continue
+
+        cmd = ' '.join(part.strip() for part in current if part.strip())
+        if cmd:
+            lines.append(cmd)
+        current = None
+
+    if current:
+        lines.append(' '.join(part.strip() for part in current if part.strip()))
     
     return lines[-max_lines:] if len(lines) > max_lines else lines
 
 
+_HISTORY_FORMATS = {
+    "plain": (_count_plain_records, _parse_plain_history),
+    "zsh": (_count_zsh_records, _parse_zsh_history),
+    "fish": (_count_fish_records, _parse_fish_history),
+}
+
+
+def _history_index_file() -> Path:
+    from .config_manager import get_cache_dir
+
+    return get_cache_dir() / "history_index.json"
+
+
+def _load_history_index() -> dict:
+    global _history_index
+    if _history_index is None:
+        try:
+            with open(_history_index_file(), 'r', encoding='utf-8') as f:
+                _history_index = json.load(f)
+        except (OSError, ValueError):
+            _history_index = {}
+    return _history_index
+
+
+def _save_history_index():
+    try:
+        index_file = _history_index_file()
+        ensure_dir(index_file.parent, mode=0o700)
+        # The file is created readable by its owner only
+        write_file_atomic(index_file, json.dumps(_history_index, ensure_ascii=False))
+    except OSError:
+        pass  # The index is only an optimization
+
+
+def _parse_records(parse: Callable[[str, int], List[str]], content: str, max_records: int) -> List[str]:
+    """Parses history records and redacts the secrets they contain, before they reach the index."""
+    from ..security.redaction import get_scanner
+
+    return list(get_scanner().redact_lines(parse(content, max_records)))
+
+
+def _read_fingerprint(f, offset: int) -> str:
+    """Digest of the bytes just before `offset` (the bytes themselves could hold a secret)."""
+    start = max(0, offset - _FINGERPRINT_SIZE)
+    f.seek(start)
+    return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+def _read_history_records(path: Path, kind: str, max_records: int) -> List[str]:
+    """
+    Return the last `max_records` entries of a history file, oldest first.
+
+    Uses the persistent index when the file is the same one (same inode, not
+    truncated, unchanged bytes just before the indexed offset): only bytes
+    appended since the last call are parsed. A rotated, truncated or
+    rewritten file falls back to a full tail scan.
+    """
+    count_records, parse = _HISTORY_FORMATS[kind]
+    stat = path.stat()
+    index = _load_history_index()
+    key = str(path)
+    entry = index.get(key)
+    keep = max(max_records, HISTORY_INDEX_MIN_RECORDS)
+
+    with open(path, 'rb') as f:
+        if (
+            entry
+            and entry.get("format") == HISTORY_INDEX_FORMAT
+            and entry.get("kind") == kind
+            and entry.get("inode") == stat.st_ino
+            and entry.get("keep", 0) >= max_records
+            and entry.get("offset", 0) <= stat.st_size
+            and stat.st_size - entry["offset"] <= TAIL_CHUNK_SIZE * 8
+        ):
+            offset = entry["offset"]
+            if stat.st_size == entry.get("size") and stat.st_mtime_ns == entry.get("mtime_ns"):
+                return entry["records"][-max_records:]
+
+            if _read_fingerprint(f, offset) == entry.get("fingerprint"):
+                f.seek(offset)
+                appended = f.read(stat.st_size - offset)
+                complete = appended[:appended.rfind(b"\n") + 1]
+                new_records = _parse_records(parse, complete.decode('utf-8', errors='ignore'), len(complete) + 1)
+                entry.update(
+                    records=(entry["records"] + new_records)[-entry["keep"]:],
+                    offset=offset + len(complete),
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    fingerprint=_read_fingerprint(f, offset + len(complete)),
+                )
+                _save_history_index()
+                return entry["records"][-max_records:]
+
+        # Full rescan of the tail; a trailing line still being written is left for later
+        content = _read_history_tail(path, keep, count_records)
+        partial = content[content.rfind('\n') + 1:]
+        content = content[:len(content) - len(partial)]
+        offset = stat.st_size - len(partial.encode('utf-8'))
+        index[key] = {
+            "format": HISTORY_INDEX_FORMAT,
+            "kind": kind,
+            "inode": stat.st_ino,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "offset": offset,
+            "fingerprint": _read_fingerprint(f, offset),
+            "keep": keep,
+            "records": _parse_records(parse, content, keep),
+        }
+
+    _save_history_index()
+    return index[key]["records"][-max_records:]
+
+
 def format_history_context(history_lines: List[str]) -> str:
     """
     Format shell history for AI context.
@@ -234,4 +436,84 @@ def format_history_context(history_lines: List[str]) -> str:
             cmd = cmd[:97] + "..."
         formatted_lines.append(f"{i:2d}. {cmd}")
     
-    return "\n".join(formatted_lines) 
\ No newline at end of file
+    return "\n".join(formatted_lines) 
+
+
+# --- Processing pipeline ---------------------------------------------------
+#
+# Each stage is a generator over commands, most recent first, so stages can be
+# chained in any order and a long history is never copied between them:
+#
+#     scored = score_relevance(redact_secrets(dedup_global(drop_noise(
+#         dedup_consecutive(reversed(lines))))), prompt)
+#
+# `process_history()` is that chain.
+
+# Commands that say nothing about what the user is working on
+_NOISE_RE = re.compile(
+    r"^(?:ls|ll|la|l|dir|clear|cls|reset|pwd|exit|logout|history|cd)"
+    r"(?:\s+(?:-\w+|\.\.(?:/\.\.)*/?|~|-|\.))*\s*$"
+)
+_TERM_RE = re.compile(r"\w{2,}")
+# Age (in distinct commands) at which recency counts half
+RECENCY_HALF_LIFE = 20
+# Weight of the word overlap with the prompt relative to recency (both in [0, 1])
+OVERLAP_WEIGHT = 2.0
+
+
+def dedup_consecutive(commands: Iterable[str]) -> Iterator[str]:
+    """Collapses runs of the same command (`ls`, `ls`, `ls`)."""
+    previous = None
+    for command in commands:
+        if command != previous:
+            yield command
+        previous = command
+
+
+def dedup_global(commands: Iterable[str]) -> Iterator[str]:
+    """Yields each command once, at its first (i.e. most recent) occurrence."""
+    seen = set()
+    for command in commands:
+        if command not in seen:
+            seen.add(command)
+            yield command
+
+
+def drop_noise(commands: Iterable[str]) -> Iterator[str]:
+    """Drops empty lines and commands like `ls`, `cd ..` or `clear`."""
+    for command in commands:
+        if command and not _NOISE_RE.match(command):
+            yield command
+
+
+def redact_secrets(commands: Iterable[str]) -> Iterator[str]:
+    """Replaces passwords, tokens and API keys found in commands by a placeholder."""
+    from ..security.redaction import get_scanner
+
+    return get_scanner().redact_lines(commands)
+
+
+def score_relevance(commands: Iterable[str], prompt: str) -> Iterator[tuple[float, str]]:
+    """
+    Yields `(score, command)` pairs: recency (halved every RECENCY_HALF_LIFE
+    commands) plus the share of the prompt's words found in the command.
+    """
+    prompt_terms = set(_TERM_RE.findall(prompt.lower()))
+    for age, command in enumerate(commands):
+        score = RECENCY_HALF_LIFE / (RECENCY_HALF_LIFE + age)
+        lowered = command.lower()
+        # Tokenize only commands containing one of the words as a substring
+        if prompt_terms and any(term in lowered for term in prompt_terms):
+            overlap = prompt_terms.intersection(_TERM_RE.findall(lowered))
+            score += OVERLAP_WEIGHT * len(overlap) / len(prompt_terms)
+        yield score, command
+
+
+def process_history(history_lines: List[str], prompt: str = "") -> Iterator[tuple[float, str]]:
+    """
+    Runs the whole pipeline over `history_lines` (oldest first, as returned by
+    `get_shell_history`) and yields scored, cleaned commands, most recent first.
+    """
+    commands = (line.strip() for line in reversed(history_lines))
+    commands = drop_noise(dedup_consecutive(commands))
+    return score_relevance(redact_secrets(dedup_global(commands)), prompt)
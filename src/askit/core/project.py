@@ -1,17 +1,165 @@
+"""
+Project root discovery.
+
+A project is a directory containing a `.askit` directory. The search walks
+from the current directory up to its parents, like git does, and is kept
+cheap because every command needs it and home directories are often on
+NFS or autofs where each `stat()` is a network round trip:
+
+- results are cached per directory for the lifetime of the process (a "no
+  project" answer expires after NEGATIVE_CACHE_TTL seconds, which only
+  matters to the long-lived daemon);
+- found roots are remembered in a hint file in the cache directory, so the
+  next process needs a single `stat()` to confirm them, and "no project"
+  answers are remembered there for NEGATIVE_HINT_TTL seconds, so the next
+  process needs none;
+- the walk stops at the edge of the start directory's filesystem unless
+  ASKIT_DISCOVERY_ACROSS_FILESYSTEM=1 (like GIT_DISCOVERY_ACROSS_FILESYSTEM),
+  which costs a second `stat()` per level, and never enters the directories
+  listed in ASKIT_CEILING_DIRECTORIES (like GIT_CEILING_DIRECTORIES).
+"""
+import json
+import os
+import stat
+import time
 from pathlib import Path
 from typing import Optional
 
-def find_project_root() -> Optional[Path]:
+from .config_manager import ensure_dir, get_cache_dir, write_file_atomic
+
+CEILING_ENV_VAR = "ASKIT_CEILING_DIRECTORIES"
+ACROSS_FILESYSTEM_ENV_VAR = "ASKIT_DISCOVERY_ACROSS_FILESYSTEM"
+NEGATIVE_CACHE_TTL = 30.0
+NEGATIVE_HINT_TTL = 10 * 60.0
+HINTS_FILE_NAME = "project_roots.json"
+MAX_HINTS = 200
+
+_root_cache: dict[str, tuple[Optional[Path], float]] = {}
+
+
+def _has_askit_dir(directory: str) -> bool:
+    return os.path.isdir(os.path.join(directory, ".askit"))
+
+
+def _ceiling_directories() -> set[str]:
+    value = os.environ.get(CEILING_ENV_VAR, "")
+    return {os.path.normpath(p) for p in value.split(os.pathsep) if p and os.path.isabs(p)}
+
+
+def _stat_askit_dir(directory: str) -> Optional[os.stat_result]:
+    try:
+        result = os.stat(os.path.join(directory, ".askit"))
+    except OSError:
+        return None
+    return result if stat.S_ISDIR(result.st_mode) else None
+
+
+def _discover(start: str) -> Optional[Path]:
+    """Walks up from `start`, stopping at a ceiling directory or at the edge of the start directory's filesystem."""
+    ceilings = _ceiling_directories()
+    across_filesystems = os.environ.get(ACROSS_FILESYSTEM_ENV_VAR) == "1"
+    device = None
+    if not across_filesystems:
+        try:
+            device = os.stat(start).st_dev
+        except OSError:
+            return None
+
+    current = start
+    while True:
+        if _stat_askit_dir(current) is not None:
+            return Path(current)
+        parent = os.path.dirname(current)
+        if parent == current or parent in ceilings:
+            return None
+        if device is not None:
+            # Like git, never leave the filesystem: its parents may be slow
+            # network mounts, and a root found there is not this project's
+            try:
+                if os.stat(parent).st_dev != device:
+                    return None
+            except OSError:
+                return None
+        current = parent
+
+
+def _hints_file() -> Path:
+    return get_cache_dir() / HINTS_FILE_NAME
+
+
+def _load_hints() -> dict:
+    try:
+        with open(_hints_file(), 'r', encoding='utf-8') as f:
+            hints = json.load(f)
+        return hints if isinstance(hints, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_hints(hints: dict):
+    try:
+        hints_file = _hints_file()
+        ensure_dir(hints_file.parent)
+        write_file_atomic(hints_file, json.dumps(hints, ensure_ascii=False))
+    except OSError:
+        pass  # Hints are only an optimization
+
+
+def _remember_hint(directory: str, root: Optional[Path]):
+    """Stores the root found for `directory`, or the time of the check when there is none."""
+    hints = _load_hints()
+    hints.pop(directory, None)
+    hints[directory] = str(root) if root is not None else time.time()
+    # Keep the most recently added hints
+    while len(hints) > MAX_HINTS:
+        del hints[next(iter(hints))]
+    _save_hints(hints)
+
+
+def clear_project_root_cache():
+    """
+    Forgets cached and persisted roots, e.g. after a project was created inside
+    another one.
+    """
+    _root_cache.clear()
+    _save_hints({})
+
+
+def find_project_root(start: Optional[Path] = None, use_hints: bool = True) -> Optional[Path]:
     """
     Finds the project root by searching for a `.askit` directory.
-    The search is performed from the current directory upwards to its parents.
+    The search is performed from `start` (the current directory by default) upwards to its parents.
+
+    Args:
+        start: Directory to search from.
+        use_hints: Read and update the persistent hint file.
 
     Returns:
         The path to the project root directory (containing .askit), or None if not found.
     """
-    current_path = Path.cwd()
-    for parent in [current_path] + list(current_path.parents):
-        askit_dir = parent / ".askit"
-        if askit_dir.is_dir():
-            return parent
-    return None 
\ No newline at end of file
+    directory = os.path.abspath(start) if start is not None else os.getcwd()
+    now = time.monotonic()
+
+    cached = _root_cache.get(directory)
+    if cached is not None:
+        root, found_at = cached
+        if root is not None and _has_askit_dir(str(root)):
+            return root
+        if root is None and now - found_at < NEGATIVE_CACHE_TTL:
+            return None
+
+    root = None
+    if use_hints:
+        hint = _load_hints().get(directory)
+        if isinstance(hint, str) and _has_askit_dir(hint):
+            root = Path(hint)
+        elif isinstance(hint, (int, float)) and time.time() - hint < NEGATIVE_HINT_TTL:
+            _root_cache[directory] = (None, now)
+            return None
+    if root is None:
+        root = _discover(directory)
+        if use_hints:
+            _remember_hint(directory, root)
+
+    _root_cache[directory] = (root, now)
+    return root
@@ -0,0 +1,216 @@
+"""
+Persistent, content-addressed cache for AI responses.
+
+Entries are stored as one JSON file per key under the cache directory. The key
+is a SHA-256 of the model, system prompt, prompt and normalized context, so two
+identical queries resolve to the same file. Entries expire after a TTL and the
+cache is kept under a size bound by evicting the least recently used entries
+(file mtime is refreshed on every hit).
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config_manager import ensure_dir, write_file_atomic
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def make_cache_key(model: str, system_prompt: str, prompt: str, context: str = "") -> str:
+    """
+    Build the content address for a query.
+
+    Returns:
+        A hex SHA-256 digest.
+    """
+    material = json.dumps(
+        {
+            "model": model,
+            "system": system_prompt,
+            "prompt": normalize_text(prompt),
+            "context": normalize_text(context),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk response cache with TTL expiry and size-bounded LRU eviction.
+
+    Args:
+        directory: Directory holding the entries (created on first write).
+        ttl: Entry lifetime in seconds.
+        max_entries: Maximum number of entries kept on disk.
+        max_bytes: Maximum total size of the entries on disk.
+        refresh: When True, lookups always miss but new responses are still stored.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        refresh: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+
+    @property
+    def stats_file(self) -> Path:
+        return self.directory / "stats.json"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response text.
+
+        Returns:
+            The cached response, or None on a miss (or in refresh mode).
+        """
+        if self.refresh:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._record(hit=False)
+            return None
+
+        if time.time() - entry.get("created", 0) > self.ttl:
+            path.unlink(missing_ok=True)
+            self._record(hit=False)
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        self._record(hit=True)
+        return entry.get("response")
+
+    def contains(self, key: str) -> bool:
+        """Whether `get(key)` would hit, without counting a lookup or touching the entry."""
+        if self.refresh:
+            return False
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return time.time() - entry.get("created", 0) <= self.ttl
+
+    def put(self, key: str, response: str):
+        """Store a response and evict old entries if the cache is over its bounds."""
+        try:
+            ensure_dir(self.directory)
+            write_file_atomic(self._entry_path(key), json.dumps({"created": time.time(), "response": response}, ensure_ascii=False))
+            self._evict()
+        except OSError:
+            pass  # The cache is best-effort
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            if path == self.stats_file:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        now = time.time()
+        entries = sorted(self._entries())  # Least recently used first
+        total_bytes = sum(size for _, size, _ in entries)
+
+        while entries:
+            mtime, size, path = entries[0]
+            expired = now - mtime > self.ttl
+            over_bounds = len(entries) > self.max_entries or total_bytes > self.max_bytes
+            if not (expired or over_bounds):
+                break
+            path.unlink(missing_ok=True)
+            entries.pop(0)
+            total_bytes -= size
+
+    def _record(self, hit: bool):
+        stats = self.get_stats()
+        stats["hits" if hit else "misses"] += 1
+        try:
+            ensure_dir(self.directory)
+            self.stats_file.write_text(json.dumps({"hits": stats["hits"], "misses": stats["misses"]}))
+        except OSError:
+            pass
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict with hits, misses, hit_ratio, entries and size_bytes.
+        """
+        try:
+            counters = json.loads(self.stats_file.read_text())
+        except (OSError, ValueError):
+            counters = {}
+
+        hits = int(counters.get("hits", 0))
+        misses = int(counters.get("misses", 0))
+        entries = self._entries() if self.directory.is_dir() else []
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+        }
+
+    def clear(self):
+        """Remove every cached entry and reset the statistics."""
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+        self.stats_file.unlink(missing_ok=True)
+
+
+def get_response_cache(config: Optional[dict] = None, refresh: bool = False) -> ResponseCache:
+    """
+    Build the response cache located under the OS cache directory.
+
+    Args:
+        config: Global configuration; `cache_ttl` (seconds) and `cache_max_entries` override the defaults.
+        refresh: Bypass lookups while still storing new responses.
+    """
+    from .config_manager import get_cache_dir
+
+    config = config or {}
+    return ResponseCache(
+        get_cache_dir() / "responses",
+        ttl=config.get("cache_ttl", DEFAULT_TTL_SECONDS),
+        max_entries=config.get("cache_max_entries", DEFAULT_MAX_ENTRIES),
+        refresh=refresh,
+    )
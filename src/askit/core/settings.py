@@ -0,0 +1,146 @@
+"""
+Process-wide settings snapshot.
+
+The API key, the global configuration and the project configuration are
+loaded once per process and shared by every command (and by every request
+served by the daemon). Each configuration file is re-read only when its
+mtime or size changes. The API key is resolved in this order:
+
+1. the `ANTHROPIC_API_KEY` environment variable (a `.env` file is honored);
+2. the OS keychain.
+
+Keychain lookups can be slow (a D-Bus round trip to Secret Service on Linux),
+so the key is cached and looked up again only when the global configuration
+file changes (`askit-cli config` rewrites it on every commit) or when
+`invalidate_settings()` is called.
+"""
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .config_manager import get_config_file, get_project_config_file
+from .project import find_project_root
+
+API_KEY_ENV_VAR = "ANTHROPIC_API_KEY"
+DEFAULT_CONFIG = {"mode": "normal"}
+
+
+@dataclass
+class Settings:
+    api_key: Optional[str]
+    api_key_source: str  # "environment", "keychain" or "" when missing
+    global_config: dict = field(default_factory=dict)
+    project_config: dict = field(default_factory=dict)
+    project_root: Optional[Path] = None
+
+    @property
+    def config(self) -> dict:
+        """The effective configuration: defaults, then global, then project values."""
+        return {**DEFAULT_CONFIG, **self.global_config, **self.project_config}
+
+
+class _ConfigFile:
+    """A YAML file parsed once and re-read only when its mtime or size changes."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.stamp: Optional[tuple[int, int]] = None
+        self.data: dict = {}
+
+    def current(self) -> tuple[dict, bool]:
+        """Returns the parsed content and whether it was (re)loaded by this call."""
+        try:
+            st = self.path.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self.stamp:
+            return self.data, False
+
+        self.stamp = stamp
+        self.data = _read_yaml(self.path) if stamp else {}
+        return self.data, True
+
+
+def _read_yaml(path: Path) -> dict:
+    import yaml
+
+    try:
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+_lock = threading.Lock()
+_dotenv_loaded = False
+_global_file: Optional[_ConfigFile] = None
+_project_files: dict[Path, _ConfigFile] = {}
+_keychain_key: Optional[tuple[Optional[str]]] = None  # Boxed so a missing key is cached too
+
+
+def _resolve_api_key(global_reloaded: bool) -> tuple[Optional[str], str]:
+    global _keychain_key
+
+    env_key = os.environ.get(API_KEY_ENV_VAR)
+    if env_key:
+        return env_key, "environment"
+
+    if _keychain_key is None or global_reloaded:
+        from ..security import secrets_manager
+
+        _keychain_key = (secrets_manager.get_api_key(),)
+    api_key = _keychain_key[0]
+    return api_key, "keychain" if api_key else ""
+
+
+def get_settings(cwd: Optional[Path] = None) -> Settings:
+    """
+    Returns the current settings for a request made from `cwd` (the current directory by default).
+
+    Cheap after the first call: only two `stat()` calls unless a file changed.
+    """
+    global _dotenv_loaded, _global_file
+
+    with _lock:
+        if not _dotenv_loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _dotenv_loaded = True
+
+        config_file = get_config_file()
+        if _global_file is None or _global_file.path != config_file:
+            _global_file = _ConfigFile(config_file)
+        global_config, global_reloaded = _global_file.current()
+
+        project_root = find_project_root(cwd)
+        project_config = {}
+        if project_root:
+            project_file = get_project_config_file(project_root)
+            if project_file not in _project_files:
+                _project_files[project_file] = _ConfigFile(project_file)
+            project_config, _ = _project_files[project_file].current()
+
+        api_key, api_key_source = _resolve_api_key(global_reloaded)
+
+    return Settings(
+        api_key=api_key,
+        api_key_source=api_key_source,
+        global_config=dict(global_config),
+        project_config=dict(project_config),
+        project_root=project_root,
+    )
+
+
+def invalidate_settings():
+    """Forgets the snapshot, e.g. after the API key was changed in the keychain."""
+    global _global_file, _keychain_key
+
+    with _lock:
+        _global_file = None
+        _project_files.clear()
+        _keychain_key = None
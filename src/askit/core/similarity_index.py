@@ -0,0 +1,204 @@
+"""
+Local lexical similarity index over previously answered prompts.
+
+Prompts are reduced to canonical terms (lower-cased, lightly stemmed, with a
+small table of sysadmin synonyms such as "procs" -> "process" or
+"ram" -> "memory") and compared with TF-IDF weighted cosine similarity.
+Everything runs locally from a JSON file in the data directory: no network,
+no model download, no GPU.
+"""
+import json
+import math
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from .config_manager import ensure_dir, write_file_atomic
+
+DEFAULT_THRESHOLD = 0.85
+MAX_ENTRIES = 500
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9._/-]*")
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "for", "with", "by", "from", "at",
+    "me", "my", "i", "is", "are", "be", "it", "this", "that", "these", "those",
+    "all", "any", "and", "or", "please", "can", "you", "how", "do", "what",
+    "which", "using", "use", "uses", "currently", "now", "some",
+}
+
+_PHRASES = {
+    "more than": "over",
+    "greater than": "over",
+    "larger than": "over",
+    "bigger than": "over",
+    "less than": "under",
+    "smaller than": "under",
+    "fewer than": "under",
+}
+
+_SYNONYMS = {
+    "list": "show", "display": "show", "print": "show", "get": "show", "find": "show",
+    "view": "show", "check": "show",
+    "proc": "process", "ps": "process",
+    "ram": "memory", "mem": "memory",
+    "above": "over", "exceeding": "over",
+    "below": "under",
+    "delete": "remove", "rm": "remove", "erase": "remove",
+    "dir": "directory", "folder": "directory",
+    "disk": "storage", "space": "storage",
+    "kill": "stop", "terminate": "stop",
+    "biggest": "largest",
+    "logon": "login", "signin": "login",
+}
+
+
+def _stem(token: str) -> str:
+    if token.endswith("sses"):
+        return token[:-2]
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("s") and not token.endswith("ss") and len(token) > 3 and not token[-2].isdigit():
+        return token[:-1]
+    return token
+
+
+def canonical_terms(text: str) -> list[str]:
+    """
+    Reduce a prompt to its canonical terms.
+
+    Returns:
+        The list of terms, in order, with stopwords removed.
+    """
+    text = text.lower()
+    for phrase, replacement in _PHRASES.items():
+        text = text.replace(phrase, replacement)
+
+    terms = []
+    for token in _TOKEN_RE.findall(text):
+        token = token.rstrip("._-")
+        if not token or token in _STOPWORDS:
+            continue
+        token = _SYNONYMS.get(token, token)
+        token = _stem(token)
+        terms.append(_SYNONYMS.get(token, token))
+    return terms
+
+
+class SimilarityIndex:
+    """
+    TF-IDF index of past prompts and their parsed (confidence, command, explanation).
+
+    Args:
+        path: JSON file backing the index.
+        threshold: Minimum cosine similarity for a prompt to count as a near-duplicate.
+    """
+
+    def __init__(self, path: Path, threshold: float = DEFAULT_THRESHOLD):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.entries: list[dict] = []
+        self._loaded = False
+
+    def load(self) -> "SimilarityIndex":
+        if not self._loaded:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("entries", [])
+            except (OSError, ValueError, AttributeError):
+                self.entries = []
+            self._loaded = True
+        return self
+
+    def save(self):
+        try:
+            ensure_dir(self.path.parent)
+            write_file_atomic(self.path, json.dumps({"entries": self.entries}, ensure_ascii=False))
+        except OSError:
+            pass  # The index is best-effort
+
+    def _idf(self) -> dict:
+        document_frequency = Counter()
+        for entry in self.entries:
+            document_frequency.update(set(entry["terms"]))
+        n = len(self.entries)
+        return {term: math.log((1 + n) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+    @staticmethod
+    def _vector(terms: list[str], idf: dict, default_idf: float) -> dict:
+        counts = Counter(terms)
+        return {term: count * idf.get(term, default_idf) for term, count in counts.items()}
+
+    @staticmethod
+    def _cosine(a: dict, b: dict) -> float:
+        if not a or not b:
+            return 0.0
+        dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+        norm_a = math.sqrt(sum(w * w for w in a.values()))
+        norm_b = math.sqrt(sum(w * w for w in b.values()))
+        return dot / (norm_a * norm_b)
+
+    def find_similar(self, prompt: str, scope: str = "") -> Optional[tuple[float, dict]]:
+        """
+        Find the closest past prompt within the same scope (e.g. operating system).
+
+        Returns:
+            (score, entry) for the best match above the threshold, or None.
+        """
+        self.load()
+        terms = canonical_terms(prompt)
+        if not terms or not self.entries:
+            return None
+
+        idf = self._idf()
+        default_idf = math.log(1 + len(self.entries)) + 1
+        query = self._vector(terms, idf, default_idf)
+
+        best = None
+        for entry in self.entries:
+            if entry.get("scope", "") != scope:
+                continue
+            score = self._cosine(query, self._vector(entry["terms"], idf, default_idf))
+            if best is None or score > best[0]:
+                best = (score, entry)
+
+        if best and best[0] >= self.threshold:
+            return best
+        return None
+
+    def add(self, prompt: str, confidence: str, command: str, explanation: str, scope: str = ""):
+        """Record an answered prompt, replacing any previous entry with the same terms."""
+        self.load()
+        terms = canonical_terms(prompt)
+        if not terms:
+            return
+        self.entries = [e for e in self.entries if not (e["terms"] == terms and e.get("scope", "") == scope)]
+        self.entries.append({
+            "prompt": prompt,
+            "terms": terms,
+            "scope": scope,
+            "confidence": confidence,
+            "command": command,
+            "explanation": explanation,
+            "created": time.time(),
+        })
+        self.entries = self.entries[-MAX_ENTRIES:]
+        self.save()
+
+
+def get_similarity_index(config: Optional[dict] = None) -> SimilarityIndex:
+    """
+    Build the similarity index stored in the OS data directory.
+
+    Args:
+        config: Global configuration; `similarity_threshold` overrides the default threshold.
+    """
+    from .config_manager import get_data_dir
+
+    config = config or {}
+    return SimilarityIndex(
+        get_data_dir() / "prompt_index.json",
+        threshold=config.get("similarity_threshold", DEFAULT_THRESHOLD),
+    )
@@ -0,0 +1,26 @@
+"""
+Fast local token count estimate.
+
+Counting tokens exactly needs the model's tokenizer (or an API call), which is
+far too slow for choosing what goes into a request. This estimate splits the
+text into words, numbers and punctuation with a single regular expression and
+charges about one token per four bytes of each word, one per punctuation
+character. It errs on the high side for shell commands (paths, flags and
+operators split into many tokens), so a context built to a budget does not
+exceed it.
+"""
+import re
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Returns an estimate of the number of tokens of `text`."""
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        if len(piece) == 1:
+            tokens += 1
+        else:
+            # Non-ASCII text (accents, CJK) costs more tokens per character
+            tokens += (len(piece.encode("utf-8")) + 3) // 4
+    return tokens
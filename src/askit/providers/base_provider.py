@@ -1,25 +1,99 @@
+import asyncio
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+from .conversation import Conversation
+
+
+@dataclass
+class TokenUsage:
+    """
+    Token accounting of one API call.
+
+    `input_tokens` counts only the uncached part of the input; tokens read from
+    or written to the provider's prompt cache are reported separately.
+    """
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+
+    @classmethod
+    def from_api(cls, usage: Optional[dict]) -> "TokenUsage":
+        usage = usage or {}
+        return cls(**{name: int(usage.get(name) or 0) for name in cls.__dataclass_fields__})
+
+    def format(self) -> str:
+        return (
+            f"input {self.input_tokens} uncached + {self.cache_read_input_tokens} cached"
+            f" (+{self.cache_creation_input_tokens} written to cache) · output {self.output_tokens} tokens"
+        )
+
 
 class AIBaseProvider(ABC):
     """
     Abstract base class for all AI providers.
     Each provider must implement these methods to ensure a consistent interface.
+
+    After each call, `last_from_cache`, `last_timing`, `last_usage` and
+    `last_route` describe how it was answered (when the provider knows).
     """
 
+    last_from_cache = False
+    last_timing = None
+    last_usage: Optional[TokenUsage] = None
+    last_route = None
+
+    @classmethod
+    @abstractmethod
+    def from_config(cls, config: dict, api_key: Optional[str] = None, **options) -> "AIBaseProvider":
+        """
+        Builds the provider from the effective configuration; used by the provider registry.
+
+        Options the provider does not support (e.g. `cache_context`) are ignored.
+        """
+
     @abstractmethod
-    def get_suggestion(self, prompt: str, context: str) -> str:
+    def get_suggestion(self, prompt: str, context: str, conversation: Optional[Conversation] = None) -> tuple[str, str, str]:
         """
         Takes a prompt and context, returns the AI's suggestion.
 
         Args:
             prompt: The user's prompt.
             context: The project context (files, history, etc.).
+            conversation: The clarification turns that followed the request, if any.
 
         Returns:
-            A string containing the AI's command or suggestion.
+            tuple: (confidence_level, command, explanation), the confidence
+            being one of HIGH, MEDIUM, LOW, NONE or AGENT.
         """
         pass
 
+    def has_cached_answer(self, prompt: str, context: str) -> bool:
+        """Whether this exact request would be answered from a response cache."""
+        return False
+
+    def stream_suggestion(self, prompt: str, context: str, on_command=None, conversation: Optional[Conversation] = None) -> tuple[str, str, str]:
+        """
+        Like `get_suggestion`, calling `on_command(confidence, command)` as soon
+        as the command is known. The default implementation does not stream.
+        """
+        result = self.get_suggestion(prompt, context, conversation=conversation)
+        if on_command:
+            on_command(result[0], result[1])
+        return result
+
+    async def aget_suggestion(self, prompt: str, context: str, conversation: Optional[Conversation] = None) -> tuple[str, str, str]:
+        """
+        Async counterpart of `get_suggestion`, for use inside an event loop.
+
+        The default implementation runs `get_suggestion` in a worker thread so
+        the loop is never blocked; providers with a native async client should
+        override it.
+        """
+        return await asyncio.to_thread(self.get_suggestion, prompt, context, conversation=conversation)
+
     def _prepare_prompt(self, prompt: str, context: str) -> str:
         """
         Base method for preparing the final prompt. Can be overridden if necessary.
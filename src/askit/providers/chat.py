@@ -0,0 +1,536 @@
+"""
+Base of the providers backed by a chat completion API.
+
+Every backend answers in the same CONFIDENCE/COMMAND/EXPLANATION format, so
+everything but the wire format is shared: the system prompt, secret
+redaction, the response cache, model routing and escalation, the early
+report of the command line while streaming, hedging, and the rate limiter
+and retries. A backend implements the abstract `_build_request()`,
+`_extract_text()` and `_iter_stream_text()` for its API (see `claude.py`,
+`openai.py` and `fake.py`), and `from_config()`.
+
+Messages are built in the Messages API format (content blocks, which may
+carry a `cache_control` prompt cache breakpoint); backends whose API does not
+know these flatten them when building the request.
+"""
+import httpx
+import json
+import time
+from abc import abstractmethod
+from contextlib import closing
+from typing import Awaitable, Callable, Iterator, Optional
+from .base_provider import AIBaseProvider, TokenUsage
+from .conversation import Conversation
+from .http_client import RequestTimer, RequestTiming, get_async_http_client, get_http_client
+from .hedging import Hedger
+from .rate_limit import asend_with_retries, send_with_retries
+from .routing import LARGE_MAX_TOKENS, ModelRouter, Route
+from ..core.response_cache import ResponseCache, make_cache_key
+from ..security.redaction import redact
+from .streaming import StreamingResponseParser
+
+# Prompt caching: the prefix of a request up to a block marked with this is
+# cached by the API for a few minutes and billed at a fraction of the price
+PROMPT_CACHE_CONTROL = {"type": "ephemeral"}
+
+# System message for command generation
+SYSTEM_PROMPT = """You are an expert system administrator helping users with command-line tasks. You must provide accurate, executable commands with a confidence assessment.
+
+CRITICAL: You must respond in this EXACT format:
+
+CONFIDENCE: [HIGH|MEDIUM|LOW|NONE|AGENT]
+COMMAND: [the exact command to execute, or empty if confidence is NONE or AGENT]
+EXPLANATION: [brief explanation, clarifying question, or agent's proposed plan]
+
+CONFIDENCE LEVELS:
+- HIGH: You are 100% certain this is the correct, safe command for the user's request
+- MEDIUM: You are confident but there might be variations or context-specific considerations  
+- LOW: You have suggestions but aren't completely sure or need more context
+- NONE: You do not understand the request, cannot provide a useful command, or the user is asking a question that can be answered directly. Ask a clarifying question or provide a direct answer in the EXPLANATION.
+- AGENT: The request is complex and requires multiple steps (e.g., file creation, multiple commands). Propose a plan in the EXPLANATION.
+
+RESPONSE RULES:
+1. Always start with "CONFIDENCE:" followed by HIGH, MEDIUM, LOW, NONE, or AGENT
+2. Follow with "COMMAND:" and the exact command the user should run. If confidence is NONE or AGENT, this should be empty.
+3. If the user asks a question that can be answered without a command, set CONFIDENCE to NONE and COMMAND to empty, and write the answer in the EXPLANATION.
+4. To request user input for a variable, use the format `{{USER_INPUT:Question for the user}}`. The agent will ask the user for this information.
+5. For file creation, use the format `FILE: path/to/your/file.ext` on a new line, immediately followed by a markdown code block with the file's content.
+6. In agent plans, bash blocks run in order. Blocks that can run in parallel must start with a `# step: <name>` comment line; a named block that must wait for other named blocks also gets an `# after: <name>[, <name>]` line.
+7. End with "EXPLANATION:" and a concise explanation. If confidence is NONE, ask a question or provide an answer.
+8. Keep commands simple and directly executable
+9. For HIGH confidence: provide ONE clear command
+10. For MEDIUM/LOW confidence: you can suggest alternatives
+11. Consider the user's shell environment and current directory
+12. For system-level directories (e.g., `/etc`, `C:\\Windows`), always use absolute paths.
+13. CRITICAL FOR POWERSHELL: Paths with special characters (like `$` or spaces) MUST be in SINGLE QUOTES (`'`) to be treated literally. For example, to access the Recycle Bin, the path MUST be `'C:\\$Recycle.Bin'`. Using double quotes (`"`) is INCORRECT and will cause an error. For hidden files, use the `-Force` flag.
+14. Avoid dangerous operations unless explicitly requested
+15. The EXPLANATION must be in the same language as the "User Request".
+
+EXAMPLE (Success):
+CONFIDENCE: HIGH
+COMMAND: ls -la *.txt
+EXPLANATION: Lists all .txt files in the current directory with details.
+
+EXAMPLE (Direct Question):
+CONFIDENCE: NONE
+COMMAND:
+EXPLANATION: Yes, Docker uses runtimes like `runc` by default to run containers. You can inspect the runtime for a specific container using `docker inspect`.
+
+EXAMPLE (French Request):
+CONFIDENCE: HIGH
+COMMAND: ls -l
+EXPLANATION: Liste les fichiers et dossiers du répertoire avec leurs détails.
+
+EXAMPLE (Agent Task):
+CONFIDENCE: AGENT
+COMMAND:
+EXPLANATION: I will create a new Python project. Here is the plan:
+
+First, create the directory structure:
+```bash
+mkdir -p {{USER_INPUT:Enter the project name}}
+```
+
+Next, create the main file.
+FILE: {{USER_INPUT:Enter the project name}}/src/main.py
+```python
+def main():
+    print("Hello, World!")
+
+if __name__ == "__main__":
+    main()
+```
+
+EXAMPLE (Needs clarification):
+CONFIDENCE: NONE
+COMMAND:
+EXPLANATION: I'm not sure what kind of 'cleanup' you're referring to. Could you please specify if you want to remove temporary files, clear a cache, or something else?
+
+The user is working in their current directory context."""
+
+
+class ChatProvider(AIBaseProvider):
+    """
+    Suggestions from a chat completion API over the shared HTTP client.
+
+    Args:
+        api_key: Credential sent to the API (may be None for local servers).
+        api_url: Endpoint of the API.
+        model: Model used when no router is given.
+        cache: On-disk response cache (identical queries are not sent again).
+        client, async_client: HTTP clients to use instead of the shared ones.
+        hedger: Sends a duplicate of requests slower than usual (see `hedging.py`).
+        router: Picks the model of each request (see `routing.py`); without
+            one, every request uses `model` and `max_tokens`.
+    """
+
+    name = "AI"  # Shown in error messages
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        api_url: str,
+        model: str,
+        cache: Optional[ResponseCache] = None,
+        client: Optional[httpx.Client] = None,
+        async_client: Optional[httpx.AsyncClient] = None,
+        hedger: Optional[Hedger] = None,
+        router: Optional[ModelRouter] = None,
+    ):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.model = model
+        self.max_tokens = LARGE_MAX_TOKENS
+        self.cache = cache
+        # Shared keep-alive pool: repeated calls reuse the same TCP/TLS connection
+        self.client = client or get_http_client()
+        self._async_client = async_client
+        self.hedger = hedger
+        self.router = router
+        self.last_route: Optional[Route] = None
+        self.last_from_cache = False
+        self.last_timing: Optional[RequestTiming] = None
+        self.last_usage: Optional[TokenUsage] = None
+
+    def _cache_key(self, prompt: str, context: str, conversation: Optional[Conversation] = None, model: Optional[str] = None) -> str:
+        if conversation:
+            prompt = json.dumps([prompt, conversation.turns], ensure_ascii=False)
+        return make_cache_key(model or self.model, SYSTEM_PROMPT, prompt, context)
+
+    def _cached_response(self, key: str) -> Optional[str]:
+        self.last_from_cache = False
+        self.last_timing = None
+        self.last_usage = None
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        self.last_from_cache = cached is not None
+        return cached
+
+    def has_cached_answer(self, prompt: str, context: str) -> bool:
+        """Whether this exact request (with the model it is routed to) is in the response cache."""
+        if self.cache is None:
+            return False
+        model = self.router.route(prompt).model if self.router else self.model
+        return self.cache.contains(self._cache_key(prompt, context, model=model))
+
+    def _error_result(self, error: Exception) -> tuple[str, str, str]:
+        return ("LOW", "", f"❌ Error calling {self.name} API: {str(error)}\n\n💡 Fallback suggestion: Consider checking the command manually.")
+
+    def get_suggestion(self, prompt: str, context: str, conversation: Optional[Conversation] = None) -> tuple[str, str, str]:
+        """
+        Queries the API to get a command suggestion.
+
+        `conversation` holds the clarification turns that followed the request, if any.
+
+        Returns:
+            tuple: (confidence_level, command, explanation)
+        """
+        messages = self._prepare_messages(prompt, context, conversation)
+        route = self._route(prompt, conversation)
+        try:
+            while True:
+                start = time.perf_counter()
+                cache_key = self._cache_key(prompt, context, conversation, route.model)
+                response = self._cached_response(cache_key)
+                if response is None:
+                    response = self._call_api(messages, route)
+                    if self.cache is not None:
+                        self.cache.put(cache_key, response)
+                result = self._parse_response(response)
+                route = self._next_route(route, prompt, result[0], start)
+                if route is None:
+                    return result
+        except Exception as e:
+            return self._error_result(e)
+
+    async def aget_suggestion(self, prompt: str, context: str, conversation: Optional[Conversation] = None) -> tuple[str, str, str]:
+        """
+        Queries the API with the async HTTP client, without blocking the event loop.
+
+        Returns:
+            tuple: (confidence_level, command, explanation)
+        """
+        try:
+            return await self.arequest_suggestion(prompt, context, conversation)
+        except Exception as e:
+            return self._error_result(e)
+
+    async def arequest_suggestion(self, prompt: str, context: str, conversation: Optional[Conversation] = None) -> tuple[str, str, str]:
+        """
+        Like `aget_suggestion()`, but a failed request raises instead of being
+        turned into a LOW-confidence error suggestion, for callers that report
+        errors themselves (batch mode). The cache and routing apply as usual.
+
+        Returns:
+            tuple: (confidence_level, command, explanation)
+
+        Raises:
+            Exception: When the API cannot be reached or answers with an error.
+        """
+        messages = self._prepare_messages(prompt, context, conversation)
+        route = self._route(prompt, conversation)
+        while True:
+            start = time.perf_counter()
+            cache_key = self._cache_key(prompt, context, conversation, route.model)
+            response = self._cached_response(cache_key)
+            if response is None:
+                response = await self._acall_api(messages, route)
+                if self.cache is not None:
+                    self.cache.put(cache_key, response)
+            result = self._parse_response(response)
+            route = self._next_route(route, prompt, result[0], start)
+            if route is None:
+                return result
+
+    def stream_suggestion(
+        self,
+        prompt: str,
+        context: str,
+        on_command: Optional[Callable[[str, str], None]] = None,
+        conversation: Optional[Conversation] = None,
+    ) -> tuple[str, str, str]:
+        """
+        Streams a command suggestion from the API.
+
+        `on_command(confidence, command)` is called as soon as the CONFIDENCE and
+        COMMAND lines have arrived, before the explanation has finished generating.
+        `conversation` holds the clarification turns that followed the request, if any.
+        An answer the router will escalate to the large model is not announced.
+
+        Returns:
+            tuple: (confidence_level, command, explanation)
+        """
+        messages = self._prepare_messages(prompt, context, conversation)
+        route = self._route(prompt, conversation)
+
+        def announce(confidence: str, command: str):
+            if on_command and not (self.router and self.router.escalation(route, confidence)):
+                on_command(confidence, command)
+
+        try:
+            while True:
+                start = time.perf_counter()
+                cache_key = self._cache_key(prompt, context, conversation, route.model)
+                response = self._cached_response(cache_key)
+                if response is not None:
+                    result = self._parse_response(response)
+                    announce(result[0], result[1])
+                else:
+                    parser = StreamingResponseParser()
+                    for chunk in self._stream_api(messages, route):
+                        if parser.feed(chunk):
+                            announce(parser.confidence, parser.command or "")
+                    if self.cache is not None and parser.text:
+                        self.cache.put(cache_key, parser.text)
+                    result = self._parse_response(parser.text)
+                route = self._next_route(route, prompt, result[0], start)
+                if route is None:
+                    return result
+        except Exception as e:
+            return self._error_result(e)
+
+    def _route(self, prompt: str, conversation: Optional[Conversation] = None) -> Route:
+        """Chooses the model of a request: the router's choice, or `model` without a router."""
+        if self.router is None:
+            route = Route("fixed", self.model, self.max_tokens)
+        else:
+            route = self.router.route(prompt, clarification=bool(conversation))
+        self.last_route = route
+        return route
+
+    def _next_route(self, route: Route, prompt: str, confidence: str, start: float) -> Optional[Route]:
+        """Logs a routed answer and returns the route to ask again with, or None to keep the answer."""
+        if self.router is None:
+            return None
+        output_tokens = self.last_usage.output_tokens if self.last_usage else None
+        self.router.record(route, prompt, confidence, time.perf_counter() - start, self.last_from_cache, output_tokens)
+        escalated = self.router.escalation(route, confidence)
+        if escalated is not None:
+            self.last_route = escalated
+        return escalated
+
+    def _parse_response(self, response: str) -> tuple[str, str, str]:
+        """
+        Parse the model's structured response to extract confidence, command, and explanation.
+
+        Returns:
+            tuple: (confidence_level, command, explanation)
+        """
+        try:
+            lines = response.strip().split('\n')
+            confidence = "LOW"
+            command = ""
+            explanation = ""
+
+            for line in lines:
+                line = line.strip()
+                if line.startswith("CONFIDENCE:"):
+                    confidence = line.replace("CONFIDENCE:", "").strip().upper()
+                elif line.startswith("COMMAND:"):
+                    command = line.replace("COMMAND:", "").strip()
+                elif line.startswith("EXPLANATION:"):
+                    explanation = line.replace("EXPLANATION:", "").strip()
+                    # Collect remaining lines as part of explanation
+                    idx = lines.index(line)
+                    if idx < len(lines) - 1:
+                        remaining = '\n'.join(lines[idx+1:]).strip()
+                        if remaining:
+                            explanation += '\n' + remaining
+                    break
+
+            # Validate confidence level
+            if confidence not in ["HIGH", "MEDIUM", "LOW", "NONE", "AGENT"]:
+                confidence = "LOW"
+
+            return (confidence, command, explanation)
+
+        except Exception:
+            # If parsing fails, return the original response as explanation
+            return ("LOW", "", response)
+
+    @abstractmethod
+    def _build_request(self, messages: list[dict], stream: bool = False, route: Optional[Route] = None) -> tuple[dict, dict]:
+        """
+        Build the headers and JSON body of a request to the backend's API.
+
+        `route` gives the model and output budget; `model` and `max_tokens` otherwise.
+        """
+
+    @abstractmethod
+    def _extract_text(self, response: httpx.Response) -> str:
+        """Extract the completion text (and `last_usage`) from a non-streamed response."""
+
+    @abstractmethod
+    def _iter_stream_text(self, response: httpx.Response) -> Iterator[str]:
+        """Yield the text deltas of a streamed response, updating `last_usage`."""
+
+    def _call_api(self, messages: list[dict], route: Optional[Route] = None) -> str:
+        """
+        Make the actual API call.
+        """
+        headers, data = self._build_request(messages, route=route)
+        timers = {}  # One per attempt (and per hedged duplicate)
+
+        def send() -> httpx.Response:
+            timer = RequestTimer()
+            request = self.client.build_request(
+                "POST",
+                self.api_url,
+                headers=headers,
+                json=data,
+                extensions={"trace": timer.trace}
+            )
+            # Retries and hedging act on the response headers; the body is read below
+            response = self.client.send(request, stream=True)
+            timers[response] = timer
+            return response
+
+        try:
+            with closing(send_with_retries(self._hedged(send))) as response:
+                response.read()
+                self.last_timing = timers[response].finish(response)
+                return self._extract_text(response)
+        except httpx.TimeoutException:
+            raise Exception(f"Request to {self.name} API timed out")
+        except httpx.HTTPError as e:
+            raise Exception(f"Network error: {str(e)}")
+
+    async def _acall_api(self, messages: list[dict], route: Optional[Route] = None) -> str:
+        """
+        Make the API call with the async HTTP client.
+        """
+        headers, data = self._build_request(messages, route=route)
+        timers = {}
+        client = self._async_client or get_async_http_client()
+
+        async def send() -> httpx.Response:
+            timer = RequestTimer()
+            request = client.build_request(
+                "POST",
+                self.api_url,
+                headers=headers,
+                json=data,
+                extensions={"trace": timer.atrace}
+            )
+            response = await client.send(request, stream=True)
+            timers[response] = timer
+            return response
+
+        try:
+            response = await asend_with_retries(self._ahedged(send))
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+            self.last_timing = timers[response].finish(response)
+            return self._extract_text(response)
+        except httpx.TimeoutException:
+            raise Exception(f"Request to {self.name} API timed out")
+        except httpx.HTTPError as e:
+            raise Exception(f"Network error: {str(e)}")
+
+    def _stream_api(self, messages: list[dict], route: Optional[Route] = None) -> Iterator[str]:
+        """
+        Make a streaming API call, yielding text deltas as they arrive.
+        """
+        headers, data = self._build_request(messages, stream=True, route=route)
+        timers = {}
+
+        def send() -> httpx.Response:
+            timer = RequestTimer()
+            request = self.client.build_request(
+                "POST",
+                self.api_url,
+                headers=headers,
+                json=data,
+                extensions={"trace": timer.trace}
+            )
+            response = self.client.send(request, stream=True)
+            timers[response] = timer
+            return response
+
+        try:
+            # Only the response headers are retried (or hedged): once text has been yielded, an error is final
+            with closing(send_with_retries(self._hedged(send))) as response:
+                if not response.is_success:
+                    response.read()
+                    raise self._api_error(response)
+
+                yield from self._iter_stream_text(response)
+
+                # Reading the stream to its end returns the connection to the pool
+                self.last_timing = timers[response].finish(response)
+
+        except httpx.TimeoutException:
+            raise Exception(f"Request to {self.name} API timed out")
+        except httpx.HTTPError as e:
+            raise Exception(f"Network error: {str(e)}")
+
+    def _hedged(self, send: Callable[[], httpx.Response]) -> Callable[[], httpx.Response]:
+        """Wraps one HTTP attempt with the hedger, if hedging is enabled."""
+        if self.hedger is None:
+            return send
+        return lambda: self.hedger.send(send)
+
+    def _ahedged(self, send: Callable[[], Awaitable[httpx.Response]]) -> Callable[[], Awaitable[httpx.Response]]:
+        """Async counterpart of `_hedged`."""
+        if self.hedger is None:
+            return send
+        return lambda: self.hedger.asend(send)
+
+    def _api_error(self, response: httpx.Response) -> Exception:
+        """
+        Convert an unsuccessful API response into a readable error.
+        """
+        try:
+            error_data = response.json()
+            error_msg = error_data.get('error', {}).get('message') or response.text
+            return Exception(f"{self.name} API error: {error_msg}")
+        except (ValueError, AttributeError):
+            return Exception(f"{self.name} API error: {response.status_code} - {response.text}")
+
+    def _prepare_messages(self, prompt: str, context: str, conversation: Optional[Conversation] = None) -> list[dict]:
+        """
+        Prepare the messages: the request with its context, then the clarification turns.
+
+        Secrets in the prompt, the context and the user's replies are redacted.
+        In a clarification exchange the context is sent only once, in the first
+        message. Both the context and the latest user turn are prompt cache
+        breakpoints, so each round reads everything before its new reply from
+        the cache.
+        """
+        prompt, context = redact(prompt), redact(context)
+        messages = [{"role": "user", "content": self._prepare_content(prompt, context, cache_context=bool(conversation))}]
+        if conversation:
+            messages.extend(
+                {"role": turn["role"], "content": redact(turn["content"]) if turn["role"] == "user" else turn["content"]}
+                for turn in conversation.turns
+            )
+            last = messages[-1]
+            last["content"] = [{"type": "text", "text": last["content"], "cache_control": PROMPT_CACHE_CONTROL}]
+        return messages
+
+    def _prepare_content(self, prompt: str, context: str, cache_context: bool = False) -> list[dict]:
+        """
+        Prepare the first user message: the context, then the request and instructions.
+
+        The context is its own block so it can be marked as a prompt cache
+        breakpoint (`cache_context`).
+        """
+        context_block = {"type": "text", "text": f"Context:\n{context}\n\n"}
+        if cache_context:
+            context_block["cache_control"] = PROMPT_CACHE_CONTROL
+        request_block = {
+            "type": "text",
+            "text": f"""User Request: {prompt}
+
+Please provide the appropriate command(s) to fulfill this request. Consider the context provided above, especially the recent shell history which shows what the user has been working on recently.""",
+        }
+        return [context_block, request_block]
+
+    def _prepare_prompt(self, prompt: str, context: str) -> str:
+        """
+        Prepare the full prompt with context and specific instructions.
+        """
+        return "".join(block["text"] for block in self._prepare_content(prompt, context))
@@ -1,210 +1,132 @@
-import requests
+import httpx
 import json
-from .base_provider import AIBaseProvider
+from typing import Iterator, Optional
+from .base_provider import TokenUsage
+from .chat import PROMPT_CACHE_CONTROL, SYSTEM_PROMPT, ChatProvider
+from .hedging import Hedger
+from .routing import LARGE_MODEL, ModelRouter, Route
+from ..core.response_cache import ResponseCache
+from .streaming import iter_sse_events
 
+ANTHROPIC_API_URL = "https://api.anthropic.com/v1/messages"
 
-class ClaudeProvider(AIBaseProvider):
+
+class ClaudeProvider(ChatProvider):
     """
     Provider implementation for Anthropic Claude.
     """
 
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.api_url = "https://api.anthropic.com/v1/messages"
-        self.model = "claude-3-5-sonnet-20241022"  # Default model
-        self.max_tokens = 1024  # Reduced from 4096 to save tokens
-
-    def get_suggestion(self, prompt: str, context: str) -> tuple[str, str, str]:
+    name = "Claude"
+
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str = ANTHROPIC_API_URL,
+        cache: Optional[ResponseCache] = None,
+        client: Optional[httpx.Client] = None,
+        async_client: Optional[httpx.AsyncClient] = None,
+        cache_context: bool = False,
+        hedger: Optional[Hedger] = None,
+        router: Optional[ModelRouter] = None,
+    ):
+        """
+        Args:
+            cache: On-disk response cache (identical queries are not sent again).
+            client, async_client: HTTP clients to use instead of the shared ones.
+            cache_context: Also mark the request context as a prompt cache
+                breakpoint. Pays off when the same context is sent several
+                times within minutes; the system prompt is always cached.
+            hedger: Sends a duplicate of requests slower than usual (see `hedging.py`).
+            router: Picks the model of each request (see `routing.py`); without
+                one, every request uses `model` and `max_tokens`.
         """
-        Queries the Claude API to get a command suggestion.
-        
-        Returns:
-            tuple: (confidence_level, command, explanation)
+        super().__init__(api_key, api_url, LARGE_MODEL, cache, client, async_client, hedger, router)
+        self.cache_context = cache_context
+
+    @classmethod
+    def from_config(cls, config: dict, api_key: Optional[str] = None, api_url: Optional[str] = None, **options) -> "ClaudeProvider":
+        """Builds the provider from the configuration (`prompt_cache_context`, hedging and routing keys)."""
+        from .hedging import get_hedger
+        from .routing import get_router
+
+        options.setdefault("cache_context", bool(config.get("prompt_cache_context", False)))
+        return cls(
+            api_key=api_key,
+            api_url=api_url or ANTHROPIC_API_URL,
+            hedger=get_hedger(config),
+            router=get_router(config),
+            **options,
+        )
+
+    def _build_request(self, messages: list[dict], stream: bool = False, route: Optional[Route] = None) -> tuple[dict, dict]:
         """
-        full_prompt = self._prepare_prompt(prompt, context)
+        Build the headers and JSON body for a Messages API request.
 
-        try:
-            response = self._call_claude_api(full_prompt)
-            return self._parse_response(response)
-        except Exception as e:
-            return ("LOW", "", f"❌ Error calling Claude API: {str(e)}\n\n💡 Fallback suggestion: Consider checking the command manually.")
+        `route` gives the model and output budget; `model` and `max_tokens` otherwise.
 
-    def _parse_response(self, response: str) -> tuple[str, str, str]:
-        """
-        Parse Claude's structured response to extract confidence, command, and explanation.
-        
-        Returns:
-            tuple: (confidence_level, command, explanation)
-        """
-        try:
-            lines = response.strip().split('\n')
-            confidence = "LOW"
-            command = ""
-            explanation = ""
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith("CONFIDENCE:"):
-                    confidence = line.replace("CONFIDENCE:", "").strip().upper()
-                elif line.startswith("COMMAND:"):
-                    command = line.replace("COMMAND:", "").strip()
-                elif line.startswith("EXPLANATION:"):
-                    explanation = line.replace("EXPLANATION:", "").strip()
-                    # Collect remaining lines as part of explanation
-                    idx = lines.index(line)
-                    if idx < len(lines) - 1:
-                        remaining = '\n'.join(lines[idx+1:]).strip()
-                        if remaining:
-                            explanation += '\n' + remaining
-                    break
-            
-            # Validate confidence level
-            if confidence not in ["HIGH", "MEDIUM", "LOW", "NONE", "AGENT"]:
-                confidence = "LOW"
-                
-            return (confidence, command, explanation)
-            
-        except Exception:
-            # If parsing fails, return the original response as explanation
-            return ("LOW", "", response)
-
-    def _call_claude_api(self, prompt: str) -> str:
-        """
-        Make the actual API call to Claude.
+        The system prompt is sent as a cached block: it is identical for every
+        request, so after the first call it is read from the API's prompt cache.
         """
         headers = {
             "Content-Type": "application/json",
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01"
         }
-        
-        # Prepare system message for command generation
-        system_message = """You are an expert system administrator helping users with command-line tasks. You must provide accurate, executable commands with a confidence assessment.
-
-CRITICAL: You must respond in this EXACT format:
-
-CONFIDENCE: [HIGH|MEDIUM|LOW|NONE|AGENT]
-COMMAND: [the exact command to execute, or empty if confidence is NONE or AGENT]
-EXPLANATION: [brief explanation, clarifying question, or agent's proposed plan]
-
-CONFIDENCE LEVELS:
-- HIGH: You are 100% certain this is the correct, safe command for the user's request
-- MEDIUM: You are confident but there might be variations or context-specific considerations  
-- LOW: You have suggestions but aren't completely sure or need more context
-- NONE: You do not understand the request, cannot provide a useful command, or the user is asking a question that can be answered directly. Ask a clarifying question or provide a direct answer in the EXPLANATION.
-- AGENT: The request is complex and requires multiple steps (e.g., file creation, multiple commands). Propose a plan in the EXPLANATION.
-
-RESPONSE RULES:
-1. Always start with "CONFIDENCE:" followed by HIGH, MEDIUM, LOW, NONE, or AGENT
-2. Follow with "COMMAND:" and the exact command the user should run. If confidence is NONE or AGENT, this should be empty.
-3. If the user asks a question that can be answered without a command, set CONFIDENCE to NONE and COMMAND to empty, and write the answer in the EXPLANATION.
-4. To request user input for a variable, use the format `{{USER_INPUT:Question for the user}}`. The agent will ask the user for this information.
-5. For file creation, use the format `FILE: path/to/your/file.ext` on a new line, immediately followed by a markdown code block with the file's content.
-6. End with "EXPLANATION:" and a concise explanation. If confidence is NONE, ask a question or provide an answer.
-7. Keep commands simple and directly executable
-8. For HIGH confidence: provide ONE clear command
-9. For MEDIUM/LOW confidence: you can suggest alternatives
-10. Consider the user's shell environment and current directory
-11. For system-level directories (e.g., `/etc`, `C:\\Windows`), always use absolute paths.
-12. CRITICAL FOR POWERSHELL: Paths with special characters (like `$` or spaces) MUST be in SINGLE QUOTES (`'`) to be treated literally. For example, to access the Recycle Bin, the path MUST be `'C:\\$Recycle.Bin'`. Using double quotes (`"`) is INCORRECT and will cause an error. For hidden files, use the `-Force` flag.
-13. Avoid dangerous operations unless explicitly requested
-14. The EXPLANATION must be in the same language as the "User Request".
-
-EXAMPLE (Success):
-CONFIDENCE: HIGH
-COMMAND: ls -la *.txt
-EXPLANATION: Lists all .txt files in the current directory with details.
-
-EXAMPLE (Direct Question):
-CONFIDENCE: NONE
-COMMAND:
-EXPLANATION: Yes, Docker uses runtimes like `runc` by default to run containers. You can inspect the runtime for a specific container using `docker inspect`.
-
-EXAMPLE (French Request):
-CONFIDENCE: HIGH
-COMMAND: ls -l
-EXPLANATION: Liste les fichiers et dossiers du répertoire avec leurs détails.
-
-EXAMPLE (Agent Task):
-CONFIDENCE: AGENT
-COMMAND:
-EXPLANATION: I will create a new Python project. Here is the plan:
-
-First, create the directory structure:
-```bash
-mkdir -p {{USER_INPUT:Enter the project name}}
-```
-
-Next, create the main file.
-FILE: {{USER_INPUT:Enter the project name}}/src/main.py
-```python
-def main():
-    print("Hello, World!")
-
-if __name__ == "__main__":
-    main()
-```
-
-EXAMPLE (Needs clarification):
-CONFIDENCE: NONE
-COMMAND:
-EXPLANATION: I'm not sure what kind of 'cleanup' you're referring to. Could you please specify if you want to remove temporary files, clear a cache, or something else?
-
-The user is working in their current directory context."""
 
         data = {
-            "model": self.model,
-            "max_tokens": self.max_tokens,
-            "system": system_message,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
+            "model": route.model if route else self.model,
+            "max_tokens": route.max_tokens if route else self.max_tokens,
+            "system": [
+                {"type": "text", "text": SYSTEM_PROMPT, "cache_control": PROMPT_CACHE_CONTROL}
+            ],
+            "messages": messages
         }
-        
+        if stream:
+            data["stream"] = True
+
+        return headers, data
+
+    def _extract_text(self, response: httpx.Response) -> str:
+        """
+        Extract the completion text from a (non-streamed) Messages API response.
+        """
+        if not response.is_success:
+            raise self._api_error(response)
+
         try:
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            response.raise_for_status()
             response_data = response.json()
-            
-            # Extract the response content
-            if 'content' in response_data and len(response_data['content']) > 0:
-                return response_data['content'][0]['text']
-            else:
-                return "No response received from Claude API."
-                
-        except requests.exceptions.Timeout:
-            raise Exception("Request to Claude API timed out")
-        except requests.exceptions.RequestException as e:
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_data = e.response.json()
-                    error_msg = error_data.get('error', {}).get('message', str(e))
-                    raise Exception(f"Claude API error: {error_msg}")
-                except:
-                    raise Exception(f"Claude API error: {e.response.status_code} - {e.response.text}")
-            else:
-                raise Exception(f"Network error: {str(e)}")
         except json.JSONDecodeError:
             raise Exception("Invalid JSON response from Claude API")
-        except Exception as e:
-            raise Exception(f"Unexpected error: {str(e)}")
 
-    def _prepare_prompt(self, prompt: str, context: str) -> str:
-        """
-        Prepare the full prompt for Claude with context and specific instructions.
-        """
-        return f"""Context:
-{context}
+        self.last_usage = TokenUsage.from_api(response_data.get('usage'))
 
-User Request: {prompt}
+        # Extract the response content
+        if 'content' in response_data and len(response_data['content']) > 0:
+            return response_data['content'][0]['text']
+        else:
+            return "No response received from Claude API."
 
-Please provide the appropriate command(s) to fulfill this request. Consider the context provided above, especially the recent shell history which shows what the user has been working on recently.""" 
\ No newline at end of file
+    def _iter_stream_text(self, response: httpx.Response) -> Iterator[str]:
+        """
+        Yield the text deltas of a Messages API event stream.
+        """
+        for event, payload in iter_sse_events(response.iter_lines()):
+            if event == "message_start":
+                # Input and cache token counts are final from the start
+                self.last_usage = TokenUsage.from_api(payload.get("message", {}).get("usage"))
+            elif event == "message_delta" and self.last_usage is not None:
+                self.last_usage.output_tokens = payload.get("usage", {}).get("output_tokens", self.last_usage.output_tokens)
+            elif event == "content_block_delta":
+                delta = payload.get("delta", {})
+                if delta.get("type") == "text_delta":
+                    yield delta.get("text", "")
+            elif event == "error":
+                error_msg = payload.get("error", {}).get("message", "unknown error")
+                raise Exception(f"Claude API error: {error_msg}")
+
+    def _prepare_content(self, prompt: str, context: str, cache_context: bool = False) -> list[dict]:
+        """
+        Prepare the first user message, marking the context as a prompt cache
+        breakpoint when `cache_context` was requested for this provider.
+        """
+        return super()._prepare_content(prompt, context, cache_context=self.cache_context or cache_context)
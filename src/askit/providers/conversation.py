@@ -0,0 +1,35 @@
+"""
+Multi-turn clarification exchanges.
+
+When the AI answers with NONE confidence it asks the user a question. Rather
+than appending the answer to the prompt and sending everything again as one
+ever-growing user message, the exchange is kept as alternating turns: the
+first user message carries the context and the request, then each round adds
+the assistant's question and the user's reply. Providers send the turns as
+`messages`, so the unchanged prefix can be served from the prompt cache.
+"""
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Conversation:
+    """
+    The turns that follow the first request, as Messages API messages.
+
+    The first user message (context and request) is built by the provider;
+    `turns` always alternates assistant, user, assistant, user...
+    """
+    turns: list[dict] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.turns)
+
+    def add_clarification(self, confidence: str, command: str, explanation: str, reply: str):
+        """Records the assistant's answer and the user's reply to it."""
+        answer = f"CONFIDENCE: {confidence}\nCOMMAND: {command}\nEXPLANATION: {explanation}"
+        self.turns.append({"role": "assistant", "content": answer})
+        self.turns.append({"role": "user", "content": reply})
+
+    @classmethod
+    def from_turns(cls, turns: list[dict]) -> "Conversation":
+        return cls([{"role": turn["role"], "content": turn["content"]} for turn in turns])
@@ -0,0 +1,117 @@
+"""
+Offline fake backend, for tests, demos and benchmarks.
+
+`provider: fake` answers from a small table of canned answers without any
+network access, after an optional simulated latency (`fake_latency`, in
+seconds). It goes through the same code as the real backends (caching,
+routing, retries, hedging, streaming of the command line): only the HTTP
+transport is replaced, by an `httpx.MockTransport` answering in process.
+"""
+import asyncio
+import httpx
+import json
+import re
+import time
+from typing import Iterator, Optional
+from .base_provider import TokenUsage
+from .chat import SYSTEM_PROMPT, ChatProvider
+from .routing import Route
+from ..core.tokens import estimate_tokens
+
+FAKE_MODEL = "fake"
+FAKE_URL = "http://fake.invalid/v1/answers"
+# Characters per streamed chunk
+CHUNK_SIZE = 8
+
+# (pattern, answer); the first pattern found in the user request wins
+FAKE_ANSWERS = [
+    (r"\b(?:list|show)\b.*\bfiles\b", "CONFIDENCE: HIGH\nCOMMAND: ls -la\nEXPLANATION: Lists the files of the current directory."),
+    (r"\bdisk\b", "CONFIDENCE: HIGH\nCOMMAND: df -h\nEXPLANATION: Shows disk usage per filesystem."),
+    (r"\bmemory\b", "CONFIDENCE: HIGH\nCOMMAND: free -h\nEXPLANATION: Shows memory usage."),
+    (r"\bport\b", "CONFIDENCE: MEDIUM\nCOMMAND: ss -tlnp\nEXPLANATION: Lists listening TCP ports and their processes."),
+    (
+        r"\b(?:create|set ?up)\b.*\bproject\b",
+        "CONFIDENCE: AGENT\nCOMMAND:\nEXPLANATION: I will create the project directory.\n```bash\nmkdir -p project\n```",
+    ),
+]
+DEFAULT_ANSWER = "CONFIDENCE: LOW\nCOMMAND:\nEXPLANATION: The fake backend has no canned answer for this request."
+
+
+class FakeProvider(ChatProvider):
+    """
+    Backend answering from `answers` (a list of (pattern, answer text)) after `latency` seconds.
+    """
+
+    name = "Fake"
+
+    def __init__(self, answers: Optional[list] = None, latency: float = 0.0, **options):
+        options.setdefault("client", httpx.Client(transport=httpx.MockTransport(self._handle)))
+        options.setdefault("async_client", httpx.AsyncClient(transport=httpx.MockTransport(self._ahandle)))
+        super().__init__(None, FAKE_URL, FAKE_MODEL, **options)
+        self.answers = [(re.compile(pattern, re.IGNORECASE), answer) for pattern, answer in (answers or FAKE_ANSWERS)]
+        self.latency = latency
+        self.requests: list[dict] = []  # Every request "sent", for tests
+
+    @classmethod
+    def from_config(cls, config: dict, api_key: Optional[str] = None, api_url: Optional[str] = None, **options) -> "FakeProvider":
+        options.pop("cache_context", None)
+        return cls(latency=float(config.get("fake_latency", 0.0)), **options)
+
+    def _build_request(self, messages: list[dict], stream: bool = False, route: Optional[Route] = None) -> tuple[dict, dict]:
+        data = {
+            "model": route.model if route else self.model,
+            "max_tokens": route.max_tokens if route else self.max_tokens,
+            "messages": messages,
+        }
+        if stream:
+            data["stream"] = True
+        return {"Content-Type": "application/json"}, data
+
+    def _extract_text(self, response: httpx.Response) -> str:
+        if not response.is_success:
+            raise self._api_error(response)
+        payload = response.json()
+        self.last_usage = TokenUsage.from_api(payload.get("usage"))
+        return payload["text"]
+
+    def _iter_stream_text(self, response: httpx.Response) -> Iterator[str]:
+        """The fake stream is one JSON object per line: text chunks, then the usage."""
+        for line in response.iter_lines():
+            if not line:
+                continue
+            payload = json.loads(line)
+            if "usage" in payload:
+                self.last_usage = TokenUsage.from_api(payload["usage"])
+            if payload.get("text"):
+                yield payload["text"]
+
+    def _answer(self, messages: list[dict]) -> tuple[str, dict]:
+        """Returns the canned answer to a request and its (estimated) usage."""
+        # The request is the last block of the first message, or the latest reply in a conversation
+        content = messages[-1]["content"]
+        request = content if isinstance(content, str) else content[-1]["text"]
+        request = request.split("User Request:", 1)[-1].split("\n", 1)[0]
+        answer = next((answer for pattern, answer in self.answers if pattern.search(request)), DEFAULT_ANSWER)
+        usage = {
+            "input_tokens": estimate_tokens(SYSTEM_PROMPT) + sum(estimate_tokens(str(m["content"])) for m in messages),
+            "output_tokens": estimate_tokens(answer),
+        }
+        return answer, usage
+
+    def _respond(self, request: httpx.Request) -> httpx.Response:
+        data = json.loads(request.content)
+        self.requests.append(data)
+        answer, usage = self._answer(data["messages"])
+        if not data.get("stream"):
+            return httpx.Response(200, json={"text": answer, "usage": usage})
+        lines = [json.dumps({"text": answer[start:start + CHUNK_SIZE]}) for start in range(0, len(answer), CHUNK_SIZE)]
+        lines.append(json.dumps({"usage": usage}))
+        return httpx.Response(200, content="\n".join(lines).encode("utf-8"))
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        time.sleep(self.latency)
+        return self._respond(request)
+
+    async def _ahandle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency)
+        return self._respond(request)
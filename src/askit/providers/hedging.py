@@ -0,0 +1,286 @@
+"""
+Hedged requests, to cut tail latency.
+
+An occasional slow upstream response makes the p99 of askit much worse than
+its p50. With hedging enabled (`hedge_requests: true` in the configuration),
+a request that has not received its response headers (its first byte) after
+the `hedge_percentile` of the observed latency is sent a second time, and the
+first of the two to answer is used; the other one is closed (or cancelled).
+
+Observed latencies, also measured up to the response headers (the body of
+a non-streamed request is read after the race), are kept in a small
+log-scale histogram. It is saved in the cache directory every SAVE_INTERVAL
+requests and at exit, so every process benefits from the previous ones.
+Duplicate spend is capped: at most `hedge_max_ratio` of the requests may be
+hedged, and never while the rate limiter would hold a request back.
+"""
+import asyncio
+import atexit
+import json
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .rate_limit import _debug, get_rate_limiter
+
+HISTOGRAM_FILE_NAME = "latency_histogram.json"
+# Buckets grow by 25% from 10 ms: 40 buckets reach about 60 s
+BUCKET_BASE_MS = 10.0
+BUCKET_GROWTH = 1.25
+BUCKET_COUNT = 40
+# Counts are halved past this many samples, so the histogram follows changes
+MAX_SAMPLES = 5000
+DEFAULT_PERCENTILE = 95
+DEFAULT_MAX_RATIO = 0.1
+# No hedging before the histogram has this many samples
+MIN_SAMPLES = 20
+MIN_HEDGE_DELAY = 0.05
+# Requests counted between two saves of the histogram (it is also saved at exit)
+SAVE_INTERVAL = 20
+
+R = TypeVar("R")
+
+
+class LatencyHistogram:
+    """
+    Log-scale histogram of request latencies, with the request and hedge counts
+    used to cap duplicate spend. Saved as JSON in the cache directory.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.buckets = [0] * BUCKET_COUNT
+        self.requests = 0
+        self.hedges = 0
+        self._unsaved = 0  # Requests counted since the last save
+        self._lock = threading.Lock()
+        if path is not None:
+            self._load()
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            buckets = data.get("buckets", [])
+            if len(buckets) == BUCKET_COUNT:
+                self.buckets = [int(n) for n in buckets]
+                self.requests = int(data.get("requests", 0))
+                self.hedges = int(data.get("hedges", 0))
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass  # Start over
+
+    def save(self, min_unsaved: int = 0):
+        """
+        Writes the histogram, unless fewer than `min_unsaved` requests were counted since the last save.
+
+        Each write goes through its own temporary file, so processes and the
+        daemon's threads saving at the same time never mix their data.
+        """
+        if self.path is None:
+            return
+        from ..core.config_manager import ensure_dir, write_file_atomic
+
+        with self._lock:
+            if self._unsaved < min_unsaved:
+                return
+            data = {"buckets": self.buckets, "requests": self.requests, "hedges": self.hedges}
+            self._unsaved = 0
+        try:
+            ensure_dir(self.path.parent)
+            write_file_atomic(self.path, json.dumps(data))
+        except OSError as e:
+            # The histogram is only an optimization: a failed save must not fail the request
+            _debug(f"hedging: cannot save the latency histogram: {e}")
+
+    @staticmethod
+    def _bucket(seconds: float) -> int:
+        ms = max(seconds * 1000, BUCKET_BASE_MS)
+        return min(BUCKET_COUNT - 1, int(math.log(ms / BUCKET_BASE_MS, BUCKET_GROWTH)))
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.buckets[self._bucket(seconds)] += 1
+            if self.count > MAX_SAMPLES:
+                self.buckets = [n // 2 for n in self.buckets]
+
+    def count_request(self, hedged: bool):
+        with self._lock:
+            self.requests += 1
+            self.hedges += hedged
+            self._unsaved += 1
+            if self.requests > MAX_SAMPLES:
+                self.requests //= 2
+                self.hedges //= 2
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound in seconds of the bucket holding the `p`-th percentile, or None without samples."""
+        with self._lock:
+            total = sum(self.buckets)
+            if not total:
+                return None
+            threshold = total * p / 100
+            seen = 0
+            for index, n in enumerate(self.buckets):
+                seen += n
+                if seen >= threshold:
+                    return BUCKET_BASE_MS * BUCKET_GROWTH ** (index + 1) / 1000
+        return None
+
+
+class Hedger:
+    """
+    Sends a duplicate of a request that is slower than usual and keeps the first answer.
+
+    Args:
+        histogram: Observed latencies; every completed attempt is recorded.
+        percentile: Latency percentile after which a request is hedged.
+        max_ratio: Maximum share of requests that may be hedged.
+    """
+
+    def __init__(self, histogram: LatencyHistogram, percentile: float = DEFAULT_PERCENTILE, max_ratio: float = DEFAULT_MAX_RATIO):
+        self.histogram = histogram
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait for the first answer before hedging, or None to never hedge."""
+        if self.max_ratio <= 0 or self.histogram.count < MIN_SAMPLES:
+            return None
+        return max(self.histogram.percentile(self.percentile), MIN_HEDGE_DELAY)
+
+    def _may_hedge(self) -> bool:
+        histogram = self.histogram
+        if histogram.hedges + 1 > self.max_ratio * (histogram.requests + 1):
+            _debug("hedging: duplicate budget spent, waiting for the first request")
+            return False
+        # A duplicate must not add load when the rate limiter is already holding requests
+        return get_rate_limiter().try_acquire()
+
+    def _done(self, hedged: bool):
+        self.histogram.count_request(hedged)
+        self.histogram.save(min_unsaved=SAVE_INTERVAL)
+
+    def send(self, send: Callable[[], R]) -> R:
+        """
+        Runs `send` (one HTTP attempt returning a response whose body is not
+        read yet), hedging it if it is slow.
+        """
+        delay = self.delay()
+        if delay is None:
+            start = time.perf_counter()
+            try:
+                return send()
+            finally:
+                # A failed attempt still counts towards the request total and its save
+                self.histogram.record(time.perf_counter() - start)
+                self._done(hedged=False)
+
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="askit-hedge")
+        try:
+            futures = [pool.submit(self._timed, send)]
+            done, _ = wait(futures, timeout=delay)
+            if not done and self._may_hedge():
+                _debug(f"hedging: no response after {delay * 1000:.0f} ms, sending a duplicate")
+                futures.append(pool.submit(self._timed, send))
+            return self._first(futures)
+        finally:
+            # Do not wait for the loser: it closes its response when it arrives
+            pool.shutdown(wait=False)
+
+    def _timed(self, send: Callable[[], R]) -> R:
+        start = time.perf_counter()
+        response = send()
+        self.histogram.record(time.perf_counter() - start)
+        return response
+
+    def _first(self, futures: list[Future]):
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            answered = [future for future in futures if future in done and future.exception() is None]
+            if answered:
+                winner = answered[0]
+                # The responses are not read yet: close those of the losers
+                for loser in answered[1:]:
+                    loser.result().close()
+                for loser in pending:
+                    loser.add_done_callback(_close_result)
+                if winner is not futures[0]:
+                    _debug("hedging: the duplicate answered first")
+                self._done(hedged=len(futures) > 1)
+                return winner.result()
+            error = error or next(iter(done)).exception()
+        self._done(hedged=len(futures) > 1)
+        raise error
+
+    async def asend(self, send: Callable[[], Awaitable[R]]) -> R:
+        """Async counterpart of `send`: the losing request is cancelled."""
+        async def timed() -> R:
+            start = time.perf_counter()
+            response = await send()
+            self.histogram.record(time.perf_counter() - start)
+            return response
+
+        delay = self.delay()
+        tasks = [asyncio.ensure_future(timed())]
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self._may_hedge():
+                _debug(f"hedging: no response after {delay * 1000:.0f} ms, sending a duplicate")
+                tasks.append(asyncio.ensure_future(timed()))
+
+        pending = set(tasks)
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                answered = [task for task in tasks if task in done and task.exception() is None]
+                if answered:
+                    for loser in answered[1:]:
+                        await loser.result().aclose()
+                    return answered[0].result()
+                error = error or next(iter(done)).exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            self._done(hedged=len(tasks) > 1)
+
+
+def _close_result(future: Future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+_histogram: Optional[LatencyHistogram] = None
+
+
+def get_latency_histogram() -> LatencyHistogram:
+    """Returns the process-wide histogram, loaded from the cache directory."""
+    global _histogram
+
+    if _histogram is None:
+        from ..core.config_manager import get_cache_dir
+
+        _histogram = LatencyHistogram(get_cache_dir() / HISTOGRAM_FILE_NAME)
+        atexit.register(_histogram.save, min_unsaved=1)
+    return _histogram
+
+
+def get_hedger(config: dict) -> Optional[Hedger]:
+    """Returns a hedger if the configuration enables `hedge_requests`, else None."""
+    if not config.get("hedge_requests", False):
+        return None
+    return Hedger(
+        get_latency_histogram(),
+        percentile=float(config.get("hedge_percentile", DEFAULT_PERCENTILE)),
+        max_ratio=float(config.get("hedge_max_ratio", DEFAULT_MAX_RATIO)),
+    )
@@ -0,0 +1,146 @@
+"""
+Process-wide pooled HTTP client shared by all providers.
+
+Every provider call goes through the same keep-alive connection pool, so a
+clarification round or an agent follow-up request reuses the TCP/TLS
+connection opened by the first call instead of paying a new handshake.
+HTTP/2 is negotiated through the `httpx[http2]` dependency; an environment
+installed without `h2` falls back to HTTP/1.1.
+
+Async callers (the agent runtime) get an `httpx.AsyncClient` bound to their
+running event loop through `get_async_http_client()`.
+"""
+import asyncio
+import atexit
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0)
+
+_client: Optional[httpx.Client] = None
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Returns the shared HTTP client, creating it on first use.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.Client(http2=HTTP2_AVAILABLE, timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+    return _client
+
+
+def close_http_client():
+    """Closes the shared HTTP client and its pooled connections."""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+atexit.register(close_http_client)
+
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Returns the async HTTP client for the running event loop.
+
+    An async client cannot outlive its event loop, so a new one is created
+    whenever it is requested from a different loop.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+        _async_client_loop = loop
+    return _async_client
+
+
+async def aclose_http_client():
+    """Closes the async HTTP client of the running event loop, if any."""
+    global _async_client, _async_client_loop
+    if _async_client is not None and _async_client_loop is asyncio.get_running_loop():
+        await _async_client.aclose()
+    _async_client = None
+    _async_client_loop = None
+
+
+@dataclass
+class RequestTiming:
+    """
+    Phase breakdown of one HTTP request, in milliseconds.
+
+    `connect` includes name resolution: the resolver runs inside the TCP
+    connect step of the transport. Both `connect` and `tls` are zero when
+    the request reused a pooled connection.
+    """
+    connect: float = 0.0
+    tls: float = 0.0
+    ttfb: float = 0.0
+    total: float = 0.0
+    http_version: str = ""
+    reused_connection: bool = True
+
+    def format(self) -> str:
+        connection = "reused connection" if self.reused_connection else "new connection"
+        return (
+            f"dns+connect {self.connect:.0f} ms · tls {self.tls:.0f} ms · "
+            f"ttfb {self.ttfb:.0f} ms · total {self.total:.0f} ms "
+            f"({connection}, {self.http_version or 'HTTP'})"
+        )
+
+
+class RequestTimer:
+    """
+    Collects a RequestTiming through the transport's trace hooks.
+
+    Pass `timer.trace` as the request's `trace` extension, then call
+    `finish(response)` once the body has been fully read.
+    """
+
+    def __init__(self):
+        self.timing = RequestTiming()
+        self._start = time.perf_counter()
+        self._phase_start: dict[str, float] = {}
+
+    def _elapsed_ms(self, since: float) -> float:
+        return (time.perf_counter() - since) * 1000
+
+    def trace(self, event_name: str, info: dict):
+        phase, _, stage = event_name.rpartition(".")
+        if stage == "started":
+            self._phase_start[phase] = time.perf_counter()
+            return
+        if stage != "complete" or phase not in self._phase_start:
+            return
+
+        duration = self._elapsed_ms(self._phase_start[phase])
+        if phase == "connection.connect_tcp":
+            self.timing.connect = duration
+            self.timing.reused_connection = False
+        elif phase == "connection.start_tls":
+            self.timing.tls = duration
+        elif phase.endswith("receive_response_headers"):
+            self.timing.ttfb = self._elapsed_ms(self._start)
+
+    async def atrace(self, event_name: str, info: dict):
+        self.trace(event_name, info)
+
+    def finish(self, response: Optional[httpx.Response] = None) -> RequestTiming:
+        self.timing.total = self._elapsed_ms(self._start)
+        if response is not None:
+            self.timing.http_version = response.http_version
+        return self.timing
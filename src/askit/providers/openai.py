@@ -0,0 +1,135 @@
+"""
+Provider for servers speaking the OpenAI chat completions API.
+
+Besides OpenAI itself, local inference servers expose this API: the
+llama.cpp server, vLLM and Ollama all serve `/v1/chat/completions`. Point
+askit at one with:
+
+    provider: openai
+    openai_base_url: http://localhost:8080/v1   # llama.cpp server (the default)
+    openai_model: qwen2.5-coder-7b-instruct      # Ignored by llama.cpp
+
+An API key is only sent when the `OPENAI_API_KEY` environment variable is set;
+local servers do not need one. A single model serves every request: the
+small/large routing tiers are Claude models.
+"""
+import httpx
+import json
+import os
+from typing import Iterator, Optional
+from .base_provider import TokenUsage
+from .chat import SYSTEM_PROMPT, ChatProvider
+from .routing import Route
+from .streaming import iter_sse_events
+
+DEFAULT_BASE_URL = "http://localhost:8080/v1"
+DEFAULT_MODEL = "local-model"
+API_KEY_ENV_VAR = "OPENAI_API_KEY"
+
+
+def _text(content) -> str:
+    """Flattens Messages API content blocks into the plain string chat completions expect."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+def usage_from_api(usage: Optional[dict]) -> TokenUsage:
+    """Converts chat completions usage (cached tokens are part of `prompt_tokens`)."""
+    usage = usage or {}
+    cached = int((usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0)
+    return TokenUsage(
+        input_tokens=int(usage.get("prompt_tokens") or 0) - cached,
+        output_tokens=int(usage.get("completion_tokens") or 0),
+        cache_read_input_tokens=cached,
+    )
+
+
+class OpenAICompatibleProvider(ChatProvider):
+    """
+    Provider for an OpenAI-compatible chat completions endpoint.
+
+    Args:
+        base_url: The server's API root, e.g. `http://localhost:8080/v1`.
+    """
+
+    name = "OpenAI-compatible"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = DEFAULT_BASE_URL, model: str = DEFAULT_MODEL, **options):
+        super().__init__(api_key, base_url.rstrip("/") + "/chat/completions", model, **options)
+
+    @classmethod
+    def from_config(cls, config: dict, api_key: Optional[str] = None, api_url: Optional[str] = None, **options) -> "OpenAICompatibleProvider":
+        """
+        Builds the provider from `openai_base_url` and `openai_model`.
+
+        `api_key` is the Anthropic key of the settings and is not used.
+        """
+        options.pop("cache_context", None)
+        provider = cls(
+            api_key=os.environ.get(API_KEY_ENV_VAR) or None,
+            base_url=config.get("openai_base_url", DEFAULT_BASE_URL),
+            model=config.get("openai_model", DEFAULT_MODEL),
+            **options,
+        )
+        if api_url:
+            provider.api_url = api_url  # The full endpoint, as for the other providers
+        return provider
+
+    def _build_request(self, messages: list[dict], stream: bool = False, route: Optional[Route] = None) -> tuple[dict, dict]:
+        """
+        Build the headers and JSON body for a chat completions request.
+
+        The system prompt is the first message, and content blocks are flattened;
+        servers with prompt caching (vLLM, llama.cpp) reuse the unchanged prefix by themselves.
+        """
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        data = {
+            "model": route.model if route else self.model,
+            "max_tokens": route.max_tokens if route else self.max_tokens,
+            "messages": [{"role": "system", "content": SYSTEM_PROMPT}]
+            + [{"role": message["role"], "content": _text(message["content"])} for message in messages],
+        }
+        if stream:
+            data["stream"] = True
+
+        return headers, data
+
+    def _extract_text(self, response: httpx.Response) -> str:
+        """
+        Extract the completion text from a (non-streamed) chat completions response.
+        """
+        if not response.is_success:
+            raise self._api_error(response)
+
+        try:
+            response_data = response.json()
+        except json.JSONDecodeError:
+            raise Exception(f"Invalid JSON response from {self.name} API")
+
+        self.last_usage = usage_from_api(response_data.get("usage"))
+
+        choices = response_data.get("choices") or []
+        if choices and choices[0].get("message", {}).get("content"):
+            return choices[0]["message"]["content"]
+        return f"No response received from {self.name} API."
+
+    def _iter_stream_text(self, response: httpx.Response) -> Iterator[str]:
+        """
+        Yield the text deltas of a chat completions stream (`data: [DONE]` is skipped as non-JSON).
+        """
+        for _, payload in iter_sse_events(response.iter_lines()):
+            error = payload.get("error")
+            if error:
+                error_msg = error.get("message", "unknown error") if isinstance(error, dict) else str(error)
+                raise Exception(f"{self.name} API error: {error_msg}")
+            # Servers that report usage do it in the last chunk
+            if payload.get("usage"):
+                self.last_usage = usage_from_api(payload["usage"])
+            for choice in payload.get("choices") or []:
+                text = (choice.get("delta") or {}).get("content")
+                if text:
+                    yield text
@@ -0,0 +1,254 @@
+"""
+Client-side rate limiting and retries for API calls.
+
+When many people share one organization key, a burst of requests (an
+incident, a batch run) hits the rate limit and every call fails at once.
+Two mechanisms prevent that:
+
+- `AdaptiveRateLimiter`, a token bucket over requests fed by the
+  `anthropic-ratelimit-*` response headers: its capacity and refill rate
+  follow the advertised per-minute limit, and it holds requests back until
+  the advertised reset time when a request or token limit is exhausted, or
+  for the `retry-after` delay after a 429.
+- `send_with_retries()` / `asend_with_retries()`, which retry rate-limited,
+  overloaded (529) and 5xx responses as well as connection failures, with
+  full-jitter exponential backoff (or the server's `retry-after`). The
+  API's `x-should-retry` header overrides the status: `false` prevents a
+  retry and `true` forces one.
+
+The limiter is process-wide, so the interactive path, the agent runtime,
+batch mode and the daemon's request threads all share it. Set
+`ASKIT_DEBUG=1` to print its decisions on stderr.
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+DEBUG_ENV_VAR = "ASKIT_DEBUG"
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # Seconds, doubled at each attempt
+BACKOFF_CAP = 20.0
+# Never wait longer than this for a single request, whatever the server says
+MAX_WAIT = 60.0
+# Limits advertised by the API, e.g. anthropic-ratelimit-input-tokens-remaining
+RATE_LIMIT_PREFIX = "anthropic-ratelimit-"
+RATE_LIMIT_KINDS = ("requests", "tokens", "input-tokens", "output-tokens")
+# Rate limits are per minute
+LIMIT_WINDOW = 60.0
+
+
+def _debug(message: str):
+    if os.environ.get(DEBUG_ENV_VAR):
+        print(f"[DEBUG] {message}", file=sys.stderr)
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Converts an RFC 3339 reset time into seconds from now."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() - time.time()
+    except ValueError:
+        return None
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket over requests, adjusted from the rate limit headers of each response.
+
+    Until a response advertises a limit, requests are not held back.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.capacity: Optional[float] = None  # Requests per window
+        self.tokens = 0.0
+        self.refill_rate = 0.0  # Requests per second
+        self._updated_at = clock()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        if self.capacity is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        """Takes a request slot and returns how long to wait before sending it."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            wait = max(0.0, self.blocked_until - now)
+            if self.capacity is not None:
+                self.tokens -= 1
+                if self.tokens < 0 and self.refill_rate > 0:
+                    wait = max(wait, -self.tokens / self.refill_rate)
+            wait = min(wait, MAX_WAIT)
+        if wait > 0:
+            _debug(f"rate limiter: waiting {wait:.2f}s before sending ({self.tokens:.1f} request slots left)")
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Takes a request slot only if one is free right now."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now < self.blocked_until or (self.capacity is not None and self.tokens < 1):
+                return False
+            if self.capacity is not None:
+                self.tokens -= 1
+            return True
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def update(self, headers: httpx.Headers, status: int):
+        """Learns the current limits from a response."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+
+            limit = headers.get(f"{RATE_LIMIT_PREFIX}requests-limit")
+            remaining = headers.get(f"{RATE_LIMIT_PREFIX}requests-remaining")
+            if limit and remaining:
+                try:
+                    self.capacity = float(limit)
+                    self.refill_rate = self.capacity / LIMIT_WINDOW
+                    # The server's count wins over the local estimate
+                    self.tokens = float(remaining)
+                except ValueError:
+                    pass
+
+            # An exhausted limit of any kind blocks until it resets
+            for kind in RATE_LIMIT_KINDS:
+                if headers.get(f"{RATE_LIMIT_PREFIX}{kind}-remaining") == "0":
+                    reset = _parse_reset(headers.get(f"{RATE_LIMIT_PREFIX}{kind}-reset"))
+                    if reset is not None and reset > 0:
+                        self._block(now + min(reset, MAX_WAIT), f"{kind} limit exhausted")
+
+            retry_after = _parse_retry_after(headers.get("retry-after"))
+            if status == 429 and retry_after is not None:
+                self._block(now + min(retry_after, MAX_WAIT), "429 retry-after")
+
+    def _block(self, until: float, reason: str):
+        if until > self.blocked_until:
+            self.blocked_until = until
+            _debug(f"rate limiter: holding requests for {until - self._clock():.2f}s ({reason})")
+
+
+_limiter = AdaptiveRateLimiter()
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Returns the process-wide rate limiter."""
+    return _limiter
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Delay before retry number `attempt` (0-based): the server's `retry-after`
+    when given, otherwise full jitter over an exponentially growing window.
+    """
+    if retry_after is not None:
+        return min(retry_after, MAX_WAIT)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _should_retry(response: httpx.Response, attempt: int) -> Optional[float]:
+    """Returns the delay before retrying `response`, or None to keep it."""
+    if response.is_success or attempt >= MAX_RETRIES:
+        return None
+    # x-should-retry lets the API veto a retry, or force one whatever the status
+    should_retry = response.headers.get("x-should-retry")
+    if should_retry == "false":
+        return None
+    if should_retry != "true" and response.status_code not in RETRYABLE_STATUS:
+        return None
+    delay = backoff_delay(attempt, _parse_retry_after(response.headers.get("retry-after")))
+    _debug(f"HTTP {response.status_code}: retry {attempt + 1}/{MAX_RETRIES} in {delay:.2f}s")
+    return delay
+
+
+def send_with_retries(send: Callable[[], httpx.Response], limiter: Optional[AdaptiveRateLimiter] = None) -> httpx.Response:
+    """
+    Sends a request through the rate limiter, retrying transient failures.
+
+    `send` performs one attempt; a streamed response must not have been read yet.
+    The last response is returned whatever its status; connection errors are
+    raised once the retries are spent.
+    """
+    limiter = limiter or _limiter
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            response = send()
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            _debug(f"{type(e).__name__}: retry {attempt + 1}/{MAX_RETRIES} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        limiter.update(response.headers, response.status_code)
+        delay = _should_retry(response, attempt)
+        if delay is None:
+            return response
+        # Read the (small) error body so the connection goes back to the pool
+        response.read()
+        response.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+async def asend_with_retries(
+    send: Callable[[], Awaitable[httpx.Response]], limiter: Optional[AdaptiveRateLimiter] = None
+) -> httpx.Response:
+    """Async counterpart of `send_with_retries`."""
+    limiter = limiter or _limiter
+    attempt = 0
+    while True:
+        await limiter.aacquire()
+        try:
+            response = await send()
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            _debug(f"{type(e).__name__}: retry {attempt + 1}/{MAX_RETRIES} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+
+        limiter.update(response.headers, response.status_code)
+        delay = _should_retry(response, attempt)
+        if delay is None:
+            return response
+        await response.aread()
+        await response.aclose()
+        await asyncio.sleep(delay)
+        attempt += 1
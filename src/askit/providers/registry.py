@@ -0,0 +1,64 @@
+"""
+Registry of the AI backends, selected with the `provider` configuration key.
+
+    provider: claude   # Anthropic Messages API (the default)
+    provider: openai   # OpenAI-compatible server: llama.cpp, vLLM, Ollama...
+    provider: fake     # Canned offline answers
+
+Every backend implements the same `(confidence, command, explanation)`
+contract of `AIBaseProvider`. Backend modules are imported only when
+selected, so an unused backend costs nothing at startup.
+"""
+import importlib
+from dataclasses import dataclass
+from typing import Optional
+
+from .base_provider import AIBaseProvider
+
+DEFAULT_PROVIDER = "claude"
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    module: str  # Relative to this package
+    class_name: str
+    needs_api_key: bool  # The Anthropic API key of the settings
+    description: str
+
+
+PROVIDERS = {
+    "claude": ProviderSpec("claude", "ClaudeProvider", True, "Anthropic Claude (Messages API)"),
+    "openai": ProviderSpec("openai", "OpenAICompatibleProvider", False, "OpenAI-compatible chat completions (llama.cpp, vLLM, Ollama)"),
+    "fake": ProviderSpec("fake", "FakeProvider", False, "Canned offline answers, for tests and benchmarks"),
+}
+
+
+def get_provider_spec(config: dict) -> ProviderSpec:
+    """
+    Returns the backend selected by the configuration.
+
+    Raises:
+        ValueError: If `provider` names no registered backend.
+    """
+    name = str(config.get("provider") or DEFAULT_PROVIDER).lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown provider {name!r} (available: {', '.join(PROVIDERS)})")
+    return PROVIDERS[name]
+
+
+def create_provider(config: dict, api_key: Optional[str] = None, **options) -> AIBaseProvider:
+    """
+    Creates the backend selected by the configuration.
+
+    Args:
+        api_key: The Anthropic API key of the settings, for the backends that need it.
+        options: Passed to the provider's `from_config()` (`cache`, `cache_context`, `api_url`...).
+
+    Raises:
+        ValueError: On an unknown provider, or a missing API key.
+    """
+    spec = get_provider_spec(config)
+    if spec.needs_api_key and not api_key:
+        raise ValueError("API key not found. Run `askit-cli config` to set it.")
+    module = importlib.import_module(f".{spec.module}", __package__)
+    return getattr(module, spec.class_name).from_config(config, api_key=api_key, **options)
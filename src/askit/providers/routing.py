@@ -0,0 +1,183 @@
+"""
+Model routing: a small, fast model for simple requests, a larger one for the rest.
+
+"list files" does not need the model that writes a multi-file agent plan.
+`ModelRouter` classifies each prompt locally, with a few cheap heuristics
+(its length, keywords announcing a plan or several steps, references to the
+shell history or a clarification round), and picks a model and an output
+token budget for it. A request routed to the small model is asked again with
+the large model when the answer is not good enough: LOW or NONE confidence,
+or an AGENT plan, which the large model writes.
+
+Routing is off by default, so a user who chose the large model is never
+silently answered by the small one; `model_routing: true` in the
+configuration turns it on. Every routed answer is appended to `routing.jsonl` in
+the logs directory (features, model, confidence, escalation, latency; never
+the prompt itself), so the thresholds can be tuned on real traffic.
+"""
+import json
+import re
+import time
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import List, Optional
+
+from ..core.tokens import estimate_tokens
+from .rate_limit import _debug
+
+SMALL_MODEL = "claude-3-5-haiku-20241022"
+LARGE_MODEL = "claude-3-5-sonnet-20241022"
+# A command and a one-line explanation fit well within this
+SMALL_MAX_TOKENS = 512
+LARGE_MAX_TOKENS = 1024
+# Agent plans carry file contents
+PLAN_MAX_TOKENS = 2048
+# Prompts longer than this (estimated tokens) go to the large model
+MAX_SMALL_PROMPT_TOKENS = 30
+# Answers from the small model that are asked again with the large one
+ESCALATE_ON = ("LOW", "NONE", "AGENT")
+
+ROUTING_LOG_NAME = "routing.jsonl"
+# The log is rotated (one previous file kept) past this size
+MAX_LOG_BYTES = 1_000_000
+
+_PLAN_RE = re.compile(
+    r"\b(?:create|set ?up|install|configure|deploy|migrate|refactor|scaffold|generate|write|build|automate"
+    r"|convert|script|project|workflow|pipeline|cron|service|dockerfile)\b",
+    re.IGNORECASE,
+)
+_STEP_RE = re.compile(r"\b(?:then|after that|afterwards|and also|finally|each|every)\b|[;,]", re.IGNORECASE)
+_HISTORY_RE = re.compile(
+    r"\b(?:again|previous|last (?:command|one)|that (?:command|error)|the error|it failed|fix (?:it|this|that)|same)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class Route:
+    """The model and output budget chosen for one request, and why."""
+    tier: str  # "small", "large" or "fixed" (no router)
+    model: str
+    max_tokens: int
+    reasons: tuple = ()
+    escalated: bool = False
+
+    def format(self) -> str:
+        text = f"{self.tier} model {self.model} (max {self.max_tokens} tokens)"
+        if self.escalated:
+            text += ", escalated"
+        return f"{text}: {', '.join(self.reasons)}" if self.reasons else text
+
+
+@dataclass
+class PromptFeatures:
+    """What the router looks at in a request."""
+    prompt_tokens: int
+    plan_words: List[str] = field(default_factory=list)
+    steps: int = 0
+    history_reference: bool = False
+    clarification: bool = False
+
+    @classmethod
+    def of(cls, prompt: str, clarification: bool = False) -> "PromptFeatures":
+        return cls(
+            prompt_tokens=estimate_tokens(prompt),
+            plan_words=sorted({word.lower() for word in _PLAN_RE.findall(prompt)}),
+            steps=len(_STEP_RE.findall(prompt)),
+            history_reference=bool(_HISTORY_RE.search(prompt)),
+            clarification=clarification,
+        )
+
+
+class ModelRouter:
+    """
+    Picks the model for each request from its `PromptFeatures`.
+
+    Args:
+        small_model, large_model: Model names of the two tiers.
+        max_small_prompt_tokens: Longer prompts go to the large model.
+        log_path: JSONL file receiving every routed answer (None to not log).
+    """
+
+    def __init__(
+        self,
+        small_model: str = SMALL_MODEL,
+        large_model: str = LARGE_MODEL,
+        max_small_prompt_tokens: int = MAX_SMALL_PROMPT_TOKENS,
+        log_path: Optional[Path] = None,
+    ):
+        self.small_model = small_model
+        self.large_model = large_model
+        self.max_small_prompt_tokens = max_small_prompt_tokens
+        self.log_path = log_path
+
+    def route(self, prompt: str, clarification: bool = False) -> Route:
+        """Chooses the model for `prompt`; `clarification` is True for a follow-up round."""
+        features = PromptFeatures.of(prompt, clarification)
+        reasons = []
+        if features.clarification:
+            reasons.append("clarification round")
+        if features.prompt_tokens > self.max_small_prompt_tokens:
+            reasons.append(f"long prompt ({features.prompt_tokens} tokens)")
+        if features.plan_words:
+            reasons.append(f"plan ({', '.join(features.plan_words)})")
+        if features.steps >= 2:
+            reasons.append(f"{features.steps} steps")
+        if features.history_reference:
+            reasons.append("refers to the history")
+
+        if not reasons:
+            route = Route("small", self.small_model, SMALL_MAX_TOKENS, (f"short prompt ({features.prompt_tokens} tokens)",))
+        else:
+            max_tokens = PLAN_MAX_TOKENS if features.plan_words else LARGE_MAX_TOKENS
+            route = Route("large", self.large_model, max_tokens, tuple(reasons))
+        _debug(f"routing: {route.format()}")
+        return route
+
+    def escalation(self, route: Route, confidence: str) -> Optional[Route]:
+        """Returns the route to ask again with after an answer of `confidence`, or None to keep it."""
+        if route.tier != "small" or confidence not in ESCALATE_ON:
+            return None
+        max_tokens = PLAN_MAX_TOKENS if confidence == "AGENT" else LARGE_MAX_TOKENS
+        escalated = Route("large", self.large_model, max_tokens, route.reasons + (f"small model answered {confidence}",), escalated=True)
+        _debug(f"routing: {escalated.format()}")
+        return escalated
+
+    def record(self, route: Route, prompt: str, confidence: str, latency: float, from_cache: bool, output_tokens: Optional[int]):
+        """Appends one routed answer to the routing log."""
+        if self.log_path is None:
+            return
+        entry = {
+            "time": round(time.time(), 3),
+            **asdict(replace(route, reasons=list(route.reasons))),
+            **asdict(PromptFeatures.of(prompt)),
+            "confidence": confidence,
+            "latency": round(latency, 3),
+            "from_cache": from_cache,
+            "output_tokens": output_tokens,
+        }
+        del entry["clarification"]  # Already among the reasons
+        from ..core.config_manager import ensure_dir
+
+        try:
+            ensure_dir(self.log_path.parent)
+            if self.log_path.exists() and self.log_path.stat().st_size > MAX_LOG_BYTES:
+                self.log_path.replace(self.log_path.with_suffix(".jsonl.1"))
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError:
+            pass  # Routing works without its log
+
+
+def get_router(config: dict) -> Optional[ModelRouter]:
+    """Returns a router if the configuration sets `model_routing: true`."""
+    if not config.get("model_routing", False):
+        return None
+    from ..core.config_manager import get_logs_dir
+
+    return ModelRouter(
+        small_model=config.get("small_model", SMALL_MODEL),
+        large_model=config.get("large_model", LARGE_MODEL),
+        max_small_prompt_tokens=int(config.get("routing_max_prompt_tokens", MAX_SMALL_PROMPT_TOKENS)),
+        log_path=get_logs_dir() / ROUTING_LOG_NAME,
+    )
@@ -0,0 +1,102 @@
+"""
+Helpers for consuming streamed (Server-Sent Events) completions.
+"""
+import json
+from typing import Iterable, Iterator, Optional, Tuple
+
+VALID_CONFIDENCE_LEVELS = ["HIGH", "MEDIUM", "LOW", "NONE", "AGENT"]
+
+
+def iter_sse_events(lines: Iterable[str]) -> Iterator[Tuple[str, dict]]:
+    """
+    Groups raw SSE lines into (event, data) pairs.
+
+    Events without a JSON payload are skipped; the event name falls back to the
+    payload's "type" field when the server omits the `event:` line.
+    """
+    event = None
+    data_lines = []
+
+    for line in lines:
+        if line is None:
+            continue
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        line = line.rstrip("\r")
+
+        if not line:
+            # A blank line terminates the current event
+            if data_lines:
+                try:
+                    payload = json.loads("\n".join(data_lines))
+                except json.JSONDecodeError:
+                    payload = None
+                if isinstance(payload, dict):
+                    yield (event or payload.get("type", ""), payload)
+            event = None
+            data_lines = []
+        elif line.startswith(":"):
+            continue  # SSE comment / keep-alive
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+
+    if data_lines:
+        try:
+            payload = json.loads("\n".join(data_lines))
+            if isinstance(payload, dict):
+                yield (event or payload.get("type", ""), payload)
+        except json.JSONDecodeError:
+            pass
+
+
+class StreamingResponseParser:
+    """
+    Incrementally parses the CONFIDENCE/COMMAND/EXPLANATION response format.
+
+    Text deltas are fed as they arrive. As soon as the CONFIDENCE and COMMAND
+    lines are complete the header is considered ready, which lets the caller
+    display the command while the explanation is still being generated.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.confidence: Optional[str] = None
+        self.command: Optional[str] = None
+        self.in_explanation = False
+        self._pending = ""
+        self._header_reported = False
+
+    @property
+    def header_ready(self) -> bool:
+        return self.confidence is not None and (self.command is not None or self.in_explanation)
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Consumes a text delta.
+
+        Returns:
+            True exactly once: on the chunk that completes the response header.
+        """
+        self.text += chunk
+        if not self.in_explanation:
+            self._pending += chunk
+            while "\n" in self._pending and not self.in_explanation:
+                line, self._pending = self._pending.split("\n", 1)
+                self._consume_line(line.strip())
+
+        if self.header_ready and not self._header_reported:
+            self._header_reported = True
+            return True
+        return False
+
+    def _consume_line(self, line: str):
+        if line.startswith("CONFIDENCE:"):
+            confidence = line.replace("CONFIDENCE:", "").strip().upper()
+            self.confidence = confidence if confidence in VALID_CONFIDENCE_LEVELS else "LOW"
+        elif line.startswith("COMMAND:"):
+            self.command = line.replace("COMMAND:", "").strip()
+        elif line.startswith("EXPLANATION:"):
+            self.in_explanation = True
+            self._pending = ""
@@ -0,0 +1,133 @@
+"""
+Secret redaction for everything sent to the AI.
+
+Shell history regularly contains credentials: `export AWS_SECRET_ACCESS_KEY=...`,
+`mysql -uroot -p...`, `curl -H 'Authorization: Bearer ...'`. Before a request
+leaves the machine, the prompt, the context and the clarification replies go
+through `redact()`, which replaces each secret value by `[REDACTED]` and keeps
+the surrounding text so the command still makes sense to the model.
+
+All detectors are compiled into one regular expression and the text is scanned
+in a single pass. To keep that pass well under a millisecond for a normal
+context, every detector starts with a plain character or character class, so
+the regex engine rejects it at a given position with a single comparison;
+word boundaries are checked with a lookbehind after that first character.
+A detector may wrap the secret in a `value` group, keeping the text around
+it (the variable name, the option); otherwise the whole match is the secret.
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+REDACTED = "[REDACTED]"
+
+# Characters a secret value is made of when it is not quoted
+_VALUE = r"[^\s'\"`;&|]+"
+# Words whose assignment (`FOO_PASSWORD=...`, `api_key: ...`) holds a secret
+_SECRET_WORDS = ["password", "passwd", "secret", "token", "api_key", "apikey", "access_key", "private_key", "credential"]
+
+
+def _starting(word: str) -> str:
+    """Matches `word` case-insensitively, starting with a character class the engine can test at once."""
+    first = word[0]
+    return f"[{first.upper()}{first.lower()}](?i:{re.escape(word[1:])})"
+
+
+@dataclass(frozen=True)
+class Detector:
+    name: str
+    pattern: str  # Must start with a plain character or class; may contain a `(?P<value>...)` group
+
+
+DETECTORS: List[Detector] = [
+    Detector("private_key", r"-----BEGIN (?:[A-Z]+ )*PRIVATE KEY-----[\s\S]*?(?:-----END (?:[A-Z]+ )*PRIVATE KEY-----|$)"),
+    Detector("aws_access_key_id", r"A(?<!\wA)(?:KIA|SIA)[0-9A-Z]{16}\b"),
+    Detector("github_token", r"g(?<!\wg)(?:h[pousr]_[A-Za-z0-9]{36,255}|ithub_pat_[A-Za-z0-9_]{22,255})"),
+    Detector("anthropic_or_openai_key", r"s(?<![\w-]s)k-(?:ant-|proj-)?[A-Za-z0-9_-]{20,}"),
+    Detector("slack_token", r"x(?<![\w-]x)ox[abposr]-[A-Za-z0-9-]{10,}"),
+    Detector("google_api_key", r"A(?<!\wA)Iza[0-9A-Za-z_-]{35}"),
+    Detector("stripe_key", r"[rs](?<!\w[rs])k_(?:live|test)_[0-9A-Za-z]{16,}"),
+    Detector("jwt", r"e(?<![\w-]e)yJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}"),
+    Detector(
+        "authorization_header",
+        _starting("authorization") + r":\s*(?:(?i:bearer|basic|token)\s+)?(?P<value>[^\s'\"]+)",
+    ),
+    Detector("bearer_token", r"[Bb](?<!\w[Bb])earer\s+(?P<value>[A-Za-z0-9._~+/=-]{8,})"),
+    Detector("url_credentials", r"://[^/\s:@'\"]+:(?P<value>[^\s/@'\"]+)(?=@)"),
+    Detector("mysql_password", r"m(?<!\wm)ysql(?:dump|admin)?\b[^\n;&|]*?\s-p(?P<value>[^\s'\"`;&|-][^\s'\"`;&|]*)"),
+    Detector(
+        "secret_option",
+        r"-(?<![\w-]-)-?(?i:password|passwd|pass|token|secret|api-?key|access-?key|client-?secret)(?:=|\s+)"
+        r"(?P<value>" + _VALUE + ")",
+    ),
+    # One alternative per word: a nested alternation would not be rejected at once
+    *(
+        Detector("secret_assignment", _starting(word) + r"[A-Za-z0-9_]*\s*[=:]\s*['\"]?(?P<value>" + _VALUE + ")")
+        for word in _SECRET_WORDS
+    ),
+]
+
+
+@dataclass(frozen=True)
+class Finding:
+    detector: str
+    start: int  # Span of the secret value in the scanned text
+    end: int
+
+
+class SecretScanner:
+    """One compiled regular expression matching any of `detectors`."""
+
+    def __init__(self, detectors: Iterable[Detector] = DETECTORS):
+        self.detectors = list(detectors)
+        alternatives = []
+        for index, detector in enumerate(self.detectors):
+            # Group names must be unique in the combined expression. The empty
+            # `d<index>` group closes last, so `lastgroup` names the detector
+            # without wrapping it in a group, which would defeat the fast rejection.
+            pattern = detector.pattern.replace("(?P<value>", f"(?P<v{index}>")
+            alternatives.append(f"{pattern}(?P<d{index}>)")
+        self._regex = re.compile("|".join(alternatives))
+        self._value_groups = [f"v{index}" if "(?P<value>" in d.pattern else 0 for index, d in enumerate(self.detectors)]
+
+    def _finding(self, match: re.Match) -> Finding:
+        index = int(match.lastgroup[1:])
+        start, end = match.span(self._value_groups[index])
+        return Finding(self.detectors[index].name, start, end)
+
+    def scan(self, text: str) -> Iterator[Finding]:
+        """Yields the secrets found in `text`."""
+        for match in self._regex.finditer(text):
+            yield self._finding(match)
+
+    def redact(self, text: str, findings: Optional[list] = None) -> str:
+        """Returns `text` with every secret value replaced; appends them to `findings` if given."""
+        def replace(match: re.Match) -> str:
+            finding = self._finding(match)
+            if findings is not None:
+                findings.append(finding)
+            return text[match.start():finding.start] + REDACTED + text[finding.end:match.end()]
+
+        return self._regex.sub(replace, text)
+
+    def redact_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """Streams `lines` through `redact()`, one at a time."""
+        for line in lines:
+            yield self.redact(line)
+
+
+_default_scanner: Optional[SecretScanner] = None
+
+
+def get_scanner() -> SecretScanner:
+    """Returns the process-wide scanner over DETECTORS, compiled on first use."""
+    global _default_scanner
+
+    if _default_scanner is None:
+        _default_scanner = SecretScanner()
+    return _default_scanner
+
+
+def redact(text: str) -> str:
+    """Replaces every secret found in `text` by `[REDACTED]`."""
+    return get_scanner().redact(text)
@@ -21,15 +21,22 @@ def set_api_key(api_key: str) -> bool:
     """
     try:
         keyring.set_password(SERVICE_NAME, API_KEY_USERNAME, api_key)
-        return True
     except keyring.errors.NoKeyringError:
         # Handle the case where no keychain is available
         return False
 
+    # The settings snapshot caches the key: make it look it up again
+    from ..core.settings import invalidate_settings
+    invalidate_settings()
+    return True
+
 def get_api_key() -> str | None:
     """
     Retrieves the API key from the OS keychain.
 
+    Most callers should use `core.settings.get_settings()` instead, which caches
+    this lookup and gives precedence to the ANTHROPIC_API_KEY environment variable.
+
     Returns:
         The API key if found, otherwise None.
     """
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from stub_server import StubServer
+
+from askit.core import project, settings
+
+
+@pytest.fixture
+def stub_server():
+    """A local Messages API stub, started for the duration of one test."""
+    server = StubServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def isolated_settings(tmp_path, monkeypatch):
+    """A fresh settings snapshot reading its global config from a temporary file."""
+    config_file = tmp_path / "config.yaml"
+    monkeypatch.setattr(settings, "get_config_file", lambda: config_file)
+    monkeypatch.setattr(settings, "_dotenv_loaded", True)
+    monkeypatch.delenv(settings.API_KEY_ENV_VAR, raising=False)
+    monkeypatch.setattr(project, "_hints_file", lambda: tmp_path / "project_roots.json")
+    monkeypatch.setattr(project, "_root_cache", {})
+    settings.invalidate_settings()
+    yield config_file
+    settings.invalidate_settings()
@@ -0,0 +1,228 @@
+"""
+Local stub of the Anthropic Messages API used by the provider tests.
+
+The stub serves scripted responses in order (falling back to a default one),
+either as a plain JSON body or as a Server-Sent Events stream when the request
+sets `"stream": true`. Every request body is recorded so tests can assert on
+what the provider actually sent. Requests to `/v1/chat/completions`
+(`openai_base_url`) are answered in the OpenAI chat completions format instead.
+
+Usage fields mimic prompt caching: the prefix of a request up to its last
+`cache_control` block is reported as `cache_creation_input_tokens` the first
+time it is seen and as `cache_read_input_tokens` afterwards (one token per
+four characters).
+"""
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+@dataclass
+class StubResponse:
+    text: str = "CONFIDENCE: HIGH\nCOMMAND: ls -la\nEXPLANATION: Lists files."
+    status: int = 200
+    headers: dict = field(default_factory=dict)
+    delay: float = 0.0
+    chunk_size: int = 8
+    chunk_delay: float = 0.0
+    usage: Optional[dict] = None  # Computed from the request when not scripted
+
+
+class StubServer:
+    """Threaded HTTP server impersonating the Messages API on localhost."""
+
+    def __init__(self):
+        self.requests: list[dict] = []
+        self.responses: list[StubResponse] = []
+        self.default = StubResponse()
+        self.cached_prefixes: set[str] = set()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/messages"
+
+    @property
+    def openai_base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def enqueue(self, **kwargs) -> StubResponse:
+        response = StubResponse(**kwargs)
+        with self._lock:
+            self.responses.append(response)
+        return response
+
+    def next_response(self) -> StubResponse:
+        with self._lock:
+            return self.responses.pop(0) if self.responses else self.default
+
+    def usage_for(self, body: dict, response: StubResponse) -> dict:
+        """Token usage of a request, with prompt caching applied to its marked prefix."""
+        if response.usage is not None:
+            return dict(response.usage)
+
+        blocks = _blocks(body.get("system"))
+        for message in body.get("messages", []):
+            blocks.extend(_blocks(message.get("content")))
+        # Every breakpoint closes a cacheable prefix; the longest one already seen is read
+        prefixes = ["".join(block.get("text", "") for block in blocks[:i + 1])
+                    for i, block in enumerate(blocks) if block.get("cache_control")]
+        total = sum(len(block.get("text", "")) for block in blocks) // 4
+
+        usage = {"input_tokens": total, "output_tokens": len(response.text) // 4,
+                 "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        if prefixes:
+            with self._lock:
+                hits = [p for p in prefixes if p in self.cached_prefixes]
+                self.cached_prefixes.update(prefixes)
+            read = len(hits[-1]) // 4 if hits else 0
+            usage["cache_read_input_tokens"] = read
+            usage["cache_creation_input_tokens"] = len(prefixes[-1]) // 4 - read
+            usage["input_tokens"] = total - len(prefixes[-1]) // 4
+        return usage
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def _blocks(content) -> list[dict]:
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    return list(content or [])
+
+
+def _sse(event: str, payload: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+def _make_handler(server: StubServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Streamed chunks are small writes: do not let Nagle hold them back
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            try:
+                self._answer()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client gave up on this request (e.g. a hedged duplicate lost)
+
+        def _answer(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            with server._lock:
+                server.requests.append({"path": self.path, "headers": dict(self.headers), "body": body})
+
+            response = server.next_response()
+            if response.delay:
+                time.sleep(response.delay)
+
+            if response.status != 200:
+                self._send_json(response, {"type": "error", "error": {"type": "api_error", "message": response.text}})
+            elif self.path.endswith("/chat/completions"):
+                self._send_chat_completion(response, body)
+            elif body.get("stream"):
+                self._send_stream(response, server.usage_for(body, response))
+            else:
+                self._send_json(response, {
+                    "type": "message",
+                    "role": "assistant",
+                    "content": [{"type": "text", "text": response.text}],
+                    "usage": server.usage_for(body, response),
+                })
+
+        def _send_chat_completion(self, response: StubResponse, body: dict):
+            prompt_tokens = sum(len(message.get("content", "")) for message in body.get("messages", [])) // 4
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(response.text) // 4}
+            if not body.get("stream"):
+                self._send_json(response, {
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": response.text}, "finish_reason": "stop"}],
+                    "usage": usage,
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            text = response.text
+            for start in range(0, len(text), response.chunk_size):
+                chunk = {"object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": text[start:start + response.chunk_size]}}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if response.chunk_delay:
+                    time.sleep(response.chunk_delay)
+            last = {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+            self._write_chunk(f"data: {json.dumps(last)}\n\n".encode("utf-8"))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        def _send_json(self, response: StubResponse, payload: dict):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(response.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in response.headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_stream(self, response: StubResponse, usage: dict):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            for name, value in response.headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+
+            self._write_chunk(_sse("message_start", {
+                "type": "message_start",
+                "message": {"role": "assistant", "content": [], "usage": {**usage, "output_tokens": 1}},
+            }))
+            self._write_chunk(_sse("content_block_start", {
+                "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+            }))
+            self._write_chunk(_sse("ping", {"type": "ping"}))
+            text = response.text
+            for start in range(0, len(text), response.chunk_size):
+                self._write_chunk(_sse("content_block_delta", {
+                    "type": "content_block_delta",
+                    "index": 0,
+                    "delta": {"type": "text_delta", "text": text[start:start + response.chunk_size]},
+                }))
+                self.wfile.flush()
+                if response.chunk_delay:
+                    time.sleep(response.chunk_delay)
+            self._write_chunk(_sse("content_block_stop", {"type": "content_block_stop", "index": 0}))
+            self._write_chunk(_sse("message_delta", {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn"},
+                "usage": {"output_tokens": usage.get("output_tokens", 0)},
+            }))
+            self._write_chunk(_sse("message_stop", {"type": "message_stop"}))
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    return Handler
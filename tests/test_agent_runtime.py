@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from askit.agent import runtime
+from askit.agent.plan import execute_plan, parse_plan
+from askit.providers.base_provider import AIBaseProvider
+
+
+class SlowProvider(AIBaseProvider):
+    """Answers every install question with `install <tool>` after a fixed delay."""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+
+    @classmethod
+    def from_config(cls, config: dict, api_key=None, **options) -> "SlowProvider":
+        return cls()
+
+    def get_suggestion(self, prompt: str, context: str, conversation=None) -> tuple[str, str, str]:
+        time.sleep(self.delay)
+        tool = prompt.split("'")[1]
+        return ("HIGH", f"install {tool}", "")
+
+
+def test_missing_tools_are_resolved_concurrently():
+    """
+    Test that N install lookups cost about one round trip, not N.
+    """
+    tools = ["jq", "htop", "terraform"]
+    start = time.perf_counter()
+    plan = asyncio.run(runtime.resolve_installation_commands(tools, SlowProvider()))
+
+    assert time.perf_counter() - start < 0.45
+    assert plan == {tool: f"install {tool}" for tool in tools}
+
+
+PLAN = """Plan:
+```bash
+# step: layout
+mkdir -p app/src
+```
+
+```bash
+# step: download
+curl -sSLO https://example.com/a.tar.gz
+```
+
+```bash
+# step: tools
+sudo apt-get install -y nginx
+```
+
+```bash
+# after: tools
+systemctl enable --now nginx
+```
+
+```bash
+# step: jq
+apt-get install -y jq
+```
+
+FILE: app/src/main.py
+```python
+print("hi")
+```
+"""
+
+
+def test_parse_plan_infers_dependencies():
+    """
+    Test that marked blocks wait only for the blocks they name or conflict with (package managers here).
+    """
+    steps = parse_plan(PLAN)
+    by_text = {step.description: step for step in steps}
+
+    assert by_text["curl -sSLO https://example.com/a.tar.gz"].depends_on == set()
+    assert by_text["systemctl enable --now nginx"].depends_on == {by_text["sudo apt-get install -y nginx"].index}
+    assert by_text["apt-get install -y jq"].depends_on == {by_text["sudo apt-get install -y nginx"].index}
+    # An unmarked step (here a file) waits for everything before it
+    assert by_text["create app/src/main.py"].depends_on == set(range(len(steps) - 1))
+
+
+def test_unmarked_blocks_keep_the_plan_order():
+    """
+    Test that a probe in the block after a service start waits for it: the order only the prose implies is kept.
+    """
+    steps = parse_plan(
+        "Start nginx:\n```bash\nsystemctl start nginx\n```\n"
+        "Then check that it answers:\n```bash\ncurl localhost\n```"
+    )
+
+    assert steps[1].depends_on == {steps[0].index}
+
+
+def test_execute_plan_runs_independent_steps_concurrently_and_stops_on_failure():
+    """
+    Test that independent steps overlap and a failure prevents dependents from starting.
+    """
+    steps = parse_plan(
+        "```bash\n# step: a\nsleep a\n```\n```bash\n# step: b\nsleep b\n```\n"
+        "```bash\n# step: c\nfail c\n```\n```bash\n# after: c\nafter c\n```"
+    )
+    started = []
+
+    async def run_step(step):
+        started.append(step.command)
+        await asyncio.sleep(0.2)
+        return not step.command.startswith("fail")
+
+    start = time.perf_counter()
+    result = asyncio.run(execute_plan(steps, run_step, max_workers=3))
+
+    assert time.perf_counter() - start < 0.35
+    assert not result.succeeded
+    assert result.failed.command == "fail c"
+    assert "after c" not in started
+    assert result.skipped == [3]
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from askit.core.batch import read_prompts, run_batch
+from askit.providers.claude import ClaudeProvider
+from askit.providers.http_client import aclose_http_client
+
+
+def test_read_prompts_accepts_lines_and_jsonl():
+    """
+    Test that plain lines and JSON objects are both prompts, in input order.
+    """
+    items = list(read_prompts(["list files\n", "\n", '{"prompt": "show disk usage", "id": 7}\n']))
+
+    assert [(i.index, i.prompt, i.id) for i in items] == [(0, "list files", None), (1, "show disk usage", "7")]
+    with pytest.raises(ValueError, match="line 2"):
+        list(read_prompts(["ok", '{"id": 1}']))
+
+
+def test_results_are_emitted_as_they_complete(stub_server):
+    """
+    Test that prompts run concurrently, results stream out in completion order and failures are reported.
+    """
+    stub_server.enqueue(text="CONFIDENCE: HIGH\nCOMMAND: sleep 1\nEXPLANATION: Slow.", delay=0.4)
+    stub_server.enqueue(text="CONFIDENCE: HIGH\nCOMMAND: ls\nEXPLANATION: Fast.")
+    stub_server.enqueue(status=400, text="boom")
+    items = list(read_prompts(["slow one", "fast one", "broken one"]))
+    results = []
+
+    async def run():
+        try:
+            return await run_batch(
+                items,
+                lambda: ClaudeProvider(api_key="test-key", api_url=stub_server.url, cache_context=True),
+                "shared ctx",
+                emit=results.append,
+                concurrency=3,
+                rate=20,  # Starts 50 ms apart, so the stub answers them in input order
+            )
+        finally:
+            await aclose_http_client()
+
+    start = time.perf_counter()
+    failures = asyncio.run(run())
+
+    assert time.perf_counter() - start < 0.8  # Not 0.4 s of waiting per prompt
+    assert failures == 1
+    assert results[-1]["prompt"] == "slow one" and results[-1]["latency"] >= 0.4
+    by_prompt = {r["prompt"]: r for r in results}
+    assert by_prompt["fast one"]["command"] == "ls"
+    assert by_prompt["fast one"]["tokens"]["output_tokens"] > 0
+    assert by_prompt["broken one"]["error"] and by_prompt["broken one"]["command"] is None
+    json.dumps(results)  # Every result is serializable as a JSON line
+
+
+def test_batch_answers_from_the_response_cache(stub_server, tmp_path):
+    """
+    Test that batch prompts go through the provider's response cache: a repeated batch sends no request.
+    """
+    from askit.core.response_cache import ResponseCache
+
+    cache = ResponseCache(tmp_path / "responses")
+    stub_server.enqueue(text="CONFIDENCE: HIGH\nCOMMAND: df -h\nEXPLANATION: Disk usage.")
+    items = list(read_prompts(["show disk usage"]))
+
+    def run() -> list:
+        results = []
+
+        async def go():
+            try:
+                await run_batch(
+                    items,
+                    lambda: ClaudeProvider(api_key="test-key", api_url=stub_server.url, cache=cache, cache_context=True),
+                    "shared ctx",
+                    emit=results.append,
+                )
+            finally:
+                await aclose_http_client()
+
+        asyncio.run(go())
+        return results
+
+    first, second = run(), run()
+
+    assert len(stub_server.requests) == 1
+    assert first[0]["command"] == second[0]["command"] == "df -h"
+    assert not first[0]["cached"] and second[0]["cached"]
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from askit.providers.claude import ClaudeProvider
+from askit.providers.conversation import Conversation
+from askit.providers.http_client import aclose_http_client
+from askit.providers.streaming import StreamingResponseParser
+
+RESPONSE = "CONFIDENCE: HIGH\nCOMMAND: ps aux --sort=-%mem\nEXPLANATION: Lists processes.\nSorted by memory usage."
+
+
+def test_parser_reports_header_before_explanation():
+    """
+    Test that the streaming parser exposes the command as soon as its line is complete.
+    """
+    parser = StreamingResponseParser()
+    assert not parser.feed("CONFIDENCE: HI")
+    assert not parser.feed("GH\nCOMMAND: ps aux")
+    assert parser.feed(" --sort=-%mem\nEXPL")
+    assert (parser.confidence, parser.command) == ("HIGH", "ps aux --sort=-%mem")
+    assert not parser.feed("ANATION: Lists processes.")
+
+
+def test_stream_suggestion_against_stub(stub_server):
+    """
+    Test that a streamed completion is parsed like a regular one and the command callback fires first.
+    """
+    stub_server.enqueue(text=RESPONSE, chunk_size=5)
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url)
+
+    seen = []
+    result = provider.stream_suggestion("show memory hogs", "ctx", on_command=lambda c, cmd: seen.append((c, cmd)))
+
+    assert seen == [("HIGH", "ps aux --sort=-%mem")]
+    assert result == ("HIGH", "ps aux --sort=-%mem", "Lists processes.\nSorted by memory usage.")
+    assert stub_server.requests[0]["body"]["stream"] is True
+    assert stub_server.requests[0]["headers"]["x-api-key"] == "test-key"
+
+
+def test_get_suggestion_against_stub(stub_server):
+    """
+    Test the non-streaming path against the same stub.
+    """
+    stub_server.enqueue(text=RESPONSE)
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url)
+
+    assert provider.get_suggestion("show memory hogs", "ctx")[1] == "ps aux --sort=-%mem"
+    assert "stream" not in stub_server.requests[0]["body"]
+
+
+def test_stream_suggestion_api_error(stub_server):
+    """
+    Test that API errors are surfaced as a LOW confidence suggestion.
+    """
+    stub_server.enqueue(status=400, text="Invalid request")
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url)
+
+    confidence, command, explanation = provider.stream_suggestion("anything", "ctx")
+    assert (confidence, command) == ("LOW", "")
+    assert "Invalid request" in explanation
+
+
+def test_connection_is_reused_across_calls(stub_server):
+    """
+    Test that consecutive calls, streamed or not, go over the same pooled connection.
+    """
+    with httpx.Client() as client:
+        provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url, client=client)
+
+        provider.stream_suggestion("first", "ctx")
+        assert provider.last_timing.reused_connection is False
+        assert provider.last_timing.ttfb > 0
+
+        provider.stream_suggestion("second", "ctx")
+        assert provider.last_timing.reused_connection is True
+        provider.get_suggestion("third", "ctx")
+        assert provider.last_timing.reused_connection is True
+
+
+def test_aget_suggestion_does_not_block_the_loop(stub_server):
+    """
+    Test that async calls run concurrently on one event loop.
+    """
+    stub_server.enqueue(text=RESPONSE, delay=0.3)
+    stub_server.enqueue(text=RESPONSE, delay=0.3)
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url)
+
+    async def ask_twice():
+        try:
+            return await asyncio.gather(provider.aget_suggestion("a", "ctx"), provider.aget_suggestion("b", "ctx"))
+        finally:
+            await aclose_http_client()
+
+    start = time.perf_counter()
+    results = asyncio.run(ask_twice())
+    assert time.perf_counter() - start < 0.55
+    assert [r[1] for r in results] == ["ps aux --sort=-%mem"] * 2
+
+
+def test_system_prompt_is_prompt_cached(stub_server):
+    """
+    Test that the system prompt is a cache breakpoint and cached input tokens are reported.
+    """
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url)
+
+    provider.get_suggestion("first request", "ctx one")
+    first = provider.last_usage
+    provider.stream_suggestion("second request", "ctx two")
+    second = provider.last_usage
+
+    system = stub_server.requests[0]["body"]["system"]
+    assert system[-1]["cache_control"] == {"type": "ephemeral"}
+    assert first.cache_creation_input_tokens > 0 and first.cache_read_input_tokens == 0
+    assert second.cache_read_input_tokens == first.cache_creation_input_tokens
+    assert second.cache_creation_input_tokens == 0
+    assert 0 < second.input_tokens < second.cache_read_input_tokens
+    assert second.output_tokens > 0
+
+
+def test_clarifications_are_sent_as_cached_turns(stub_server):
+    """
+    Test that a clarification round adds turns after the first message and reads the earlier rounds from the cache.
+    """
+    stub_server.enqueue(text="CONFIDENCE: NONE\nCOMMAND: \nEXPLANATION: Which directory?")
+    stub_server.enqueue(text="CONFIDENCE: NONE\nCOMMAND: \nEXPLANATION: Recursively?")
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url)
+    conversation = Conversation()
+
+    for reply in ("in /var/log", "yes", None):
+        result = provider.stream_suggestion("delete old logs", "some shell context", conversation=conversation)
+        if reply:
+            conversation.add_clarification(*result, reply)
+
+    messages = stub_server.requests[2]["body"]["messages"]
+    assert [m["role"] for m in messages] == ["user", "assistant", "user", "assistant", "user"]
+    assert "some shell context" in json.dumps(messages[0])
+    assert "some shell context" not in json.dumps(messages[1:])
+    assert messages[-1]["content"][-1] == {"type": "text", "text": "yes", "cache_control": {"type": "ephemeral"}}
+    # The third round re-reads everything up to the second round's last turn
+    assert provider.last_usage.cache_read_input_tokens > 0
+    assert provider.last_usage.input_tokens < provider.last_usage.cache_read_input_tokens
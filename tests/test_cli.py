@@ -34,4 +34,26 @@ def test_main_version_flag(capsys):
 
     captured = capsys.readouterr()
     assert "askit-cli version" in captured.out 
-    
\ No newline at end of file
+    
+
+def test_similar_prompt_offer_does_not_block_scripts(isolated_settings, tmp_path, monkeypatch, capsys):
+    """
+    Test that without a terminal the near-duplicate offer is skipped, and an exact repeat is answered from the cache.
+    """
+    from askit.core import config_manager, daemon
+
+    isolated_settings.write_text("provider: fake\n")
+    for name in ("get_cache_dir", "get_data_dir", "get_logs_dir"):
+        monkeypatch.setattr(config_manager, name, lambda name=name: tmp_path / name)
+    monkeypatch.setattr(daemon, "connect_daemon", lambda **kwargs: None)
+    monkeypatch.setattr(sys.stdin, "isatty", lambda: False, raising=False)
+
+    cli.ask_ai("show disk usage")
+    cli.ask_ai("show the disk usage")
+    output = capsys.readouterr().out
+    assert "Similar to a previous request" not in output
+    assert "cancelled" not in output
+    assert output.count("df -h") == 2
+
+    cli.ask_ai("show disk usage")
+    assert "Answered from cache" in capsys.readouterr().out
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from askit.core import config_manager
+
+
+def test_path_resolution_has_no_side_effects(tmp_path, monkeypatch):
+    """
+    Test that resolving the directories creates nothing and ensure_dir creates them once.
+    """
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    for name in ("XDG_CONFIG_HOME", "XDG_CACHE_HOME", "XDG_DATA_HOME", "XDG_RUNTIME_DIR", "APPDATA", "LOCALAPPDATA"):
+        monkeypatch.delenv(name, raising=False)
+    getters = [config_manager.get_config_dir, config_manager.get_cache_dir, config_manager.get_data_dir, config_manager.get_logs_dir]
+    for getter in getters:
+        getter.cache_clear()
+
+    try:
+        paths = [getter() for getter in getters]
+        assert all(str(path).startswith(str(tmp_path)) for path in paths)
+        assert list(tmp_path.iterdir()) == []
+        assert [getter() for getter in getters] == paths  # Cached
+
+        logs_dir = config_manager.ensure_dir(config_manager.get_logs_dir())
+        assert logs_dir.is_dir()
+    finally:
+        for getter in getters:
+            getter.cache_clear()
+
+
+def test_concurrent_atomic_writes_never_tear_the_file(tmp_path):
+    """
+    Test that concurrent writers each use their own temporary file, so the result is always one complete write.
+    """
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+
+    path = tmp_path / "state.json"
+
+    def write(n: int):
+        config_manager.write_file_atomic(path, json.dumps({"writer": n, "data": "x" * 100_000}))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(32)))
+
+    assert json.loads(path.read_text())["writer"] in range(32)
+    assert list(tmp_path.iterdir()) == [path]
+    assert path.stat().st_mode & 0o777 == 0o600
@@ -0,0 +1,43 @@
+from askit.core import context
+from askit.core.context import select_history
+from askit.core.tokens import estimate_tokens
+
+
+def test_estimate_errs_high_on_shell_commands():
+    """
+    Test that the estimate grows with the text and charges punctuation-heavy commands more.
+    """
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("ls") == 1
+    assert estimate_tokens("find . -name '*.log' -mtime +7 -delete") > len("find . -name '*.log' -mtime +7 -delete") / 4
+    assert estimate_tokens("git status " * 10) == 10 * estimate_tokens("git status")
+
+
+def test_history_fits_budget_and_keeps_relevant_lines():
+    """
+    Test that repeated lines are dropped, old lines matching the prompt beat recent noise and the order is kept.
+    """
+    lines = ["docker compose up -d", "make", "cd src", "make", "vim main.py", "git diff", "make"]
+    budget = sum(estimate_tokens(line) + 2 for line in ["docker compose up -d", "git diff", "make"])
+
+    selection = select_history(lines, "restart the docker compose stack", budget)
+
+    assert selection.lines == ["docker compose up -d", "git diff", "make"]
+    assert selection.total == 7 and selection.dropped == 4
+    assert selection.tokens <= budget
+
+
+def test_build_context_reports_dropped_lines(monkeypatch):
+    """
+    Test that the context says how much history was left out when the budget is exceeded.
+    """
+    monkeypatch.setattr(context, "get_shell_history", lambda max_lines, shell=None: [f"echo {i}" for i in range(50)])
+    monkeypatch.setattr(context.project, "find_project_root", lambda cwd=None: None)
+
+    full = context.build_context(50, prompt="anything", token_budget=10_000)
+    trimmed = context.build_context(50, prompt="anything", token_budget=20)
+
+    assert full.history.dropped == 0 and "Shell history (last 50 lines)" in full.text
+    assert trimmed.history.dropped > 0 and trimmed.history.tokens <= 20
+    assert f"{len(trimmed.history.lines)} most relevant of the last 50 lines" in trimmed.text
+    assert "echo 49" in trimmed.text
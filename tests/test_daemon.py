@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from askit.core import config_manager
+from askit.core.daemon import AskitDaemon, connect_daemon, stop_daemon
+
+RESPONSE = "CONFIDENCE: HIGH\nCOMMAND: df -h\nEXPLANATION: Shows disk usage."
+
+
+@pytest.fixture
+def running_daemon(tmp_path, stub_server, isolated_settings, monkeypatch):
+    """An AskitDaemon bound to the API stub, serving from a background thread."""
+    isolated_settings.write_text("mode: strike\nmodel_routing: true\n")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(config_manager, "get_logs_dir", lambda: tmp_path / "logs")
+    socket_path = tmp_path / "daemon.sock"
+    daemon = AskitDaemon(socket_path, api_url=stub_server.url)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    while not socket_path.exists():
+        thread.join(0.01)
+    yield socket_path
+    daemon.shutdown()
+    thread.join(5)
+
+
+def test_requests_are_forwarded_and_streamed_back(running_daemon, stub_server):
+    """
+    Test that a client gets the daemon's configuration, the early command and the final answer.
+    """
+    stub_server.enqueue(text=RESPONSE, chunk_size=4)
+    provider = connect_daemon(use_cache=False, socket_path=running_daemon)
+
+    seen = []
+    result = provider.stream_suggestion("disk usage", "ctx", on_command=lambda c, cmd: seen.append((c, cmd)))
+
+    assert provider.config == {"mode": "strike", "model_routing": True}
+    assert seen == [("HIGH", "df -h")]
+    assert result == ("HIGH", "df -h", "Shows disk usage.")
+    assert stub_server.requests[0]["headers"]["x-api-key"] == "test-key"
+    assert provider.last_route.format().startswith("small model")
+
+
+def test_falls_back_when_no_daemon_answers(running_daemon, tmp_path):
+    """
+    Test that a missing or stopped daemon is ignored.
+    """
+    assert connect_daemon(socket_path=tmp_path / "missing.sock") is None
+
+    assert stop_daemon(running_daemon)
+    deadline = time.monotonic() + 5
+    while running_daemon.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert connect_daemon(socket_path=running_daemon) is None
+
+
+def test_a_live_daemon_keeps_its_socket(running_daemon, tmp_path):
+    """
+    Test that a second daemon refuses a socket that is still served, but replaces a stale one.
+    """
+    import errno
+    import socket
+
+    with pytest.raises(OSError) as excinfo:
+        AskitDaemon(running_daemon).serve_forever()
+    assert excinfo.value.errno == errno.EADDRINUSE
+    assert connect_daemon(use_cache=False, socket_path=running_daemon) is not None
+
+    stale_path = tmp_path / "stale.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(stale_path))
+    stale.close()  # Leaves the socket file with nobody listening
+    daemon = AskitDaemon(stale_path)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    while daemon._server is None:
+        thread.join(0.01)
+    daemon.shutdown()
+    thread.join(5)
+    assert not stale_path.exists()
@@ -0,0 +1,57 @@
+import asyncio
+import io
+import sys
+
+from rich.console import Console
+
+from askit.core.executor import OutputRingBuffer, run_command
+
+PYTHON = f'"{sys.executable}"'
+
+
+def test_ring_buffer_keeps_tail():
+    """
+    Test that the ring buffer keeps only the most recent bytes.
+    """
+    buffer = OutputRingBuffer(capacity=8)
+    buffer.write(b"0123456789")
+    buffer.write(b"ab")
+    assert buffer.getvalue() == b"456789ab"
+    assert buffer.total_bytes == 12
+    assert buffer.truncated
+
+
+def test_chatty_command_is_rendered_in_batches(tmp_path):
+    """
+    Test that a chatty command keeps a bounded tail, spills everything to the log and
+    renders far fewer lines than it produces.
+    """
+    stream = io.StringIO()
+    console = Console(file=stream, width=200)
+    log_file = tmp_path / "out.log"
+    command = f"{PYTHON} -c \"import sys; sys.stdout.write(''.join(f'line {{i}}\\n' for i in range(100000)))\""
+
+    result = asyncio.run(run_command(command, console=console, max_buffer=1024, log_file=log_file))
+
+    assert result.succeeded
+    assert result.truncated
+    assert len(result.output) <= 1024
+    assert result.output.endswith("line 99999\n")
+    assert log_file.read_text().count("\n") == 100000
+    rendered = stream.getvalue()
+    assert "line 99999" in rendered
+    assert rendered.count("\n") < 10000
+
+
+def test_spills_to_log_dir_on_overflow(tmp_path, monkeypatch):
+    """
+    Test that output larger than the buffer is spilled to a log file automatically.
+    """
+    monkeypatch.setattr("askit.core.executor.new_log_path", lambda prefix="exec": tmp_path / "spill.log")
+    command = f"{PYTHON} -c \"print('x' * 5000); raise SystemExit(3)\""
+
+    result = asyncio.run(run_command(command, max_buffer=1000))
+
+    assert result.return_code == 3
+    assert result.log_file == tmp_path / "spill.log"
+    assert result.log_file.read_text().strip() == "x" * 5000
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+
+from askit.providers import rate_limit
+from askit.providers.claude import ClaudeProvider
+from askit.providers.hedging import MIN_SAMPLES, SAVE_INTERVAL, Hedger, LatencyHistogram
+from askit.providers.http_client import aclose_http_client
+from askit.providers.rate_limit import AdaptiveRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiter(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_limiter", AdaptiveRateLimiter())
+
+
+def _trained_histogram(tmp_path, seconds=0.02, requests=100) -> LatencyHistogram:
+    histogram = LatencyHistogram(tmp_path / "latency_histogram.json")
+    for _ in range(MIN_SAMPLES):
+        histogram.record(seconds)
+    histogram.requests = requests
+    return histogram
+
+
+def test_histogram_percentiles_are_persisted(tmp_path):
+    """
+    Test that percentiles come from the recorded latencies and survive a reload.
+    """
+    histogram = LatencyHistogram(tmp_path / "latency_histogram.json")
+    assert histogram.percentile(50) is None
+    for seconds in [0.02] * 90 + [1.0] * 10:
+        histogram.record(seconds)
+    histogram.save()
+
+    reloaded = LatencyHistogram(tmp_path / "latency_histogram.json")
+    assert reloaded.count == 100
+    assert 0.02 <= reloaded.percentile(50) < 0.03
+    assert 1.0 <= reloaded.percentile(99) < 1.3
+
+
+def test_histogram_is_saved_periodically_through_unique_temporary_files(tmp_path):
+    """
+    Test that requests are saved every SAVE_INTERVAL, not after each one, and that no temporary file is left behind.
+    """
+    path = tmp_path / "latency_histogram.json"
+    hedger = Hedger(LatencyHistogram(path))
+
+    for _ in range(SAVE_INTERVAL - 1):
+        hedger.send(lambda: "response")
+    assert not path.exists()
+
+    hedger.send(lambda: "response")
+    assert LatencyHistogram(path).requests == SAVE_INTERVAL
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+    hedger.send(lambda: "response")
+    hedger.histogram.save(min_unsaved=1)  # As at exit
+    assert LatencyHistogram(path).requests == SAVE_INTERVAL + 1
+
+
+
+def test_failed_unhedged_request_is_still_counted(tmp_path):
+    """
+    Test that a request that raises before hedging is possible is still recorded and counted.
+    """
+    hedger = Hedger(LatencyHistogram(tmp_path / "latency_histogram.json"))
+
+    def fail():
+        raise ConnectionError("refused")
+
+    with pytest.raises(ConnectionError):
+        hedger.send(fail)
+    assert hedger.histogram.requests == 1
+    assert sum(hedger.histogram.buckets) == 1
+
+
+def test_slow_request_is_hedged(stub_server, tmp_path):
+    """
+    Test that a request slower than the p95 gets a duplicate whose answer is used, streamed or not.
+    """
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url, hedger=Hedger(_trained_histogram(tmp_path)))
+
+    stub_server.enqueue(text="CONFIDENCE: HIGH\nCOMMAND: slow\nEXPLANATION: Late.", delay=1.0)
+    start = time.perf_counter()
+    assert provider.stream_suggestion("list files", "ctx")[1] == "ls -la"
+    assert time.perf_counter() - start < 0.5
+
+    stub_server.enqueue(text="CONFIDENCE: HIGH\nCOMMAND: slow\nEXPLANATION: Late.", delay=1.0)
+
+    async def ask():
+        try:
+            return await provider.aget_suggestion("list files", "ctx")
+        finally:
+            await aclose_http_client()
+
+    start = time.perf_counter()
+    assert asyncio.run(ask())[1] == "ls -la"
+    assert time.perf_counter() - start < 0.5
+    assert len(stub_server.requests) == 4
+    assert provider.hedger.histogram.hedges == 2
+
+
+def test_duplicate_spend_is_capped(stub_server, tmp_path):
+    """
+    Test that no duplicate is sent once the hedge budget is spent.
+    """
+    histogram = _trained_histogram(tmp_path, requests=10)
+    histogram.hedges = 1  # 10% of 10 requests
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url, hedger=Hedger(histogram, max_ratio=0.1))
+    stub_server.enqueue(delay=0.3)
+
+    assert provider.get_suggestion("list files", "ctx")[1] == "ls -la"
+    assert len(stub_server.requests) == 1
@@ -0,0 +1,107 @@
+import os
+import stat
+
+import pytest
+
+from askit.core import project
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """A project with a nested source directory; hints are kept in tmp_path."""
+    monkeypatch.setattr(project, "_hints_file", lambda: tmp_path / "project_roots.json")
+    monkeypatch.setattr(project, "_root_cache", {})
+    monkeypatch.delenv(project.CEILING_ENV_VAR, raising=False)
+    root = tmp_path / "repo"
+    (root / ".askit").mkdir(parents=True)
+    (root / "src" / "pkg").mkdir(parents=True)
+    return root
+
+
+def _count_stats(monkeypatch) -> list:
+    calls = []
+    real_stat = os.stat
+
+    def counting_stat(path, *args, **kwargs):
+        calls.append(str(path))
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", counting_stat)
+    return calls
+
+
+def test_root_is_cached_per_directory_and_hinted(tree, monkeypatch):
+    """
+    Test that a second lookup costs one stat in-process and across processes (via the hint file).
+    """
+    start = tree / "src" / "pkg"
+    assert project.find_project_root(start) == tree
+
+    calls = _count_stats(monkeypatch)
+    assert project.find_project_root(start) == tree
+    assert len(calls) == 1
+
+    # A new process: empty in-memory cache, but the hint file remembers the root
+    monkeypatch.setattr(project, "_root_cache", {})
+    calls.clear()
+    assert project.find_project_root(start) == tree
+    assert len(calls) == 1
+
+
+def test_ceiling_directories_stop_the_walk(tree, monkeypatch):
+    """
+    Test that the walk never enters a ceiling directory.
+    """
+    monkeypatch.setenv(project.CEILING_ENV_VAR, str(tree))
+    assert project.find_project_root(tree / "src" / "pkg", use_hints=False) is None
+    # The ceiling only limits the walk: starting inside the root still finds it
+    assert project.find_project_root(tree, use_hints=False) == tree
+
+
+def test_walk_stats_each_level_and_misses_are_hinted(tree, monkeypatch):
+    """
+    Test that the walk stats each level and its `.askit` once and that a "no project" answer spares the next process the walk.
+    """
+    calls = _count_stats(monkeypatch)
+    assert project.find_project_root(tree / "src" / "pkg", use_hints=False) == tree
+    assert len(calls) == 2 * 3  # pkg, src and repo, then `.askit` in each
+
+    outside = tree.parent / "elsewhere"
+    outside.mkdir()
+    monkeypatch.setenv(project.CEILING_ENV_VAR, str(tree.parent))
+    assert project.find_project_root(outside) is None
+
+    # A new process trusts the negative hint until it expires
+    monkeypatch.setattr(project, "_root_cache", {})
+    calls.clear()
+    assert project.find_project_root(outside) is None
+    assert calls == []
+
+    (outside / ".askit").mkdir()
+    monkeypatch.setattr(project, "_root_cache", {})
+    monkeypatch.setattr(project, "NEGATIVE_HINT_TTL", 0.0)
+    assert project.find_project_root(outside) == outside
+
+
+def test_walk_stops_at_the_filesystem_boundary(tree, monkeypatch):
+    """
+    Test that the walk does not leave the start directory's filesystem unless told to.
+    """
+    mount_point = str(tree / "src")
+    real_stat = os.stat
+
+    def mounted_stat(path, *args, **kwargs):
+        result = real_stat(path, *args, **kwargs)
+        if str(path) == mount_point or str(path).startswith(mount_point + os.sep):
+            fields = list(result)
+            fields[stat.ST_DEV] += 1
+            return os.stat_result(fields)
+        return result
+
+    monkeypatch.setattr(os, "stat", mounted_stat)
+    monkeypatch.delenv(project.ACROSS_FILESYSTEM_ENV_VAR, raising=False)
+    assert project.find_project_root(tree / "src" / "pkg", use_hints=False) is None
+
+    monkeypatch.setattr(project, "_root_cache", {})
+    monkeypatch.setenv(project.ACROSS_FILESYSTEM_ENV_VAR, "1")
+    assert project.find_project_root(tree / "src" / "pkg", use_hints=False) == tree
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from askit.providers.claude import ClaudeProvider
+from askit.providers.fake import FakeProvider
+from askit.providers.http_client import aclose_http_client
+from askit.providers.openai import OpenAICompatibleProvider
+from askit.providers.registry import create_provider
+
+
+def test_registry_creates_the_configured_provider():
+    """
+    Test that the `provider` key selects the backend and that only Claude requires the API key.
+    """
+    assert isinstance(create_provider({}, "test-key"), ClaudeProvider)
+    assert isinstance(create_provider({"provider": "fake"}), FakeProvider)
+
+    local = create_provider({"provider": "openai", "openai_base_url": "http://127.0.0.1:8080/v1/"})
+    assert isinstance(local, OpenAICompatibleProvider)
+    assert local.api_url == "http://127.0.0.1:8080/v1/chat/completions"
+
+    with pytest.raises(ValueError, match="API key"):
+        create_provider({"provider": "claude"})
+    with pytest.raises(ValueError, match="Unknown provider"):
+        create_provider({"provider": "nope"})
+
+
+def test_openai_compatible_provider_against_stub(stub_server, monkeypatch):
+    """
+    Test that the chat completions backend sends flat messages after the system prompt and parses streamed and plain answers.
+    """
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    provider = create_provider({"provider": "openai", "openai_base_url": stub_server.openai_base_url, "openai_model": "qwen"})
+    stub_server.enqueue(text="CONFIDENCE: HIGH\nCOMMAND: df -h\nEXPLANATION: Disk usage.", chunk_size=5)
+
+    seen = []
+    result = provider.stream_suggestion("disk usage", "ctx", on_command=lambda c, cmd: seen.append((c, cmd)))
+
+    assert result == ("HIGH", "df -h", "Disk usage.")
+    assert seen == [("HIGH", "df -h")]
+    request = stub_server.requests[0]
+    assert request["path"] == "/v1/chat/completions"
+    assert "authorization" not in {name.lower() for name in request["headers"]}
+    assert request["body"]["model"] == "qwen"
+    assert [m["role"] for m in request["body"]["messages"]] == ["system", "user"]
+    assert "User Request: disk usage" in request["body"]["messages"][1]["content"]
+    assert provider.last_usage.output_tokens > 0
+
+    async def ask():
+        try:
+            return await provider.aget_suggestion("list files", "ctx")
+        finally:
+            await aclose_http_client()
+
+    assert asyncio.run(ask())[1] == "ls -la"
+
+
+def test_fake_provider_answers_offline():
+    """
+    Test that the fake backend answers from its canned table, streamed or not, and records what it was sent.
+    """
+    provider = FakeProvider()
+
+    seen = []
+    assert provider.stream_suggestion("show disk usage", "ctx", on_command=lambda c, cmd: seen.append((c, cmd)))[1] == "df -h"
+    assert seen == [("HIGH", "df -h")]
+    assert provider.get_suggestion("create a flask project", "ctx")[0] == "AGENT"
+    assert provider.get_suggestion("frobnicate the widgets", "ctx")[0] == "LOW"
+    assert provider.requests[0]["stream"] is True
+    assert provider.last_usage.output_tokens > 0
+    assert asyncio.run(provider.aget_suggestion("list the files", "ctx"))[1] == "ls -la"
+
+
+def test_incomplete_backend_fails_when_created():
+    """
+    Test that a backend missing one of the wire format hooks cannot be instantiated.
+    """
+    from askit.providers.chat import ChatProvider
+
+    class NoStreaming(ChatProvider):
+        @classmethod
+        def from_config(cls, config, api_key=None, **options):
+            return cls(None, "http://localhost/", "model")
+
+        def _build_request(self, messages, stream=False, route=None):
+            return {}, {}
+
+        def _extract_text(self, response):
+            return ""
+
+    with pytest.raises(TypeError, match="_iter_stream_text"):
+        NoStreaming.from_config({})
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from askit.providers import rate_limit
+from askit.providers.claude import ClaudeProvider
+from askit.providers.rate_limit import AdaptiveRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiter(monkeypatch):
+    """A process-wide limiter without state from other tests, and short backoffs."""
+    limiter = AdaptiveRateLimiter()
+    monkeypatch.setattr(rate_limit, "_limiter", limiter)
+    monkeypatch.setattr(rate_limit, "BACKOFF_BASE", 0.01)
+    return limiter
+
+
+def test_rate_limited_and_overloaded_calls_are_retried(stub_server, monkeypatch, capsys):
+    """
+    Test that a 429 waits for retry-after, a 529 is retried with backoff and both end in an answer.
+    """
+    monkeypatch.setenv("ASKIT_DEBUG", "1")
+    stub_server.enqueue(status=429, text="rate limited", headers={"retry-after": "0.2"})
+    stub_server.enqueue(status=529, text="overloaded")
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url)
+
+    assert provider.stream_suggestion("list files", "ctx")[1] == "ls -la"
+    assert len(stub_server.requests) == 3
+    debug = capsys.readouterr().err
+    assert "HTTP 429: retry 1/3 in 0.20s" in debug and "HTTP 529: retry 2/3" in debug
+
+
+def test_retries_are_bounded(stub_server):
+    """
+    Test that a persistently failing API gives up after MAX_RETRIES retries with the API's message.
+    """
+    for _ in range(rate_limit.MAX_RETRIES + 1):
+        stub_server.enqueue(status=503, text="unavailable")
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url)
+
+    confidence, command, explanation = provider.get_suggestion("list files", "ctx")
+
+    assert (confidence, command) == ("LOW", "")
+    assert "unavailable" in explanation
+    assert len(stub_server.requests) == rate_limit.MAX_RETRIES + 1
+
+
+def test_x_should_retry_overrides_the_status(stub_server):
+    """
+    Test that `x-should-retry: true` retries an otherwise final error and `false` keeps a retryable one.
+    """
+    stub_server.enqueue(status=400, text="try again", headers={"x-should-retry": "true"})
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url)
+    assert provider.get_suggestion("list files", "ctx")[1] == "ls -la"
+    assert len(stub_server.requests) == 2
+
+    stub_server.enqueue(status=503, text="do not retry", headers={"x-should-retry": "false"})
+    confidence, command, explanation = provider.get_suggestion("show disk usage", "ctx")
+    assert (confidence, command) == ("LOW", "") and "do not retry" in explanation
+    assert len(stub_server.requests) == 3
+
+
+def test_limiter_follows_rate_limit_headers():
+    """
+    Test that the bucket adopts the advertised limit and holds requests until an exhausted limit resets.
+    """
+    now = [100.0]
+    limiter = AdaptiveRateLimiter(clock=lambda: now[0])
+    assert limiter.reserve() == 0  # Nothing known yet
+
+    limiter.update(httpx.Headers({
+        "anthropic-ratelimit-requests-limit": "60",
+        "anthropic-ratelimit-requests-remaining": "1",
+    }), 200)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(1.0)  # 60 per minute: one more slot per second
+
+    reset = (datetime.now(timezone.utc) + timedelta(seconds=10)).isoformat()
+    limiter.update(httpx.Headers({
+        "anthropic-ratelimit-input-tokens-remaining": "0",
+        "anthropic-ratelimit-input-tokens-reset": reset,
+    }), 200)
+    assert 9 < limiter.reserve() <= 10
@@ -0,0 +1,54 @@
+import os
+import time
+
+from askit.core.response_cache import ResponseCache, make_cache_key
+from askit.providers.claude import ClaudeProvider
+
+
+def test_cache_key_normalizes_whitespace():
+    """
+    Test that formatting-only differences map to the same cache entry.
+    """
+    assert make_cache_key("m", "sys", "list  files", "ctx\n\nmore") == make_cache_key("m", "sys", " list files ", "ctx more")
+    assert make_cache_key("m", "sys", "list files") != make_cache_key("other", "sys", "list files")
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    """
+    Test that expired entries miss and that the least recently used entry is evicted first.
+    """
+    cache = ResponseCache(tmp_path, ttl=60, max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    old = time.time() - 30
+    os.utime(tmp_path / "b.json", (old, old))
+    assert cache.get("a") == "A"
+
+    cache.put("c", "C")  # Over the bound: "b" is the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get("a") is None
+
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+
+def test_provider_hit_skips_api(stub_server, tmp_path):
+    """
+    Test that a repeated query is served from the cache and refresh mode goes back to the API.
+    """
+    cache = ResponseCache(tmp_path)
+    provider = ClaudeProvider(api_key="k", api_url=stub_server.url, cache=cache)
+
+    first = provider.stream_suggestion("list files", "ctx")
+    second = provider.stream_suggestion("list files", "ctx")
+    assert first == second
+    assert provider.last_from_cache
+    assert len(stub_server.requests) == 1
+
+    cache.refresh = True
+    provider.stream_suggestion("list files", "ctx")
+    assert len(stub_server.requests) == 2
@@ -0,0 +1,50 @@
+import json
+
+from askit.providers.claude import ClaudeProvider
+from askit.providers.routing import LARGE_MODEL, PLAN_MAX_TOKENS, SMALL_MODEL, ModelRouter, get_router
+
+
+def test_prompts_are_routed_by_complexity():
+    """
+    Test that short prompts go to the small model and plans, multi-step or history-related ones to the large one.
+    """
+    router = ModelRouter()
+
+    assert router.route("list files").tier == "small"
+    assert router.route("show disk usage").model == SMALL_MODEL
+
+    plan = router.route("create a flask project with a virtualenv")
+    assert (plan.tier, plan.model, plan.max_tokens) == ("large", LARGE_MODEL, PLAN_MAX_TOKENS)
+    assert router.route("stop nginx, clear its logs, then restart it").tier == "large"
+    assert router.route("run the previous command with sudo").tier == "large"
+    assert router.route("list files", clarification=True).tier == "large"
+    assert router.route("find " + "very " * 40 + "large files").tier == "large"
+
+    assert get_router({}) is None  # Opt-in: the configured model is used unless routing is asked for
+    assert get_router({"model_routing": False}) is None
+    assert get_router({"model_routing": True}) is not None
+
+
+def test_low_confidence_answer_is_escalated(stub_server, tmp_path):
+    """
+    Test that a LOW answer of the small model is asked again with the large model, unannounced, and both answers are logged.
+    """
+    router = ModelRouter(log_path=tmp_path / "routing.jsonl")
+    provider = ClaudeProvider(api_key="test-key", api_url=stub_server.url, router=router)
+    stub_server.enqueue(text="CONFIDENCE: LOW\nCOMMAND: ls\nEXPLANATION: Maybe.")
+    stub_server.enqueue(text="CONFIDENCE: HIGH\nCOMMAND: ls -la\nEXPLANATION: Sure.")
+
+    seen = []
+    result = provider.stream_suggestion("list files", "ctx", on_command=lambda c, cmd: seen.append((c, cmd)))
+
+    assert result == ("HIGH", "ls -la", "Sure.")
+    assert seen == [("HIGH", "ls -la")]
+    assert [request["body"]["model"] for request in stub_server.requests] == [SMALL_MODEL, LARGE_MODEL]
+    assert provider.last_route.escalated
+
+    entries = [json.loads(line) for line in (tmp_path / "routing.jsonl").read_text().splitlines()]
+    assert [(entry["tier"], entry["confidence"], entry["escalated"]) for entry in entries] == [
+        ("small", "LOW", False),
+        ("large", "HIGH", True),
+    ]
+    assert "list files" not in (tmp_path / "routing.jsonl").read_text()
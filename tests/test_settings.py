@@ -0,0 +1,58 @@
+import os
+
+from askit.core import settings
+from askit.security import secrets_manager
+
+
+def _keychain_must_not_be_queried():
+    raise AssertionError("keychain queried")
+
+
+def test_environment_key_takes_precedence(isolated_settings, monkeypatch):
+    """
+    Test that ANTHROPIC_API_KEY wins over the keychain, which is then never queried.
+    """
+    monkeypatch.setattr(secrets_manager, "get_api_key", _keychain_must_not_be_queried)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "env-key")
+
+    current = settings.get_settings()
+    assert (current.api_key, current.api_key_source) == ("env-key", "environment")
+
+
+def test_keychain_and_config_are_loaded_once_until_the_config_changes(isolated_settings, monkeypatch):
+    """
+    Test that repeated lookups reuse the snapshot and a config file change reloads it.
+    """
+    lookups = []
+    monkeypatch.setattr(secrets_manager, "get_api_key", lambda: lookups.append(1) or "keychain-key")
+    isolated_settings.write_text("mode: strike\n")
+
+    for _ in range(3):
+        current = settings.get_settings()
+    assert (current.api_key, current.api_key_source) == ("keychain-key", "keychain")
+    assert current.config["mode"] == "strike"
+    assert len(lookups) == 1
+
+    isolated_settings.write_text("mode: normal\ncache_ttl: 60\n")
+    stat = isolated_settings.stat()
+    os.utime(isolated_settings, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    current = settings.get_settings()
+    assert current.config == {"mode": "normal", "cache_ttl": 60}
+    assert len(lookups) == 2
+
+
+def test_project_config_overrides_global(isolated_settings, tmp_path, monkeypatch):
+    """
+    Test that a project's .askit/config.yaml is layered over the global configuration.
+    """
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "env-key")
+    isolated_settings.write_text("mode: normal\ncache_ttl: 60\n")
+    project = tmp_path / "project"
+    (project / ".askit").mkdir(parents=True)
+    (project / "src").mkdir()
+    (project / ".askit" / "config.yaml").write_text("mode: strike\n")
+
+    current = settings.get_settings(project / "src")
+    assert current.project_root == project
+    assert current.config == {"mode": "strike", "cache_ttl": 60}
@@ -0,0 +1,26 @@
+from askit.core.similarity_index import SimilarityIndex, canonical_terms
+
+
+def test_paraphrases_share_canonical_terms():
+    """
+    Test that common sysadmin paraphrases reduce to the same terms.
+    """
+    assert canonical_terms("show procs over 100MB RAM") == canonical_terms("list processes using more than 100MB memory")
+
+
+def test_find_similar(tmp_path):
+    """
+    Test that near-duplicates match, while different values or another OS scope do not.
+    """
+    index = SimilarityIndex(tmp_path / "index.json")
+    index.add("show procs over 100MB RAM", "HIGH", "ps aux | awk '$6 > 102400'", "Lists processes.", scope="Linux")
+    index.add("check the health of all kubernetes pods", "HIGH", "kubectl get pods -A", "Shows pods.", scope="Linux")
+
+    # Reload from disk to make sure the index is persisted
+    index = SimilarityIndex(tmp_path / "index.json")
+    score, entry = index.find_similar("list processes using more than 100MB memory", scope="Linux")
+    assert score > 0.99
+    assert entry["command"] == "ps aux | awk '$6 > 102400'"
+
+    assert index.find_similar("list processes using more than 500MB memory", scope="Linux") is None
+    assert index.find_similar("list processes using more than 100MB memory", scope="Windows") is None
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Cumulative `python -X importtime` budget for `import askit.cli`, in microseconds.
+# Today it is mostly typer and rich; keyring, httpx or prompt_toolkit sneaking
+# back into the top-level imports would blow it.
+IMPORT_BUDGET_US = int(os.environ.get("ASKIT_IMPORT_BUDGET_US", 150_000))
+
+HEAVY_MODULES = {"keyring", "httpx", "prompt_toolkit", "asyncio", "askit.providers", "askit.agent", "askit.security"}
+
+
+def _import_times(code: str) -> dict[str, int]:
+    """Runs `code` in a fresh interpreter and returns {module: cumulative import time in us}."""
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR), PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, timeout=60,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_stays_within_budget():
+    """
+    Test that importing the CLI entry point loads no heavy dependency and stays within the startup budget.
+    """
+    # Warm the OS file cache so the measurement is about imports, not the disk
+    _import_times("import askit.cli")
+    times = _import_times("import askit.cli")
+
+    assert not HEAVY_MODULES & times.keys()
+    assert times["askit.cli"] < IMPORT_BUDGET_US, f"askit.cli took {times['askit.cli']} us to import"
+
+
+def test_version_and_help_do_not_load_provider_stack():
+    """
+    Test that --version and the no-argument help screen never import keyring or the providers.
+    """
+    for args in (["--version"], []):
+        times = _import_times(f"from askit.cli import main\ntry:\n    main({args!r})\nexcept SystemExit:\n    pass")
+        assert "askit.cli" in times
+        assert not HEAVY_MODULES & times.keys(), args